@@ -1,20 +1,58 @@
 # File: backend/app/__init__.py
 # Description: Main application factory.
 
-from fastapi import FastAPI
-from .api.v1 import agent_legal, agent_marketing, agent_operational, agent_proactive, orchestrator, agent_brand
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+
+from .core.admission import ADMISSION_CONTROL_ENABLED, AdmissionMiddleware, admission_stats
+from .core.bulkheads import bulkhead_stats, shutdown_bulkheads
+from .core.deadlines import DEADLINES_ENABLED, DEGRADED_HEADER, DeadlineMiddleware
+from .core.metrics import METRICS_ENABLED, ServerTimingMiddleware, render_metrics
+from .core.model_router import model_router
+from .core.profiling import PROFILING_ENABLED, ProfilingMiddleware
+from .core.tracing import TracingMiddleware
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Starts background tasks and releases shared clients on shutdown."""
+    from .api.v1.agent_proactive import scan_scheduler
+    from .infrastructure.database.elasticsearch_connector import es_connector
+    es_connector.start_health_checks()
+    scan_scheduler.start()
+    yield
+    await scan_scheduler.stop()
+    from .application.services.news_feed_service import close_http_client
+    await close_http_client()
+    await es_connector.close()
+    from .infrastructure.storage.profile_vector_store import profile_vector_store
+    profile_vector_store.flush()
+    shutdown_bulkheads()
 
 def create_app() -> FastAPI:
     """Application factory function."""
+    # Routers are imported here rather than at module level so that importing a
+    # single service (e.g. from a benchmark) does not load every model and client.
+    from .api.v1 import agent_legal, agent_marketing, agent_operational, agent_proactive, orchestrator, agent_brand, admin
     
     # Initialize the main FastAPI app instance
     app = FastAPI(
         title="UMKM-Go AI Backend",
         description="API for the UMKM-Go AI multi-agent system.",
         version="1.0.0",
+        lifespan=lifespan,
     )
 
+    # Concurrency limits and load shedding for the expensive routes. Added before
+    # CORS so that 503 responses still carry the CORS headers.
+    if ADMISSION_CONTROL_ENABLED:
+        app.add_middleware(AdmissionMiddleware)
+    # Per-request time budget; wraps admission control so queueing uses up the budget too.
+    if DEADLINES_ENABLED:
+        app.add_middleware(DeadlineMiddleware)
+
     # Add CORS middleware
     app.add_middleware(
         CORSMiddleware,
@@ -22,13 +60,54 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["Server-Timing", "traceparent", "x-profile-file", "Retry-After", DEGRADED_HEADER],
     )
 
+    # Sampling profiler for requests sent with the admin token (only when one is configured)
+    if PROFILING_ENABLED:
+        app.add_middleware(ProfilingMiddleware)
+
+    # Per-stage timings of each request in a Server-Timing header
+    if METRICS_ENABLED:
+        app.add_middleware(ServerTimingMiddleware)
+    # Trace context from the incoming request; added last so it wraps everything
+    app.add_middleware(TracingMiddleware)
+
     # Health Check Endpoint
     @app.get("/", tags=["Health Check"])
     async def read_root():
         return {"message": "Welcome to the UMKM-Go AI Backend! The server is running."}
 
+    @app.get("/metrics", tags=["Health Check"], response_class=PlainTextResponse)
+    async def metrics():
+        """Stage latency histograms in the Prometheus text format."""
+        if not METRICS_ENABLED:
+            raise HTTPException(status_code=404, detail="Metrics are disabled (METRICS_ENABLED=false).")
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+    @app.get("/health/elasticsearch", tags=["Health Check"])
+    async def elasticsearch_health():
+        """Circuit state, last health check and connection pool utilization of the Elasticsearch clients."""
+        from .infrastructure.database.elasticsearch_connector import es_connector
+        return es_connector.stats()
+
+    @app.get("/health/bulkheads", tags=["Health Check"])
+    async def bulkhead_health():
+        """Threads, running and queued blocking calls of each workload's thread pool."""
+        return bulkhead_stats()
+
+    @app.get("/health/admission", tags=["Health Check"])
+    async def admission_health():
+        """In-flight requests, queue depth and shed counts of each admission pool."""
+        if not ADMISSION_CONTROL_ENABLED:
+            raise HTTPException(status_code=404, detail="Admission control is disabled (ADMISSION_CONTROL_ENABLED=false).")
+        return admission_stats()
+
+    @app.get("/health/models", tags=["Health Check"])
+    async def model_health():
+        """Gemini tier choices, recent latencies and token counts per call site."""
+        return model_router.stats()
+
     # Include all agent routers
     app.include_router(agent_legal.router, prefix="/api/v1/agent/legal", tags=["Legal Agent"])
     app.include_router(agent_marketing.router, prefix="/api/v1/agent/marketing", tags=["Marketing Agent"])
@@ -36,6 +115,7 @@ def create_app() -> FastAPI:
     app.include_router(agent_proactive.router, prefix="/api/v1/agent/proactive", tags=["Proactive Agent"])
     app.include_router(orchestrator.router, prefix="/api/v1/orchestrator", tags=["Orchestrator"])
     app.include_router(agent_brand.router, prefix="/api/v1/agent/brand", tags=["Brand Agent"])
+    app.include_router(admin.router, prefix="/admin", tags=["Admin"], include_in_schema=PROFILING_ENABLED)
     
     print("[+] Application assembled with all agent routers.")
     
@@ -0,0 +1,60 @@
+# File: backend/app/api/v1/admin.py
+# Description: Admin-only diagnostics: stored request profiles and tracemalloc snapshots.
+# Every endpoint requires the `x-admin-token` header to match PROFILING_ADMIN_TOKEN
+# and answers 404 when no token is configured.
+
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.core.profiling import PROFILING_ENABLED, is_admin, list_profiles, memory_snapshots, profile_path
+
+
+def require_admin(x_admin_token: str | None = Header(default=None)):
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/profiles")
+async def get_profiles():
+    """Stored request profiles, newest first. Profile a request by sending it with `x-profile: <admin token>`."""
+    return {"profiles": list_profiles()}
+
+
+@router.get("/profiles/{name}")
+async def download_profile(name: str):
+    """One profile in the folded-stack format (flamegraph.pl, speedscope)."""
+    path = profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Profile '{name}' not found.")
+    return FileResponse(path, media_type="text/plain", filename=name)
+
+
+@router.post("/memory/snapshot")
+async def take_memory_snapshot(top: int = 20, group_by: Literal["lineno", "filename", "traceback"] = "lineno"):
+    """
+    Takes a tracemalloc snapshot, starting tracemalloc on the first call. Later
+    snapshots include the allocations that grew the most since the first one
+    (`since_baseline`) and since the previous one (`since_previous`).
+    """
+    # Snapshots of a large heap take seconds; keep the event loop free meanwhile.
+    return await run_in_threadpool(memory_snapshots.take, max(1, min(top, 200)), group_by)
+
+
+@router.get("/memory")
+async def memory_status():
+    """Whether tracemalloc is running, and the memory it currently traces."""
+    return memory_snapshots.status()
+
+
+@router.delete("/memory")
+async def stop_memory_tracing():
+    """Stops tracemalloc (removing its allocation overhead) and drops the snapshots."""
+    return {"stopped": memory_snapshots.stop()}
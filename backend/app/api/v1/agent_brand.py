@@ -4,11 +4,22 @@ import os
 import base64
 import re
 import json
+import asyncio
+import tempfile
 from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 from app.core.models import gemini_model  # Shared Gemini
+from app.core import deadlines
+from app.core.bulkheads import iterate_in, run_in
+from app.core.metrics import stage
+from app.core.model_router import model_router
+from app.core.tracing import set_token_usage
+from app.core.json_stream import IncrementalJsonParser
 from app.infrastructure.database.elasticsearch_connector import es_client
+from app.application.services.visual_tag_service import infer_tags_from_embedding
 # For embedding
 from vertexai.vision_models import MultiModalEmbeddingModel, Image as VertexImage
 from vertexai.generative_models import Part, GenerationConfig  # For Gemini call
@@ -19,6 +30,17 @@ from vertexai.preview.vision_models import ImageGenerationModel
 VISUAL_KB_INDEX = "umkm_visual_kb"
 GCS_BUCKET_NAME = "umkm-go-ai-logos-hackathon"
 IMAGEN_NUMBER_OF_IMAGES = 1
+# How the tags that filter the visual KB search are produced:
+# "embedding" - nearest tag text embeddings to the image embedding (local, no extra
+#               Gemini call); falls back to "gemini" if the tag index is unavailable.
+# "gemini"    - ask Gemini for tags, as before.
+BRAND_TAG_MODE = os.getenv("BRAND_TAG_MODE", "embedding").lower()
+# Time budget handling (see app.core.deadlines): optional stages (image tags via
+# Gemini, visual inspiration search, logo images) are skipped when less than the
+# generation reserve is left, and a logo image is not started with less than
+# BRAND_LOGO_MIN_SECONDS left.
+BRAND_GENERATION_RESERVE_SECONDS = float(os.getenv("BRAND_GENERATION_RESERVE_SECONDS", "20"))
+BRAND_LOGO_MIN_SECONDS = float(os.getenv("BRAND_LOGO_MIN_SECONDS", "10"))
 
 # --- Inisialisasi Model Imagen & GCS Client ---
 try:
@@ -75,6 +97,7 @@ class BrandKit(BaseModel):
     instagram_bio: str
     image_analysis: ImageAnalysis
     visual_inspirations: List[VisualInspiration]
+    degraded_stages: List[str] = []  # optional stages skipped to meet the deadline
 
 
 class BrandAgentResponse(BaseModel):
@@ -88,28 +111,14 @@ router = APIRouter()
 # --- Helper Functions
 
 
-def extract_json_from_text(text: str) -> Optional[dict]:
-    match = re.search(r"```json\n(.*?)\n```", text, re.DOTALL | re.IGNORECASE)
-    if match:
-        json_str = match.group(1)
-    else:
-        match = re.search(r"\{.*\}", text, re.DOTALL)
-        if not match:
-            return None
-        json_str = match.group(0)
-    try:
-        return json.loads(json_str)
-    except json.JSONDecodeError as e:
-        print(f"[!] Helper: Failed decode: {e}")
-        return None
-
-
 def get_image_embedding_bytes(image_bytes: bytes) -> list[float] | None:
     if not embedding_model:
         return None
     try:
         vertex_image = VertexImage(image_bytes=image_bytes)
-        embedding_response = embedding_model.get_embeddings(image=vertex_image)
+        with stage("embed", "brand") as embed_stage:
+            embed_stage.set_attribute("image.bytes", len(image_bytes))
+            embedding_response = embedding_model.get_embeddings(image=vertex_image)
         return embedding_response.image_embedding
     except Exception as e:
         print(f"[!] Helper: Error getting embedding: {e}")
@@ -136,11 +145,13 @@ def generate_and_upload_logo(description: str) -> Optional[str]:
         
         print(f"[*] Generating image for: '{description}'")
         # Generate image using Imagen
-        images = imagen_model.generate_images(
-            prompt=imagen_prompt,
-            number_of_images=IMAGEN_NUMBER_OF_IMAGES,
-            aspect_ratio="1:1",  # Square logo
-        )
+        with stage("generate_image", "brand") as image_stage:
+            image_stage.set_attribute("imagen.number_of_images", IMAGEN_NUMBER_OF_IMAGES)
+            images = imagen_model.generate_images(
+                prompt=imagen_prompt,
+                number_of_images=IMAGEN_NUMBER_OF_IMAGES,
+                aspect_ratio="1:1",  # Square logo
+            )
 
         if not images:
             print("[!] Imagen returned no images.")
@@ -151,11 +162,12 @@ def generate_and_upload_logo(description: str) -> Optional[str]:
              image_bytes = images[0]._image_bytes
         except AttributeError:
              print("[!] Warning: _image_bytes attribute not found. Trying save/load method.")
-             temp_filename = "temp_imagen_output.png"
-             images[0].save(temp_filename, include_generation_parameters=False)
-             with open(temp_filename, "rb") as f:
-                 image_bytes = f.read()
-             os.remove(temp_filename) # Hapus file sementara
+             # Logo concepts are generated concurrently, so each call saves into its own directory.
+             with tempfile.TemporaryDirectory(prefix="imagen-") as temp_dir:
+                 temp_filename = os.path.join(temp_dir, "logo.png")
+                 images[0].save(temp_filename, include_generation_parameters=False)
+                 with open(temp_filename, "rb") as f:
+                     image_bytes = f.read()
 
         if not image_bytes:
             print("[!] Failed to get image bytes.")
@@ -168,7 +180,9 @@ def generate_and_upload_logo(description: str) -> Optional[str]:
         blob = bucket.blob(filename)
 
         print(f"[*] Uploading '{filename}' to GCS bucket '{GCS_BUCKET_NAME}'...")
-        blob.upload_from_string(image_bytes, content_type="image/png")
+        with stage("upload", "brand") as upload_stage:
+            upload_stage.set_attribute("image.bytes", len(image_bytes))
+            blob.upload_from_string(image_bytes, content_type="image/png")
         #blob.make_public()
         public_url = blob.public_url
         print(f"[+] Image uploaded: {public_url}")
@@ -179,53 +193,57 @@ def generate_and_upload_logo(description: str) -> Optional[str]:
         return None
 
 
-@router.post("/generate_kit", response_model=BrandAgentResponse)
-async def generate_brand_kit(
-    business_name: str = "My UMKM",
-    file: UploadFile = File(...)
-):
-    print(
-        f"[*] BRAND AGENT: Received image '{file.filename}' for business '{business_name}'")
-    if not gemini_model:
-        raise HTTPException(
-            status_code=503, detail="Generative Model not available.")
-    if not file.content_type.startswith("image/"):
-        raise HTTPException(status_code=400, detail="Invalid file type.")
+BRAND_KIT_PROMPT_TEMPLATE = """
+    Analyze the attached image of a product for a new UMKM business named "{business_name}".
+    Based on the visual information in the image AND considering the visual inspiration context provided below, provide a full brand kit.
+    {inspiration_context}
+    **The entire JSON response, including all string values within it, MUST be in English.**
+    Your response MUST be in the following JSON format. Do not add any text outside the JSON block.
+    ```json
+    {{
+      "image_analysis": {{
+        "labels": ["label1", "label2", "label3", "A descriptive label", "Another label"],
+        "dominant_colors": ["main color 1", "complementary color 2", "accent color 3"]
+      }},
+      "brand_identity": {{
+        "suggested_names": ["Brand Name 1", "Brand Name 2", "Brand Name 3"],
+        "suggested_taglines": ["Tagline 1 that fits the product", "Tagline 2"],
+        "logo_concepts_desc": [
+          "A logo concept description based on the image's style and elements, considering the inspiration context",
+          "A second, different logo concept description"
+        ],
+        "instagram_bio": "A short, catchy Instagram bio for this product. Max 150 chars."
+      }}
+    }}
+    ```
+    """
 
-    image_bytes = await file.read()
-    image_part = Part.from_data(data=image_bytes, mime_type=file.content_type)
 
-    # --- Step 1a: Initial Analysis
+def gemini_image_tags(image_part: Part) -> list[str]:
+    """Asks Gemini for up to 5 single-word tags describing the image."""
     initial_analysis_prompt = """
     Analyze the attached image. Provide ONLY a comma-separated list of up to 5 relevant single-word tags describing the main objects and attributes. Example: food, bottle, spicy, traditional, red
     """
-    try:
-        initial_response = gemini_model.generate_content(
-            [image_part, initial_analysis_prompt])
-        initial_labels = [tag.strip().lower()
-                          for tag in initial_response.text.split(',') if tag.strip()]
-        if not initial_labels:
-            initial_labels = ["product"]
-        print(f"[+] Initial labels from Gemini: {initial_labels}")
-    except Exception as e:
-        print(
-            f"[!] Initial Gemini analysis failed: {e}. Using fallback labels.")
-        initial_labels = ["product"]
+    with stage("generate_tags", "brand") as tags_stage:
+        initial_response = model_router.generate_content(
+            "brand.generate_tags", [image_part, initial_analysis_prompt])
+        set_token_usage(tags_stage, initial_response)
+    return [tag.strip().lower()
+            for tag in initial_response.text.split(',') if tag.strip()]
 
-    # --- Step 2: Visual Inspiration
-    print("[*] Step 2: Finding visual inspiration in Elasticsearch...")
+
+def find_visual_inspirations(input_image_embedding: list[float] | None, search_tags: list[str]) -> list[VisualInspiration]:
+    """Runs a filtered KNN search on the visual knowledge base. Failures are non-critical."""
     visual_inspirations_result = []
     try:
-        input_image_embedding = get_image_embedding_bytes(image_bytes)
-        search_tags = initial_labels
-
         if input_image_embedding and search_tags:
             knn_query = {
                 "field": "embedding", "query_vector": input_image_embedding, "k": 5, "num_candidates": 50,
                 "filter": {"terms": {"tags": search_tags}}
             }
-            response = es_client.search(index=VISUAL_KB_INDEX, knn=knn_query, size=3,
-                                        _source=["category", "file_path", "tags"])
+            with stage("search", "brand"):
+                response = es_client.search(index=VISUAL_KB_INDEX, knn=knn_query, size=3,
+                                            _source=["category", "file_path", "tags"])
 
             for hit in response['hits']['hits']:
                 source = hit['_source']
@@ -236,8 +254,65 @@ async def generate_brand_kit(
         else:
             print(
                 "[!] Skipping Elasticsearch search: Missing input embedding or search tags.")
+    except deadlines.DeadlineExceeded:
+        deadlines.degrade("brand.visual_inspirations", "search cut short")
     except Exception as e:
         print(f"[!] Elasticsearch Search Error: {e}")  # Non-critical
+    return visual_inspirations_result
+
+
+async def brand_kit_events(business_name: str, image_bytes: bytes, content_type: str) -> AsyncIterator[tuple[str, object]]:
+    """
+    Runs the brand kit pipeline and yields `(event, payload)` pairs as soon as
+    each piece is available. The last event is always `brand_kit` with the
+    fully assembled BrandKit. Raises HTTPException if the brand concept
+    generation fails.
+    """
+    image_part = Part.from_data(data=image_bytes, mime_type=content_type)
+
+    # --- Step 1a: Image embedding and tags for the visual KB filter
+    input_image_embedding = None
+    try:
+        input_image_embedding = await deadlines.within(
+            run_in("image", get_image_embedding_bytes, image_bytes), "brand.embed",
+            reserve=BRAND_GENERATION_RESERVE_SECONDS)
+    except deadlines.DeadlineExceeded:
+        deadlines.degrade("brand.visual_inspirations", "budget reserved for generation")
+
+    initial_labels = []
+    if BRAND_TAG_MODE == "embedding":
+        initial_labels = await run_in("image", infer_tags_from_embedding, input_image_embedding)
+        if initial_labels:
+            print(f"[+] Initial labels from embedding similarity: {initial_labels}")
+        else:
+            print("[!] Embedding tag inference unavailable, falling back to Gemini.")
+    if not initial_labels:
+        try:
+            initial_labels = await deadlines.within(
+                run_in("image", gemini_image_tags, image_part), "brand.generate_tags",
+                reserve=BRAND_GENERATION_RESERVE_SECONDS)
+            if not initial_labels:
+                initial_labels = ["product"]
+            print(f"[+] Initial labels from Gemini: {initial_labels}")
+        except deadlines.DeadlineExceeded:
+            deadlines.degrade("brand.image_tags", "budget reserved for generation")
+            initial_labels = ["product"]
+        except Exception as e:
+            print(
+                f"[!] Initial Gemini analysis failed: {e}. Using fallback labels.")
+            initial_labels = ["product"]
+    yield "image_tags", initial_labels
+
+    # --- Step 2: Visual Inspiration
+    print("[*] Step 2: Finding visual inspiration in Elasticsearch...")
+    visual_inspirations_result = []
+    try:
+        visual_inspirations_result = await deadlines.within(
+            run_in("image", find_visual_inspirations, input_image_embedding, initial_labels),
+            "brand.search", reserve=BRAND_GENERATION_RESERVE_SECONDS)
+    except deadlines.DeadlineExceeded:
+        deadlines.degrade("brand.visual_inspirations", "budget reserved for generation")
+    yield "visual_inspirations", visual_inspirations_result
 
     # --- Step 1b: Brand Concept Generation---
     print("[*] Step 1b: Generating full brand concepts with Gemini (with inspiration)...")
@@ -248,71 +323,153 @@ async def generate_brand_kit(
         for insp in visual_inspirations_result:
             inspiration_context += f"- A {insp.category} example with themes like: {', '.join(insp.tags[:3])}\n"
 
-    final_prompt = f"""
-    Analyze the attached image of a product for a new UMKM business named "{business_name}".
-    Based on the visual information in the image AND considering the visual inspiration context provided below, provide a full brand kit.
-    {inspiration_context}
-    **The entire JSON response, including all string values within it, MUST be in English.**
-    Your response MUST be in the following JSON format. Do not add any text outside the JSON block.
-    ```json
-    {{
-      "image_analysis": {{
-        "labels": ["label1", "label2", "label3", "A descriptive label", "Another label"],
-        "dominant_colors": ["main color 1", "complementary color 2", "accent color 3"]
-      }},
-      "brand_identity": {{
-        "suggested_names": ["Brand Name 1", "Brand Name 2", "Brand Name 3"],
-        "suggested_taglines": ["Tagline 1 that fits the product", "Tagline 2"],
-        "logo_concepts_desc": [
-          "A logo concept description based on the image's style and elements, considering the inspiration context",
-          "A second, different logo concept description"
-        ],
-        "instagram_bio": "A short, catchy Instagram bio for this product. Max 150 chars."
-      }}
-    }}
-    ```
-    """
+    final_prompt = BRAND_KIT_PROMPT_TEMPLATE.format(
+        business_name=business_name, inspiration_context=inspiration_context)
+
+    # Logo images are generated concurrently, starting as soon as each
+    # description has been parsed out of the stream.
+    # A logo whose image cannot be made in time keeps its description without an image.
+    async def build_logo_concept(index: int, desc: str) -> tuple[int, LogoConcept]:
+        image_url = None
+        if not deadlines.has_budget(BRAND_LOGO_MIN_SECONDS):
+            deadlines.degrade("brand.logo_images", "not enough time left to start")
+        else:
+            try:
+                image_url = await deadlines.within(run_in("image", generate_and_upload_logo, desc), "brand.logo_image")
+            except deadlines.DeadlineExceeded:
+                deadlines.degrade("brand.logo_images", "generation cut short")
+        return index, LogoConcept(description=desc, image_url=image_url)
+
+    parser = IncrementalJsonParser()
+    logo_tasks = []
+    raw_text = ""
     try:
         generation_config = GenerationConfig(
             response_mime_type="application/json")
-        final_response = gemini_model.generate_content(
-            [image_part, final_prompt],
-            generation_config=generation_config
-        )
-        gemini_response_data = extract_json_from_text(final_response.text)
-        if not gemini_response_data:
+        with stage("generate", "brand") as generate_stage:
+            generate_stage.set_attribute("image.bytes", len(image_bytes))
+            response_stream = await deadlines.within(run_in(
+                "image", model_router.generate_content, "brand.generate",
+                [image_part, final_prompt],
+                generation_config=generation_config,
+                stream=True
+            ), "brand.generate")
+            async for chunk in deadlines.iterate_within(iterate_in("image", response_stream), "brand.generate"):
+                raw_text += chunk.text
+                # Streamed responses report the token usage so far on each chunk.
+                set_token_usage(generate_stage, chunk)
+                for path, value in parser.feed(chunk.text):
+                    if path == ("image_analysis",):
+                        image_analysis_result = ImageAnalysis(**value)
+                        print(
+                            f"[+] Final Gemini Analysis Results: {image_analysis_result.labels}")
+                        yield "image_analysis", image_analysis_result
+                    elif path[:2] == ("brand_identity", "suggested_names") and len(path) == 3:
+                        yield "suggested_name", value
+                    elif path[:2] == ("brand_identity", "suggested_taglines") and len(path) == 3:
+                        yield "suggested_tagline", value
+                    elif path == ("brand_identity", "instagram_bio"):
+                        yield "instagram_bio", value
+                    elif path[:2] == ("brand_identity", "logo_concepts_desc") and len(path) == 3:
+                        logo_tasks.append(asyncio.create_task(
+                            build_logo_concept(path[2], value)))
+                if parser.done:
+                    break
+
+        if not parser.done or not isinstance(parser.root, dict):
             raise ValueError(
-                "No valid JSON from final Gemini call. Raw: " + final_response.text)
+                "No valid JSON from final Gemini call. Raw: " + raw_text)
 
-        image_analysis_data = gemini_response_data.get("image_analysis", {})
-        brand_identity_data = gemini_response_data.get("brand_identity", {})
+        image_analysis_data = parser.root.get("image_analysis", {})
+        brand_identity_data = parser.root.get("brand_identity", {})
         image_analysis_result = ImageAnalysis(**image_analysis_data)
-        print(
-            f"[+] Final Gemini Analysis Results: {image_analysis_result.labels}")
 
+    except deadlines.DeadlineExceeded as e:
+        for task in logo_tasks:
+            task.cancel()
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
+        for task in logo_tasks:
+            task.cancel()
         print(f"[!] Final Gemini Generation Error: {e}")
         raise HTTPException(
             status_code=500, detail=f"Final Gemini generation failed: {e}")
 
     # --- Step 3: Logo Image
-    print("[*] Step 3: Generating logo images (Placeholder)...")
-    logo_concepts_final = []
-    logo_descs = brand_identity_data.get("logo_concepts_desc", [])
-    for desc in logo_descs:
-        image_url = generate_and_upload_logo(desc)
-        logo_concepts_final.append(LogoConcept(
-            description=desc, image_url=image_url))
+    print(f"[*] Step 3: Waiting for {len(logo_tasks)} logo images...")
+    logo_concepts_final: list[Optional[LogoConcept]] = [None] * len(logo_tasks)
+    for next_done in asyncio.as_completed(logo_tasks):
+        index, concept = await next_done
+        logo_concepts_final[index] = concept
+        yield "logo_concept", {"index": index, "concept": concept}
 
    # --- Step 4: Assemble Brand Kit
     final_brand_kit = BrandKit(
         suggested_names=brand_identity_data.get("suggested_names", []),
         suggested_taglines=brand_identity_data.get("suggested_taglines", []),
-        logo_concepts=logo_concepts_final,
+        logo_concepts=[concept for concept in logo_concepts_final if concept],
         instagram_bio=brand_identity_data.get(
             "instagram_bio", "Bio generated by AI"),
         image_analysis=image_analysis_result,
-        visual_inspirations=visual_inspirations_result
+        visual_inspirations=visual_inspirations_result,
+        degraded_stages=deadlines.degraded_stages()
     )
+    yield "brand_kit", final_brand_kit
+
+
+def validate_brand_request(file: UploadFile):
+    if not gemini_model:
+        raise HTTPException(
+            status_code=503, detail="Generative Model not available.")
+    if not file.content_type.startswith("image/"):
+        raise HTTPException(status_code=400, detail="Invalid file type.")
+
+
+@router.post("/generate_kit", response_model=BrandAgentResponse)
+async def generate_brand_kit(
+    business_name: str = "My UMKM",
+    file: UploadFile = File(...)
+):
+    print(
+        f"[*] BRAND AGENT: Received image '{file.filename}' for business '{business_name}'")
+    validate_brand_request(file)
+
+    image_bytes = await file.read()
+    final_brand_kit = None
+    async for event, payload in brand_kit_events(business_name, image_bytes, file.content_type):
+        if event == "brand_kit":
+            final_brand_kit = payload
 
     return BrandAgentResponse(status="success", brand_kit=final_brand_kit)
+
+
+@router.post("/generate_kit/stream")
+async def stream_brand_kit(
+    business_name: str = "My UMKM",
+    file: UploadFile = File(...)
+):
+    """
+    Streaming variant of /generate_kit. Responds with newline-delimited JSON,
+    one `{"event": ..., "data": ...}` object per line, in this order:
+    image_tags, visual_inspirations, image_analysis, suggested_name /
+    suggested_tagline / instagram_bio (as they are generated), one
+    logo_concept per logo as its upload completes, and finally brand_kit
+    (whose degraded_stages lists the optional stages skipped to meet the
+    request's deadline). If generation fails mid-stream, an `error` event is
+    sent instead.
+    """
+    print(
+        f"[*] BRAND AGENT (stream): Received image '{file.filename}' for business '{business_name}'")
+    validate_brand_request(file)
+
+    image_bytes = await file.read()
+    content_type = file.content_type
+
+    async def event_lines():
+        try:
+            async for event, payload in brand_kit_events(business_name, image_bytes, content_type):
+                yield json.dumps({"event": event, "data": jsonable_encoder(payload)}, ensure_ascii=False) + "\n"
+        except HTTPException as e:
+            yield json.dumps({"event": "error", "data": {"status_code": e.status_code, "detail": e.detail}}) + "\n"
+
+    return StreamingResponse(event_lines(), media_type="application/x-ndjson")
@@ -1,10 +1,15 @@
 # File: backend/app/api/v1/agent_legal.py
 
+import json
+
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from app.application.services.legal_agent_service import process_legal_query
+from app.application.services.legal_agent_service import process_legal_query, process_legal_batch
+from app.application.services.batch_query_service import batch_event, validate_batch
 
+from app.core.deadlines import DeadlineExceeded
 from app.core.models import embedding_model, gemini_model
 from app.infrastructure.database.elasticsearch_connector import es_client
 
@@ -12,6 +17,11 @@ class QueryRequest(BaseModel):
     query: str
     user_id: str | None = None
 
+class BatchQueryRequest(BaseModel):
+    queries: list[str]
+    ordered: bool = True  # False: stream each answer as soon as it is ready
+    user_id: str | None = None
+
 LEGAL_INDEX_NAME = "umkm_legal_docs"
 
 class SourceChunk(BaseModel):
@@ -23,6 +33,7 @@ class SourceChunk(BaseModel):
 class LegalQueryResponse(BaseModel):
     answer: str
     retrieved_chunks: list[SourceChunk]
+    degraded_stages: list[str] = []  # optional stages skipped to meet the deadline
 
 router = APIRouter()
 
@@ -32,5 +43,39 @@ async def ask_legal_agent(request: QueryRequest):
     try:
         result = await process_legal_query(request.query)
         return LegalQueryResponse(**result)
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/batch_query")
+async def ask_legal_agent_batch(request: BatchQueryRequest):
+    """
+    Answers a list of questions (e.g. a partner's FAQ) far more cheaply than one
+    /query call each: all questions are embedded in one batch, retrieved with one
+    msearch, and generated with bounded concurrency. Responds with newline-delimited
+    JSON: one `answer` (or per-question `error`) event per question, carrying its
+    `index`, in question order or as completed (`ordered: false`), then `done`.
+    """
+    try:
+        queries = validate_batch(request.queries)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    print(f"[*] LEGAL AGENT: Received batch of {len(queries)} questions.")
+
+    async def event_lines():
+        answered = failed = 0
+        try:
+            async for index, result in process_legal_batch(queries, ordered=request.ordered):
+                if isinstance(result, Exception):
+                    failed += 1
+                else:
+                    answered += 1
+                yield json.dumps(batch_event(index, queries[index], result), ensure_ascii=False) + "\n"
+        except Exception as e:
+            yield json.dumps({"event": "error", "data": {"detail": str(e)}}) + "\n"
+            return
+        yield json.dumps({"event": "done", "data": {"answered": answered, "failed": failed}}) + "\n"
+
+    return StreamingResponse(event_lines(), media_type="application/x-ndjson")
@@ -1,9 +1,14 @@
 # File: backend/app/api/v1/agent_marketing.py
 
+import json
+
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from app.application.services.marketing_agent_service import process_marketing_query
+from app.application.services.marketing_agent_service import process_marketing_query, process_marketing_batch
+from app.application.services.batch_query_service import batch_event, validate_batch
+from app.core.deadlines import DeadlineExceeded
 from app.core.models import embedding_model, gemini_model
 from app.infrastructure.database.elasticsearch_connector import es_client
 
@@ -11,6 +16,11 @@ class QueryRequest(BaseModel):
     query: str
     user_id: str | None = None
 
+class BatchQueryRequest(BaseModel):
+    queries: list[str]
+    ordered: bool = True  # False: stream each answer as soon as it is ready
+    user_id: str | None = None
+
 MARKETING_INDEX_NAME = "umkm_marketing_kb"
 
 class SourceArticle(BaseModel):
@@ -21,6 +31,7 @@ class SourceArticle(BaseModel):
 class MarketingQueryResponse(BaseModel):
     answer: str
     retrieved_articles: list[SourceArticle]
+    degraded_stages: list[str] = []  # optional stages skipped to meet the deadline
 
 router = APIRouter()
 
@@ -30,5 +41,39 @@ async def ask_marketing_agent(request: QueryRequest):
     try:
         result = await process_marketing_query(request.query)
         return MarketingQueryResponse(**result)
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/batch_query")
+async def ask_marketing_agent_batch(request: BatchQueryRequest):
+    """
+    Answers a list of questions (e.g. a partner's FAQ) far more cheaply than one
+    /query call each: all questions are embedded in one batch, retrieved with one
+    msearch, and generated with bounded concurrency. Responds with newline-delimited
+    JSON: one `answer` (or per-question `error`) event per question, carrying its
+    `index`, in question order or as completed (`ordered: false`), then `done`.
+    """
+    try:
+        queries = validate_batch(request.queries)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    print(f"[*] MARKETING AGENT: Received batch of {len(queries)} questions.")
+
+    async def event_lines():
+        answered = failed = 0
+        try:
+            async for index, result in process_marketing_batch(queries, ordered=request.ordered):
+                if isinstance(result, Exception):
+                    failed += 1
+                else:
+                    answered += 1
+                yield json.dumps(batch_event(index, queries[index], result), ensure_ascii=False) + "\n"
+        except Exception as e:
+            yield json.dumps({"event": "error", "data": {"detail": str(e)}}) + "\n"
+            return
+        yield json.dumps({"event": "done", "data": {"answered": answered, "failed": failed}}) + "\n"
+
+    return StreamingResponse(event_lines(), media_type="application/x-ndjson")
@@ -1,96 +1,138 @@
 # File: backend/app/api/v1/agent_operational.py
 # Description: Endpoint for the Operational Agent, handles CSV file uploads and analysis.
 
-from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form
 from pydantic import BaseModel
-import pandas as pd
-import io
 import json
 
 # Import shared models
-from app.core.models import gemini_model
+from app.core import deadlines
+from app.core.bulkheads import run_in
+from app.core.metrics import stage
+from app.core.tracing import set_token_usage
+from app.core.model_router import model_router
+from app.application.services.sales_ingestion import analyze_sales_upload, detect_upload_format, read_sales_chunks
+from app.infrastructure.storage.sales_store import sales_store
 
 # --- Pydantic Models ---
+class SalesStoreInfo(BaseModel):
+    version: int
+    new_rows: int
+    duplicate_rows: int
+    total_rows: int
+    from_cache: bool = False
+
 class OperationalAnalysisResponse(BaseModel):
     insights: str
     statistics: dict
+    forecast: dict | None = None
+    store: SalesStoreInfo | None = None
+    degraded_stages: list[str] = []  # optional stages skipped to meet the deadline
 
 # --- APIRouter Instance ---
 router = APIRouter()
 
 @router.post("/analyze", response_model=OperationalAnalysisResponse)
-async def analyze_sales_data(file: UploadFile = File(...)):
+async def analyze_sales_data(file: UploadFile = File(...), user_id: str | None = Form(None)):
     """
-    Receives a CSV file of sales data, analyzes it with Pandas,
-    and uses Gemini to generate business insights.
+    Receives a CSV, Parquet or Arrow file of sales data, analyzes it with Pandas in
+    bounded-memory chunks, forecasts next-week demand per product, and uses Gemini
+    to generate business insights.
+    If the sales store is enabled and a user_id is given, the upload is merged into
+    the merchant's stored history: only new rows are aggregated, and unchanged data
+    returns the cached statistics and insights.
     """
     print(f"[*] OPERATIONAL AGENT: Received file '{file.filename}'")
 
     # Step 1: Validate file type
-    if file.content_type != 'text/csv':
-        raise HTTPException(status_code=400, detail="Invalid file type. Please upload a CSV file.")
+    upload_format = detect_upload_format(file.content_type, file.filename)
+    if not upload_format:
+        raise HTTPException(status_code=400, detail="Invalid file type. Please upload a CSV, Parquet or Arrow file.")
 
+    store_info = None
     try:
-        # Step 2: Read file content and process with Pandas
-        contents = await file.read()
-        # Use io.StringIO to treat the byte string as a file
-        df = pd.read_csv(io.StringIO(contents.decode('utf-8')))
-
-        # --- Perform Data Analysis ---
-        # Ensure required columns exist
-        required_columns = ['product_name', 'quantity', 'price']
-        if not all(col in df.columns for col in required_columns):
-            raise HTTPException(status_code=400, detail=f"CSV must contain columns: {required_columns}")
-
-        # Calculate total revenue for each product
-        df['revenue'] = df['quantity'] * df['price']
-
-        total_revenue = df['revenue'].sum()
-        total_items_sold = df['quantity'].sum()
-        best_selling_product_by_qty = df.loc[df['quantity'].idxmax()]
-        highest_revenue_product = df.loc[df['revenue'].idxmax()]
-
-        # Prepare a structured dictionary of the statistics
-        statistics = {
-            "total_revenue": float(total_revenue),
-            "total_items_sold": int(total_items_sold),
-            "best_selling_by_quantity": {
-                "name": best_selling_product_by_qty['product_name'],
-                "quantity": int(best_selling_product_by_qty['quantity'])
-            },
-            "highest_revenue_product": {
-                "name": highest_revenue_product['product_name'],
-                "revenue": float(highest_revenue_product['revenue'])
-            }
-        }
+        # Step 2: Parse the spooled upload in chunks and accumulate the statistics.
+        # This runs in the threadpool because Pandas parsing is blocking.
+        if sales_store and user_id:
+            # No time limit on the ingest: it writes to the store, and a timed-out wait
+            # would leave it appending parts after the 504. Only the read-only steps below get the deadline.
+            with stage("parse", "operational"):
+                result = await run_in(
+                    "data", sales_store.ingest, user_id, read_sales_chunks(file.file, upload_format))
+            store_info = SalesStoreInfo(**{k: v for k, v in result.items() if k != "aggregator"})
+
+            cached = sales_store.cached_analysis(user_id, result["version"])
+            if cached:
+                print("[+] Stored sales data unchanged, returning cached analysis.")
+                store_info.from_cache = True
+                return OperationalAnalysisResponse(
+                    insights=cached["insights"], statistics=cached["statistics"],
+                    forecast=cached.get("forecast"), store=store_info)
+            aggregator = result["aggregator"]
+            with stage("analyze", "operational"):
+                statistics = await deadlines.within(run_in("data", aggregator.statistics), "operational.analyze")
+                forecast = await deadlines.within(run_in("data", aggregator.forecast), "operational.analyze")
+        else:
+            # Parsing and analysis happen in one streaming pass here.
+            with stage("parse", "operational"):
+                statistics, forecast = await deadlines.within(run_in(
+                    "data", analyze_sales_upload, file.file, upload_format, with_forecast=True), "operational.parse")
         print(f"[+] Pandas analysis complete: {statistics}")
+        if forecast:
+            print(f"[+] Demand forecast complete: {len(forecast['restock_alerts'])} restock alerts, "
+                  f"{len(forecast['anomalous_days'])} anomalous days.")
 
+    except deadlines.DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
-        print(f"[!] Error processing CSV with Pandas: {e}")
-        raise HTTPException(status_code=400, detail=f"Could not process CSV file: {e}")
+        print(f"[!] Error processing {upload_format} file with Pandas: {e}")
+        raise HTTPException(status_code=400, detail=f"Could not process {upload_format.upper()} file: {e}")
 
     # Step 3: Use Gemini to interpret the statistics
     print("[*] Generating insights with Gemini...")
+    forecast_text = (json.dumps(forecast, indent=2, ensure_ascii=False) if forecast
+                     else "Not available (the data has no dates or less than two weeks of history).")
     prompt = f"""
     You are a friendly and insightful business analyst for an Indonesian SME (UMKM).
     Based on the following summary of sales data, provide 2-3 key insights and one actionable recommendation.
+    The summary contains totals, per-product rankings (aggregated over all transactions), basket size and,
+    when the data has dates, daily/weekly revenue with a moving average and the week-over-week trend.
+    The demand forecast (if present) projects next-week quantity per product with weekday seasonality,
+    lists products that need restocking because demand is rising, and flags anomalous sales days.
     **Respond ONLY in English.** Use clear, easy-to-understand language.
 
     SALES DATA SUMMARY:
     {json.dumps(statistics, indent=2, ensure_ascii=False)}
 
+    DEMAND FORECAST:
+    {forecast_text}
+
     INSIGHTS AND RECOMMENDATION:
     """
 
     try:
-        generation_response = gemini_model.generate_content(prompt)
+        with stage("generate", "operational") as generate_stage:
+            generation_response = await deadlines.within(
+                run_in("llm", model_router.generate_content, "operational.generate", prompt), "operational.generate")
+            set_token_usage(generate_stage, generation_response)
         insights = generation_response.text
         print("[+] Gemini insights generated.")
+    except deadlines.DeadlineExceeded:
+        # The statistics and forecast are still worth returning without the narrative.
+        deadlines.degrade("operational.insights", "generation did not finish in time")
+        insights = "Insights are not available right now; the statistics and forecast below are complete."
     except Exception as e:
         print(f"[!] Error generating content with Gemini: {e}")
         raise HTTPException(status_code=500, detail=f"An error occurred with the generation model: {e}")
 
+    degraded_stages = deadlines.degraded_stages()
+    if store_info and not degraded_stages:
+        await run_in("data", sales_store.save_analysis, user_id, store_info.version, statistics, insights, forecast)
+
     return OperationalAnalysisResponse(
         insights=insights,
-        statistics=statistics
+        statistics=statistics,
+        forecast=forecast,
+        store=store_info,
+        degraded_stages=degraded_stages
     )
\ No newline at end of file
@@ -2,11 +2,25 @@
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-import requests
-import xml.etree.ElementTree as ET
+from starlette.concurrency import run_in_threadpool
 
 import firebase_admin
-from firebase_admin import credentials, messaging
+from firebase_admin import credentials
+
+from app.core.bulkheads import run_in
+from app.core.metrics import stage
+from app.application.services.news_feed_service import FeedConfig, scan_feeds, mark_scanned
+from app.application.services.scan_scheduler import ScanScheduler
+from app.application.services.keyword_matcher import get_opportunity_matcher
+from app.application.services.semantic_matcher import embed_texts, item_text, match_items_to_profiles
+from app.application.services.notification_service import (
+    PushNotification, broadcast_to_topic, deliver_to_users, NEWS_BROADCAST_TOPIC)
+from app.infrastructure.storage.keyword_store import keyword_store, DEFAULT_SUBSCRIBER
+from app.infrastructure.storage.device_token_store import device_token_store
+from app.infrastructure.storage.profile_vector_store import profile_vector_store
+
+# Merchants listed per opportunity in the scan response; the count covers all of them.
+SEMANTIC_SUBSCRIBERS_LISTED = 20
 
 try:
     # The SDK will automatically find the credentials via the GOOGLE_APPLICATION_CREDENTIALS env var.
@@ -18,15 +32,73 @@ except Exception as e:
     # In a real app, you might want to handle this more gracefully
     # For the hackathon, a print statement is fine.
 
+class KeywordMatchInfo(BaseModel):
+    keyword: str
+    field: str
+    start: int
+    end: int
+
 class OpportunityInfo(BaseModel):
     source: str
     title: str
     link: str
     description: str
+    matched_keywords: list[str] = []
+    matches: list[KeywordMatchInfo] = []
+    subscribers: list[str] = []
+    semantic_score: float | None = None
+    semantic_subscribers: list[str] = []
+    semantic_subscriber_count: int = 0
+
+class FeedScanInfo(BaseModel):
+    name: str
+    status: str
+    new_items: int
+    skipped_items: int
+    elapsed_ms: float
+    error: str | None = None
+
+class KeywordListRequest(BaseModel):
+    keywords: list[str]
+
+class KeywordListResponse(BaseModel):
+    subscriber_id: str
+    keywords: list[str]
+
+class MerchantProfileRequest(BaseModel):
+    description: str
+    categories: list[str] = []
+
+class MerchantProfileResponse(BaseModel):
+    user_id: str
+    profiles_stored: int
+
+class DeviceRegistrationRequest(BaseModel):
+    user_id: str
+    token: str
+
+class DeviceUnregistrationRequest(BaseModel):
+    user_id: str
+    token: str | None = None
+
+class NotificationInfo(BaseModel):
+    recipients: int = 0
+    tokens: int = 0
+    batches: int = 0
+    sent: int = 0
+    failed: int = 0
+    pruned_tokens: int = 0
+    broadcast_topic: str | None = None
+    broadcast_message_id: str | None = None
 
 class OpportunityScanResponse(BaseModel):
     status: str
     found_opportunities: list[OpportunityInfo]
+    new_items: int = 0
+    skipped_items: int = 0
+    feeds: list[FeedScanInfo] = []
+    notifications: NotificationInfo | None = None
+    shared_scan: bool = False  # True if this trigger joined a scan that was already running
 
 # --- APIRouter Instance ---
 router = APIRouter()
@@ -34,88 +106,214 @@ router = APIRouter()
 @router.post("/scan_opportunities", response_model=OpportunityScanResponse)
 async def scan_news_for_opportunities():
     """
-    Scans a business news RSS feed for articles containing relevant keywords for SMEs.
-    This endpoint is designed to be triggered by a scheduler.
+    Scans the registered business news RSS feeds concurrently for articles containing
+    relevant keywords for SMEs. Unchanged feeds are answered with a 304, and only items
+    not seen in earlier scans are matched and notified.
+    This endpoint is designed to be triggered by a scheduler (or the built-in one, see
+    PROACTIVE_SCHEDULER_ENABLED). Concurrent triggers share one in-flight scan.
     """
-    print("[*] PROACTIVE AGENT: Starting opportunity scan from RSS feed...")
- 
-    target_rss_url = "https://www.antaranews.com/rss/ekonomi-bisnis.xml"
-    
-    # Keywords that signify an opportunity for an SME
-    keywords = ["umkm", "peluang", "ekspor", "bantuan", "pameran", "bazar", "subsidi", "kredit usaha"]
-    
+    result, shared = await scan_scheduler.run(trigger='manual')
+    return result.model_copy(update={"shared_scan": shared}) if shared else result
+
+
+@router.get("/scheduler/status")
+async def get_scheduler_status():
+    """Reports the scan scheduler's state, the next run per feed, and the last run's duration and items/sec."""
+    return scan_scheduler.status()
+
+
+async def run_opportunity_scan(feed_configs: list[FeedConfig]) -> OpportunityScanResponse:
+    """Scans the given feeds, matches new items against keywords and merchant profiles, and notifies subscribers."""
+    print("[*] PROACTIVE AGENT: Starting opportunity scan from RSS feeds...")
+
+    with stage("fetch", "proactive"):
+        results = await scan_feeds(feed_configs)
+    feeds = [
+        FeedScanInfo(name=r.feed.name, status=r.status, new_items=len(r.items), skipped_items=r.skipped,
+                     elapsed_ms=round(r.elapsed_ms, 1), error=r.error)
+        for r in results
+    ]
+    if results and all(r.status in ('timeout', 'error') for r in results):
+        errors = "; ".join(f"{r.feed.name}: {r.error}" for r in results)
+        print(f"[!] All RSS feeds failed: {errors}")
+        raise HTTPException(status_code=500, detail=f"RSS fetch failed: {errors}")
+
+    # One compiled automaton matches every subscriber's keywords in a single pass per field.
+    matcher = get_opportunity_matcher()
+    new_feed_items = [(r.feed, item) for r in results for item in r.items]
+
+    # Semantic matching: all new items are embedded in one batch (on the embedding
+    # pool, with the other model encodes) and scored against every merchant profile
+    # with chunked matrix products (on the data pool).
+    semantic, semantic_by_merchant = {}, {}
+    if new_feed_items and len(profile_vector_store):
+        try:
+            with stage("embed", "proactive"):
+                item_vectors = await run_in(
+                    "embedding", embed_texts, [item_text(item.title, item.description) for _, item in new_feed_items])
+            with stage("semantic_match", "proactive") as match_stage:
+                match_stage.set_attribute("semantic.items", len(new_feed_items))
+                matches = await run_in("data", match_items_to_profiles, item_vectors)
+            semantic = matches.by_item(SEMANTIC_SUBSCRIBERS_LISTED)
+            semantic_by_merchant = matches.by_merchant()
+            print(f"[+] Semantic matching: {len(matches)} merchant matches on {len(semantic)} items.")
+        except Exception as e:
+            # Keyword matching still works without the embedding model.
+            print(f"[!] Semantic matching failed: {e}")
+
     found_opportunities = []
+    opportunity_of_item = {}
+    for index, (feed, item) in enumerate(new_feed_items):
+        field_matches = [(field, m) for field, text in (("title", item.title), ("description", item.description))
+                         for m in matcher.find(text)]
+        semantic_count, semantic_top = semantic.get(index, (0, []))
+        if not field_matches and not semantic_count:
+            continue
+        opportunity_of_item[index] = len(found_opportunities)
+        found_opportunities.append(OpportunityInfo(
+            source=feed.source, title=item.title, link=item.link, description=item.description,
+            matched_keywords=list(dict.fromkeys(m.keyword for _, m in field_matches)),
+            matches=[KeywordMatchInfo(keyword=m.keyword, field=field, start=m.start, end=m.end)
+                     for field, m in field_matches],
+            subscribers=sorted(set().union(*(m.subscribers for _, m in field_matches))),
+            semantic_score=round(semantic_top[0][1], 4) if semantic_top else None,
+            semantic_subscribers=[merchant_id for merchant_id, _ in semantic_top],
+            semantic_subscriber_count=semantic_count,
+        ))
+
+    new_items = sum(len(r.items) for r in results)
+    skipped_items = sum(r.skipped for r in results)
+    print(f"[*] Scan finished. {new_items} new items ({skipped_items} already seen), "
+          f"found {len(found_opportunities)} relevant opportunities.")
+    
+    # Send FCM notifications if opportunities are found ---
+    notifications = None
+    if found_opportunities:
+        print("[*] Preparing FCM notifications...")
+        with stage("notify", "proactive"):
+            notifications = await notify_opportunities(found_opportunities, opportunity_of_item, semantic_by_merchant)
+
+    # Only now are the items and feed validators recorded, so a failed scan is retried on the next run.
+    mark_scanned(results)
 
+    return OpportunityScanResponse(status="success", found_opportunities=found_opportunities,
+                                   new_items=new_items, skipped_items=skipped_items, feeds=feeds,
+                                   notifications=notifications)
+
+
+scan_scheduler = ScanScheduler(run_opportunity_scan,
+                               count_items=lambda response: response.new_items + response.skipped_items)
+
+
+def opportunity_notification(opportunity: OpportunityInfo) -> PushNotification:
+    return PushNotification(
+        title="💡 Peluang Baru untuk Bisnis Anda!",
+        body=f"{opportunity.title[:100]}...",  # Truncate for brevity
+        data={"link": opportunity.link, "source": opportunity.source},
+    )
+
+
+async def notify_opportunities(found_opportunities: list[OpportunityInfo], opportunity_of_item: dict[int, int],
+                               semantic_by_merchant: dict[str, list[tuple[int, float]]]) -> NotificationInfo:
+    """
+    Notifies every subscriber about its best new opportunity: keyword matches first
+    (in feed order), then the best semantic match. Opportunities matching the default
+    keywords are also broadcast to the news topic. Notification failures are logged
+    but do not fail the scan.
+    """
+    messages = [opportunity_notification(o) for o in found_opportunities]
+    per_user: dict[str, PushNotification] = {}
+    for opportunity, message in zip(found_opportunities, messages):
+        for subscriber_id in opportunity.subscribers:
+            if subscriber_id != DEFAULT_SUBSCRIBER:
+                per_user.setdefault(subscriber_id, message)
+    for merchant_id, item_scores in semantic_by_merchant.items():
+        per_user.setdefault(merchant_id, messages[opportunity_of_item[item_scores[0][0]]])
+
+    info = NotificationInfo()
+    if per_user:
+        report = await deliver_to_users(per_user)
+        info = NotificationInfo(recipients=report.recipients, tokens=report.tokens, batches=report.batches,
+                                sent=report.sent, failed=report.failed, pruned_tokens=report.pruned_tokens)
+
+    broadcast = next((m for o, m in zip(found_opportunities, messages) if DEFAULT_SUBSCRIBER in o.subscribers), None)
+    if broadcast:
+        info.broadcast_topic = NEWS_BROADCAST_TOPIC
+        info.broadcast_message_id = await broadcast_to_topic(broadcast)
+    return info
+
+
+@router.get("/keywords/{subscriber_id}", response_model=KeywordListResponse)
+async def get_subscriber_keywords(subscriber_id: str):
+    """Returns the opportunity keywords registered for a subscriber."""
+    keywords = keyword_store.get_keywords(subscriber_id)
+    if keywords is None:
+        raise HTTPException(status_code=404, detail=f"No keywords registered for '{subscriber_id}'.")
+    return KeywordListResponse(subscriber_id=subscriber_id, keywords=keywords)
+
+
+@router.put("/keywords/{subscriber_id}", response_model=KeywordListResponse)
+async def set_subscriber_keywords(subscriber_id: str, request: KeywordListRequest):
+    """
+    Replaces a subscriber's opportunity keywords. Scans match them from the next
+    run on; the keyword matcher is recompiled once, on first use after a change.
+    """
+    keywords = keyword_store.set_keywords(subscriber_id, request.keywords)
+    print(f"[+] PROACTIVE AGENT: {len(keywords)} keywords registered for '{subscriber_id}'.")
+    return KeywordListResponse(subscriber_id=subscriber_id, keywords=keywords)
+
+
+@router.delete("/keywords/{subscriber_id}")
+async def delete_subscriber_keywords(subscriber_id: str):
+    """Removes all keywords of a subscriber."""
+    if not keyword_store.delete(subscriber_id):
+        raise HTTPException(status_code=404, detail=f"No keywords registered for '{subscriber_id}'.")
+    return {"status": "deleted", "subscriber_id": subscriber_id}
+
+
+@router.put("/profiles/{user_id}", response_model=MerchantProfileResponse)
+async def set_merchant_profile(user_id: str, request: MerchantProfileRequest):
+    """
+    Stores the embedding of a merchant's business description, used to match news
+    items that are relevant to the merchant even when none of its keywords appear.
+    """
+    profile_text = request.description.strip()
+    if request.categories:
+        profile_text = f"{profile_text} Kategori: {', '.join(request.categories)}."
+    if not profile_text:
+        raise HTTPException(status_code=400, detail="Profile description must not be empty.")
     try:
-        headers = {'User-Agent': 'UMKM-Go-AI-Bot/1.0'}
-        response = requests.get(target_rss_url, headers=headers, timeout=15)
-        response.raise_for_status()
-
-        # Parse the XML content of the RSS feed
-        root = ET.fromstring(response.content)
-        
-        print(f"[+] Successfully fetched and parsed RSS feed.")
-
-        # RSS structure is typically <channel><item>...</item></channel>
-        for item in root.findall('./channel/item'):
-            title = item.find('title').text if item.find('title') is not None else ""
-            link = item.find('link').text if item.find('link') is not None else ""
-            description = item.find('description').text if item.find('description') is not None else ""
-            
-            # Check if any of our keywords are in the title or description (case-insensitive)
-            full_text_to_search = f"{title.lower()} {description.lower()}"
-            if any(keyword in full_text_to_search for keyword in keywords):
-                opportunity = OpportunityInfo(
-                    source="Antara News Bisnis",
-                    title=title.strip(),
-                    link=link.strip(),
-                    description=description.strip()
-                )
-                found_opportunities.append(opportunity)
-
-    except requests.exceptions.RequestException as e:
-        print(f"[!] Error fetching RSS feed: {e}")
-        raise HTTPException(status_code=500, detail=f"RSS fetch failed: {e}")
-    except ET.ParseError as e:
-        print(f"[!] Error parsing XML: {e}")
-        raise HTTPException(status_code=500, detail=f"XML parse failed: {e}")
+        vectors = await run_in("embedding", embed_texts, [profile_text])
     except Exception as e:
-        print(f"[!] An unexpected error occurred: {e}")
-        raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {e}")
+        print(f"[!] Error embedding merchant profile: {e}")
+        raise HTTPException(status_code=500, detail=f"Could not embed the profile: {e}")
+    await run_in_threadpool(profile_vector_store.upsert, user_id, vectors[0])
+    print(f"[+] PROACTIVE AGENT: Profile stored for '{user_id}'.")
+    return MerchantProfileResponse(user_id=user_id, profiles_stored=len(profile_vector_store))
 
-    print(f"[*] Scan finished. Found {len(found_opportunities)} relevant opportunities.")
-    
-     # Send FCM Notification if opportunities are found ---
-    if found_opportunities:
-        print("[*] Preparing to send FCM notification...")
-        
-        # In the next step, we will get this token from the Flutter app.
-        # For now, we will find a test token.
-        registration_token = "cvuewHfRQGmF9R7QcN1BKK:APA91bFmiE1xtSjwihS_TI4jsCwO1llq7LIzABc8MuSoMJf1Q8DFaVf55xCRrf37jKsEUMGQG1tExRHfqkBUeO2jb4ac1hcWgJY0CjQWaHFIsxugwiKEBqw"
-
-        # Take the first opportunity as the notification content
-        first_opportunity = found_opportunities[0]
-        
-        message = messaging.Message(
-            notification=messaging.Notification(
-                title=f"💡 Peluang Baru untuk Bisnis Anda!",
-                body=f"{first_opportunity.title[:100]}..." # Truncate for brevity
-            ),
-            # You can also send custom data to your app
-            data={
-                "link": first_opportunity.link,
-                "source": first_opportunity.source
-            },
-            token=registration_token,
-        )
 
-        try:
-            # Send the message
-            response = messaging.send(message)
-            print('[+] Successfully sent message:', response)
-        except Exception as e:
-            print(f"[!] Error sending FCM message: {e}")
-            # We don't raise an HTTPException here because the core task (scraping) was successful.
-            # We just log the notification failure.
+@router.delete("/profiles/{user_id}")
+async def delete_merchant_profile(user_id: str):
+    """Removes a merchant's profile from semantic matching."""
+    if not await run_in_threadpool(profile_vector_store.delete, user_id):
+        raise HTTPException(status_code=404, detail=f"No profile stored for '{user_id}'.")
+    return {"status": "deleted", "user_id": user_id}
+
+
+@router.post("/devices/register")
+async def register_device(request: DeviceRegistrationRequest):
+    """Registers an FCM device token for a user's opportunity notifications."""
+    if not request.token.strip():
+        raise HTTPException(status_code=400, detail="Token must not be empty.")
+    devices = await run_in_threadpool(device_token_store.register, request.user_id, request.token.strip())
+    print(f"[+] PROACTIVE AGENT: Device registered for '{request.user_id}' ({devices} devices).")
+    return {"status": "registered", "user_id": request.user_id, "devices": devices}
+
 
-    return OpportunityScanResponse(status="success", found_opportunities=found_opportunities)
\ No newline at end of file
+@router.post("/devices/unregister")
+async def unregister_device(request: DeviceUnregistrationRequest):
+    """Removes one device token of a user, or all of them if no token is given."""
+    removed = await run_in_threadpool(device_token_store.unregister, request.user_id, request.token)
+    if not removed:
+        raise HTTPException(status_code=404, detail=f"No matching device registered for '{request.user_id}'.")
+    return {"status": "unregistered", "user_id": request.user_id, "removed": removed}
@@ -3,9 +3,14 @@
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from app.core.models import gemini_model
+from app.core import deadlines
+from app.core.bulkheads import run_in
+from app.core.metrics import stage
+from app.core.tracing import set_token_usage
+from app.core.model_router import model_router
 
 from app.application.services import legal_agent_service, marketing_agent_service
+from app.application.services.query_coalescer import query_coalescer
 
 class OrchestratorQueryRequest(BaseModel):
     query: str
@@ -18,8 +23,20 @@ async def orchestrate_query(request: OrchestratorQueryRequest):
     """
     Receives a general query, uses Gemini to classify its intent,
     and then routes it to the appropriate agent service.
+    Concurrent identical queries share one classification and agent run.
     """
     print(f"[*] ORCHESTRATOR: Received query: '{request.query}'")
+    return await query_coalescer.run("orchestrator", request.query, lambda: route_query(request.query))
+
+
+@router.get("/coalescing_stats")
+async def get_coalescing_stats():
+    """Per agent: requests, pipeline executions, and requests coalesced into an identical in-flight one."""
+    return query_coalescer.stats()
+
+
+async def route_query(query: str) -> dict:
+    """Classifies the query's intent and returns the answer of the matching agent."""
 
     # Step 1: Use Gemini to classify the intent of the query
     
@@ -32,32 +49,42 @@ async def orchestrate_query(request: OrchestratorQueryRequest):
 
     Respond with only one word: LEGAL, MARKETING, or UNKNOWN.
 
-    User's query: "{request.query}"
+    User's query: "{query}"
     Classification:
     """
 
     try:
         print("[*] Classifying intent with Gemini...")
-        response = gemini_model.generate_content(classification_prompt)
+        with stage("classify", "orchestrator") as classify_stage:
+            response = await deadlines.within(
+                run_in("llm", model_router.generate_content, "orchestrator.classify", classification_prompt),
+                "orchestrator.classify")
+            set_token_usage(classify_stage, response)
         intent = response.text.strip().upper()
         print(f"[+] Intent classified as: {intent}")
+    except deadlines.DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error during intent classification: {e}")
 
     # Step 2: Route to the appropriate agent based on the intent
     if intent == "LEGAL":
         try:
-            result = await legal_agent_service.process_legal_query(request.query)
+            result = await legal_agent_service.process_legal_query(query)
             result['agent_used'] = 'LEGAL'
             return result
+        except deadlines.DeadlineExceeded as e:
+            raise HTTPException(status_code=504, detail=str(e))
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
     
     elif intent == "MARKETING":
         try:
-            result = await marketing_agent_service.process_marketing_query(request.query)
+            result = await marketing_agent_service.process_marketing_query(query)
             result['agent_used'] = 'MARKETING'
             return result
+        except deadlines.DeadlineExceeded as e:
+            raise HTTPException(status_code=504, detail=str(e))
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
         
@@ -0,0 +1,120 @@
+# File: backend/app/application/services/batch_query_service.py
+# Description: Shared batch pipeline for the RAG agents' /batch_query endpoints.
+# A list of questions is embedded with one batched encode, retrieved with one
+# msearch round trip, and answered by Gemini with bounded concurrency. Answers
+# are yielded in question order or as they complete.
+
+import asyncio
+import math
+import os
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from app.core import deadlines
+from app.core.bulkheads import run_in
+from app.core.metrics import stage
+from app.core.models import embedding_model
+from app.infrastructure.database.elasticsearch_connector import es_async_client
+
+BATCH_QUERY_MAX_QUESTIONS = int(os.getenv("BATCH_QUERY_MAX_QUESTIONS", "100"))
+BATCH_GENERATION_CONCURRENCY = int(os.getenv("BATCH_GENERATION_CONCURRENCY", "4"))
+EMBEDDING_BATCH_SIZE = 32
+# Added to the batch route's default deadline per round of BATCH_GENERATION_CONCURRENCY
+# generations, so a full batch is not degraded or cut off by a budget sized for a few questions.
+DEADLINE_BATCH_SECONDS_PER_ROUND = float(os.getenv("DEADLINE_BATCH_SECONDS_PER_ROUND", "15"))
+
+
+class BatchItemError(Exception):
+    """Failure of a single question in a batch; the other questions are unaffected."""
+
+
+async def batch_retrieve(queries: list[str], index: str, build_search: Callable[[str, list[float] | None], dict],
+                         component: str = "batch") -> list[list[dict] | BatchItemError]:
+    """
+    Embeds all queries in one batch and runs their searches in one msearch. Returns
+    the hits per query. Without budget to spare for it, the kNN half of the searches
+    (and the encode) is skipped.
+    """
+    if deadlines.has_budget(deadlines.GENERATION_RESERVE_SECONDS):
+        with stage("embed", component) as embed_stage:
+            embed_stage.set_attribute("embedding.texts", len(queries))
+            embeddings = await run_in("embedding", embedding_model.encode, queries, batch_size=EMBEDDING_BATCH_SIZE)
+        embeddings = [embedding.tolist() for embedding in embeddings]
+    else:
+        deadlines.degrade(f"{component}.knn_retrieval", "budget reserved for generation")
+        embeddings = [None] * len(queries)
+    searches = []
+    for query, embedding in zip(queries, embeddings):
+        searches.append({"index": index})
+        searches.append(build_search(query, embedding))
+    with stage("search", component):
+        response = await es_async_client.msearch(searches=searches)
+    results = []
+    for item in response['responses']:
+        if 'error' in item:
+            error = item['error']
+            reason = error.get('reason', error) if isinstance(error, dict) else error
+            results.append(BatchItemError(f"Search failed: {reason}"))
+        else:
+            results.append(item['hits']['hits'])
+    return results
+
+
+async def answer_batch(queries: list[str], index: str,
+                       build_search: Callable[[str, list[float] | None], dict],
+                       answer_from_hits: Callable[[str, list[dict]], Awaitable[dict]],
+                       ordered: bool = True,
+                       concurrency: int = BATCH_GENERATION_CONCURRENCY,
+                       component: str = "batch") -> AsyncIterator[tuple[int, dict | Exception]]:
+    """
+    Yields `(question index, answer dict or exception)` for every query, in
+    question order or, with `ordered=False`, as soon as each answer is ready.
+    Raises if the shared retrieval step fails. Pending generations are cancelled
+    if the consumer stops early (e.g. the client disconnects).
+    """
+    if not es_async_client:
+        raise Exception("Elasticsearch client is not available.")
+    deadlines.extend_default(math.ceil(len(queries) / concurrency) * DEADLINE_BATCH_SECONDS_PER_ROUND)
+    start = time.perf_counter()
+    hits_per_query = await batch_retrieve(queries, index, build_search, component)
+    print(f"[+] BATCH: Retrieved context for {len(queries)} questions in "
+          f"{(time.perf_counter() - start) * 1000:.0f} ms (1 encode batch, 1 msearch).")
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def generate(i: int) -> tuple[int, dict | Exception]:
+        if isinstance(hits_per_query[i], Exception):
+            return i, hits_per_query[i]
+        async with semaphore:
+            try:
+                return i, await answer_from_hits(queries[i], hits_per_query[i])
+            except Exception as e:
+                return i, e
+
+    tasks = [asyncio.ensure_future(generate(i)) for i in range(len(queries))]
+    try:
+        for next_result in (tasks if ordered else asyncio.as_completed(tasks)):
+            yield await next_result
+    finally:
+        for task in tasks:
+            task.cancel()
+        print(f"[*] BATCH: {len(queries)} questions finished in {(time.perf_counter() - start) * 1000:.0f} ms.")
+
+
+def validate_batch(queries: list[str]) -> list[str]:
+    """Strips the questions and raises ValueError for an empty, blank or oversized batch."""
+    queries = [query.strip() for query in queries]
+    if not queries:
+        raise ValueError("At least one question is required.")
+    if len(queries) > BATCH_QUERY_MAX_QUESTIONS:
+        raise ValueError(f"At most {BATCH_QUERY_MAX_QUESTIONS} questions per batch.")
+    if not all(queries):
+        raise ValueError("Questions must not be empty.")
+    return queries
+
+
+def batch_event(index: int, query: str, result: Any) -> dict:
+    """NDJSON event for one answered (or failed) question."""
+    if isinstance(result, Exception):
+        return {"event": "error", "data": {"index": index, "query": query, "detail": str(result)}}
+    return {"event": "answer", "data": {"index": index, "query": query, **result}}
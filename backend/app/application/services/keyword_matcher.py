@@ -0,0 +1,217 @@
+# File: backend/app/application/services/keyword_matcher.py
+# Description: Multi-keyword matcher for the Proactive Agent's opportunity detection.
+# Texts are matched on word tokens, which gives word-boundary matching (e.g.
+# "bazar" does not match inside "bazaar"), and Indonesian clitics (-nya, -lah,
+# -kah, -pun, -tah) are stripped from words that only match without them
+# ("pamerannya" -> "pameran"). Two matchers share these rules:
+#   - KeywordSet, for the usual handful of keywords: one regex scan finds where a
+#     keyword may start, and only the words from there are looked up as token
+#     n-grams in a set;
+#   - KeywordAutomaton, from KEYWORD_AUTOMATON_MIN_KEYWORDS keywords on: one
+#     Aho-Corasick automaton over words, so a text is scanned once in time linear
+#     in its number of words, however many keywords are registered.
+
+import os
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass
+
+from app.infrastructure.storage.keyword_store import KeywordStore, keyword_store
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+CLITIC_SUFFIXES = ('nya', 'lah', 'kah', 'pun', 'tah')
+# A word may carry two stacked clitics, e.g. "bantuannyalah".
+MAX_CLITICS = 2
+MIN_STEM_LENGTH = 3
+# Below this many keywords, set lookups beat building and walking the automaton.
+KEYWORD_AUTOMATON_MIN_KEYWORDS = int(os.getenv("KEYWORD_AUTOMATON_MIN_KEYWORDS", "150"))
+
+
+@dataclass
+class KeywordMatch:
+    keyword: str
+    start: int  # character offsets in the scanned text
+    end: int
+    subscribers: frozenset[str]
+
+
+def normalize_text(text: str) -> str:
+    return unicodedata.normalize('NFKC', text).casefold()
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(normalize_text(text))
+
+
+def known_word(token: str, vocabulary) -> str | None:
+    """`token` if it is in `vocabulary`, else the token without trailing clitics if that is, else None."""
+    if token in vocabulary:
+        return token
+    stem = token
+    for _ in range(MAX_CLITICS):
+        if not stem.endswith(CLITIC_SUFFIXES):
+            return None
+        for suffix in CLITIC_SUFFIXES:
+            if stem.endswith(suffix) and len(stem) - len(suffix) >= MIN_STEM_LENGTH:
+                stem = stem[:-len(suffix)]
+                break
+        else:
+            return None
+        if stem in vocabulary:
+            return stem
+    return None
+
+
+class KeywordSet:
+    """
+    Keyword matcher for small keyword lists. One regex scan finds the words that
+    can start a keyword (a keyword's first word, possibly with clitics); only the
+    few words from each of them are tokenized and looked up as n-grams in a set.
+    """
+
+    def __init__(self, keyword_subscribers: dict[str, set[str]]):
+        self.keywords: list[str] = []
+        self.subscribers: list[frozenset[str]] = []
+        self.phrases: dict[tuple[str, ...], list[int]] = {}  # keyword tokens -> keyword ids
+        self.vocabulary: set[str] = set()
+        first_words = set()
+        for keyword, subscribers in keyword_subscribers.items():
+            tokens = tuple(tokenize(keyword))
+            if not tokens:
+                continue
+            self.phrases.setdefault(tokens, []).append(len(self.keywords))
+            self.keywords.append(keyword)
+            self.subscribers.append(frozenset(subscribers))
+            self.vocabulary.update(tokens)
+            first_words.add(tokens[0])
+        # Longest first, so matches ending at the same word are ordered as the automaton orders them.
+        self.lengths = sorted({len(tokens) for tokens in self.phrases}, reverse=True)
+        clitics = "|".join(CLITIC_SUFFIXES)
+        self.start_pattern = re.compile(
+            r"(?<!\w)(?:" + "|".join(sorted(map(re.escape, first_words), key=len, reverse=True))
+            + rf")(?:{clitics}){{0,{MAX_CLITICS}}}(?!\w)") if first_words else None
+
+    def find(self, text: str) -> list[KeywordMatch]:
+        """Returns every keyword occurrence in `text`, in order of where it ends."""
+        if self.start_pattern is None:
+            return []
+        normalized = normalize_text(text)
+        found = []
+        for start in self.start_pattern.finditer(normalized):
+            spans, words = [], []
+            for token in TOKEN_PATTERN.finditer(normalized, start.start()):
+                spans.append(token.span())
+                words.append(known_word(token.group(), self.vocabulary))
+                if words[-1] is None or len(words) == self.lengths[0]:
+                    break
+            for length in self.lengths:
+                for keyword_id in self.phrases.get(tuple(words[:length]), ()) if length <= len(words) else ():
+                    found.append((spans[length - 1][1], spans[0][0], -length, keyword_id))
+        found.sort()
+        return [KeywordMatch(self.keywords[keyword_id], start, end, self.subscribers[keyword_id])
+                for end, start, _, keyword_id in found]
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over word tokens, mapping each keyword to its subscribers."""
+
+    def __init__(self, keyword_subscribers: dict[str, set[str]]):
+        self.vocabulary: dict[str, int] = {}
+        self.keywords: list[str] = []
+        self.keyword_lengths: list[int] = []
+        self.subscribers: list[frozenset[str]] = []
+        # State 0 is the root. goto[state] maps a token id to the next state.
+        self.goto: list[dict[int, int]] = [{}]
+        self.fail: list[int] = [0]
+        self.output: list[tuple[int, ...]] = [()]
+
+        outputs: list[list[int]] = [[]]
+        for keyword, subscribers in keyword_subscribers.items():
+            tokens = tokenize(keyword)
+            if not tokens:
+                continue
+            state = 0
+            for token in tokens:
+                token_id = self.vocabulary.setdefault(token, len(self.vocabulary))
+                next_state = self.goto[state].get(token_id)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][token_id] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    outputs.append([])
+                state = next_state
+            keyword_id = len(self.keywords)
+            self.keywords.append(keyword)
+            self.keyword_lengths.append(len(tokens))
+            self.subscribers.append(frozenset(subscribers))
+            outputs[state].append(keyword_id)
+
+        # Breadth-first construction of failure links; each state's output
+        # also includes the outputs of its failure state.
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for token_id, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and token_id not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(token_id, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                outputs[next_state].extend(outputs[self.fail[next_state]])
+        self.output = [tuple(out) for out in outputs]
+
+    def _token_id(self, token: str) -> int | None:
+        """Vocabulary id of a word, trying it without trailing clitics if needed."""
+        word = known_word(token, self.vocabulary)
+        return None if word is None else self.vocabulary[word]
+
+    def find(self, text: str) -> list[KeywordMatch]:
+        """Returns every keyword occurrence in `text`, in order of where it ends."""
+        spans = [(m.start(), m.end(), m.group()) for m in TOKEN_PATTERN.finditer(normalize_text(text))]
+        matches = []
+        state = 0
+        for index, (_, end, token) in enumerate(spans):
+            token_id = self._token_id(token)
+            if token_id is None:
+                state = 0
+                continue
+            while state and token_id not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(token_id, 0)
+            for keyword_id in self.output[state]:
+                start = spans[index - self.keyword_lengths[keyword_id] + 1][0]
+                matches.append(KeywordMatch(self.keywords[keyword_id], start, end,
+                                            self.subscribers[keyword_id]))
+        return matches
+
+
+def compile_matcher(keyword_subscribers: dict[str, set[str]]) -> KeywordSet | KeywordAutomaton:
+    """The matcher suited to the number of keywords."""
+    if len(keyword_subscribers) < KEYWORD_AUTOMATON_MIN_KEYWORDS:
+        return KeywordSet(keyword_subscribers)
+    return KeywordAutomaton(keyword_subscribers)
+
+
+# --- Compiled matcher for the registered keywords, rebuilt only when they change
+
+_matcher: KeywordSet | KeywordAutomaton | None = None
+_matcher_version: int | None = None
+_matcher_lock = threading.Lock()
+
+
+def get_opportunity_matcher(store: KeywordStore = keyword_store) -> KeywordSet | KeywordAutomaton:
+    """Returns the matcher for the current keyword registry, compiling it on first use or after a change."""
+    global _matcher, _matcher_version
+    version = store.version
+    if _matcher is not None and _matcher_version == version:
+        return _matcher
+    with _matcher_lock:
+        if _matcher is None or _matcher_version != store.version:
+            version, keyword_subscribers = store.keyword_subscribers()
+            _matcher = compile_matcher(keyword_subscribers)
+            _matcher_version = version
+            print(f"[+] KEYWORD MATCHER: Compiled {len(_matcher.keywords)} keywords "
+                  f"({type(_matcher).__name__}) for registry v{version}.")
+    return _matcher
@@ -1,30 +1,77 @@
 # File: backend/app/application/services/legal_agent_service.py
 # Description: Contains the core business logic for the Legal Agent.
 
-from app.core.models import embedding_model, gemini_model
-from app.infrastructure.database.elasticsearch_connector import es_client
+
+from app.core import deadlines
+from app.core.bulkheads import run_in
+from app.core.metrics import stage
+from app.core.tracing import set_token_usage
+from app.core.model_router import model_router
+from app.core.models import embedding_model
+from app.application.services.query_coalescer import query_coalescer
+from app.application.services.batch_query_service import answer_batch
+from app.infrastructure.database.elasticsearch_connector import es_async_client
 
 LEGAL_INDEX_NAME = "umkm_legal_docs"
 
 
 async def process_legal_query(query: str) -> dict:
+    """
+    Answers a legal query. This function can be called by any part of the
+    application. Concurrent identical queries (e.g. after a push notification)
+    share one pipeline run.
+    """
+    return await query_coalescer.run("legal", query, lambda: _run_legal_pipeline(query))
+
+
+async def _run_legal_pipeline(query: str) -> dict:
     """
     Handles the entire RAG process for a legal query.
-    This function can be called by any part of the application.
     """
-    if not es_client:
+    if not es_async_client:
         raise Exception("Elasticsearch client is not available.")
 
     # Step 1: Generate embedding and perform hybrid search
-    query_embedding = embedding_model.encode(query).tolist()
-    hybrid_query = {"query": {"match": {"text": {"query": query}}}, "knn": {
-        "field": "embedding", "query_vector": query_embedding, "k": 5, "num_candidates": 50}}
+    # The kNN half of the hybrid search is dropped when the budget is needed for generation.
+    query_embedding = None
+    if deadlines.has_budget(deadlines.GENERATION_RESERVE_SECONDS):
+        with stage("embed", "legal"):
+            query_embedding = (await run_in("embedding", embedding_model.encode, query)).tolist()
+    else:
+        deadlines.degrade("legal.knn_retrieval", "budget reserved for generation")
+    hybrid_query = legal_search_body(query, query_embedding)
+
+    with stage("search", "legal"):
+        response = await es_async_client.search(index=LEGAL_INDEX_NAME, body=hybrid_query)
+
+    # Step 2: Generate the answer using Gemini
+    result = await answer_legal_from_hits(query, response['hits']['hits'])
+    result["degraded_stages"] = deadlines.degraded_stages()
+    return result
 
-    response = es_client.search(index=LEGAL_INDEX_NAME, body=hybrid_query)
 
+def process_legal_batch(queries: list[str], ordered: bool = True):
+    """
+    Answers a list of legal questions with one batched encode, one msearch and
+    bounded concurrent generations. Yields `(index, answer dict or exception)`.
+    """
+    return answer_batch(queries, LEGAL_INDEX_NAME, legal_search_body, answer_legal_from_hits, ordered=ordered,
+                        component="legal_batch")
+
+
+def legal_search_body(query: str, query_embedding: list[float] | None) -> dict:
+    """Hybrid (full-text + kNN) search over the law document chunks; full-text only without an embedding."""
+    body = {"query": {"match": {"text": {"query": query}}}}
+    if query_embedding is not None:
+        body["knn"] = {"field": "embedding", "query_vector": query_embedding, "k": 5, "num_candidates": 50}
+    return body
+
+
+async def answer_legal_from_hits(query: str, hits: list[dict]) -> dict:
+    """Generates the answer to a legal query from its retrieved chunks."""
     retrieved_chunks = []
     context_for_gemini = ""
-    for hit in response['hits']['hits']:
+    for hit in hits:
         source = hit['_source']
         chunk_text = source.get('text', '')
         context_for_gemini += f"--- Source: {source.get('chunk_id', '')} ---\n{chunk_text}\n\n"
@@ -35,7 +82,6 @@ async def process_legal_query(query: str) -> dict:
             "score": hit['_score']
         })
 
-    # Step 2: Generate the answer using Gemini
     prompt = f"""You are a helpful and professional legal assistant for Indonesian SMEs (UMKM). 
     Your task is to answer the user's question based *only* on the provided context from Indonesian law documents. 
     Do not use any external knowledge. If the answer is not available in the context, say so. 
@@ -48,7 +94,10 @@ async def process_legal_query(query: str) -> dict:
     {query}ANSWER:
     """
 
-    generation_response = gemini_model.generate_content(prompt)
+    with stage("generate", "legal") as generate_stage:
+        generation_response = await deadlines.within(
+            run_in("llm", model_router.generate_content, "legal.generate", prompt), "legal.generate")
+        set_token_usage(generate_stage, generation_response)
     final_answer = generation_response.text
 
     return {"answer": final_answer, "retrieved_chunks": retrieved_chunks}
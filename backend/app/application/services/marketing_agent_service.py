@@ -1,26 +1,70 @@
 # File: backend/app/application/services/marketing_agent_service.py
 # Description: Contains the core business logic for the Marketing Agent.
 
-from app.core.models import embedding_model, gemini_model
-from app.infrastructure.database.elasticsearch_connector import es_client
+
+from app.core import deadlines
+from app.core.bulkheads import run_in
+from app.core.metrics import stage
+from app.core.tracing import set_token_usage
+from app.core.model_router import model_router
+from app.core.models import embedding_model
+from app.application.services.query_coalescer import query_coalescer
+from app.application.services.batch_query_service import answer_batch
+from app.infrastructure.database.elasticsearch_connector import es_async_client
 
 MARKETING_INDEX_NAME = "umkm_marketing_kb"
 
 async def process_marketing_query(query: str) -> dict:
+    """
+    Answers a marketing query. Concurrent identical queries (e.g. after a push
+    notification) share one pipeline run.
+    """
+    return await query_coalescer.run("marketing", query, lambda: _run_marketing_pipeline(query))
+
+async def _run_marketing_pipeline(query: str) -> dict:
     """
     Handles the entire RAG process for a marketing query.
     """
-    if not es_client:
+    if not es_async_client:
         raise Exception("Elasticsearch client is not available.")
 
     # Step 1: Generate embedding and perform hybrid search
-    query_embedding = embedding_model.encode(query).tolist()
-    hybrid_query = { "query": { "match": { "content": { "query": query } } }, "knn": { "field": "embedding", "query_vector": query_embedding, "k": 3, "num_candidates": 20 } }
-    
-    response = es_client.search(index=MARKETING_INDEX_NAME, body=hybrid_query)
+    # The kNN half of the hybrid search is dropped when the budget is needed for generation.
+    query_embedding = None
+    if deadlines.has_budget(deadlines.GENERATION_RESERVE_SECONDS):
+        with stage("embed", "marketing"):
+            query_embedding = (await run_in("embedding", embedding_model.encode, query)).tolist()
+    else:
+        deadlines.degrade("marketing.knn_retrieval", "budget reserved for generation")
+    hybrid_query = marketing_search_body(query, query_embedding)
     
+    with stage("search", "marketing"):
+        response = await es_async_client.search(index=MARKETING_INDEX_NAME, body=hybrid_query)
+
+    # Step 2: Generate the answer using Gemini
+    result = await answer_marketing_from_hits(query, response['hits']['hits'])
+    result["degraded_stages"] = deadlines.degraded_stages()
+    return result
+
+def process_marketing_batch(queries: list[str], ordered: bool = True):
+    """
+    Answers a list of marketing questions with one batched encode, one msearch and
+    bounded concurrent generations. Yields `(index, answer dict or exception)`.
+    """
+    return answer_batch(queries, MARKETING_INDEX_NAME, marketing_search_body, answer_marketing_from_hits,
+                        ordered=ordered, component="marketing_batch")
+
+def marketing_search_body(query: str, query_embedding: list[float] | None) -> dict:
+    """Hybrid (full-text + kNN) search over the marketing articles; full-text only without an embedding."""
+    body = { "query": { "match": { "content": { "query": query } } } }
+    if query_embedding is not None:
+        body["knn"] = { "field": "embedding", "query_vector": query_embedding, "k": 3, "num_candidates": 20 }
+    return body
+
+async def answer_marketing_from_hits(query: str, hits: list[dict]) -> dict:
+    """Generates marketing advice for a query from its retrieved articles."""
     retrieved_articles = []; context_for_gemini = ""
-    for hit in response['hits']['hits']:
+    for hit in hits:
         source = hit['_source']
         context_for_gemini += f"--- Source Article: {source.get('title', '')} ---\n{source.get('content', '')}\n\n"
         retrieved_articles.append({
@@ -29,7 +73,6 @@ async def process_marketing_query(query: str) -> dict:
             "score": hit['_score']
         })
 
-    # Step 2: Generate the answer using Gemini
     prompt = f"""
     You are a creative and helpful marketing consultant for Indonesian SMEs (UMKM). 
     Your task is to answer the user's question and provide actionable, creative marketing ideas. 
@@ -45,7 +88,10 @@ async def process_marketing_query(query: str) -> dict:
     MARKETING ADVICE:
     """
     
-    generation_response = gemini_model.generate_content(prompt)
+    with stage("generate", "marketing") as generate_stage:
+        generation_response = await deadlines.within(
+            run_in("llm", model_router.generate_content, "marketing.generate", prompt), "marketing.generate")
+        set_token_usage(generate_stage, generation_response)
     final_answer = generation_response.text
         
     return {"answer": final_answer, "retrieved_articles": retrieved_articles}
\ No newline at end of file
@@ -0,0 +1,206 @@
+# File: backend/app/application/services/news_feed_service.py
+# Description: Concurrent RSS scanning for the Proactive Agent.
+# Feeds come from a registry and are fetched in parallel over one pooled async
+# HTTP client, with conditional GET (unchanged feeds cost a 304) and a
+# per-feed timeout so one slow site cannot stall the whole scan. Items seen
+# in earlier scans are skipped, and parsing stops once it reaches them.
+
+import asyncio
+import io
+import json
+import os
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from typing import Callable
+
+import httpx
+
+from app.infrastructure.storage.feed_state_store import FeedStateStore, feed_state_store
+from app.infrastructure.storage.seen_item_store import SeenItemStore, seen_item_store
+
+USER_AGENT = 'UMKM-Go-AI-Bot/1.0'
+FEED_TIMEOUT_SECONDS = float(os.getenv("NEWS_FEED_TIMEOUT_SECONDS", "10"))
+# Default time between scheduled scans of a feed (see scan_scheduler).
+FEED_INTERVAL_SECONDS = float(os.getenv("NEWS_SCAN_INTERVAL_SECONDS", "900"))
+# Optional JSON file with a list of {"name", "url", "source", "timeout", "interval"}
+# objects that replaces the default registry.
+NEWS_FEEDS_FILE = os.getenv("NEWS_FEEDS_FILE")
+# Feeds list newest items first, so parsing stops after this many consecutive
+# already-seen items. More than one tolerates pinned or reordered entries.
+SEEN_RUN_TO_STOP = 3
+
+
+@dataclass(frozen=True)
+class FeedConfig:
+    name: str
+    url: str
+    source: str
+    timeout: float = FEED_TIMEOUT_SECONDS
+    interval: float = FEED_INTERVAL_SECONDS
+
+
+DEFAULT_FEEDS = [
+    FeedConfig(name="antara-ekonomi-bisnis", url="https://www.antaranews.com/rss/ekonomi-bisnis.xml",
+               source="Antara News Bisnis"),
+]
+
+
+@dataclass
+class FeedItem:
+    title: str
+    link: str
+    description: str
+    guid: str
+
+
+@dataclass
+class FeedFetchResult:
+    feed: FeedConfig
+    status: str  # 'ok', 'not_modified', 'timeout' or 'error'
+    items: list[FeedItem] = field(default_factory=list)  # new items only
+    skipped: int = 0  # already-seen items parsed before stopping
+    stopped_early: bool = False
+    elapsed_ms: float = 0.0
+    error: str | None = None
+    # Validators of a full response, stored by mark_scanned once the items are processed.
+    etag: str | None = None
+    last_modified: str | None = None
+
+
+def load_feed_registry() -> list[FeedConfig]:
+    """Returns the feeds from NEWS_FEEDS_FILE if configured, otherwise the default registry."""
+    if not NEWS_FEEDS_FILE:
+        return list(DEFAULT_FEEDS)
+    with open(NEWS_FEEDS_FILE, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    return [
+        FeedConfig(name=entry["name"], url=entry["url"], source=entry.get("source", entry["name"]),
+                   timeout=float(entry.get("timeout", FEED_TIMEOUT_SECONDS)),
+                   interval=float(entry.get("interval", FEED_INTERVAL_SECONDS)))
+        for entry in entries
+    ]
+
+
+# --- Pooled HTTP client, shared by all scans
+
+_http_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            headers={'User-Agent': USER_AGENT},
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            follow_redirects=True,
+        )
+    return _http_client
+
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+# --- Fetching and parsing
+
+def _text(item: ET.Element, tag: str) -> str:
+    element = item.find(tag)
+    return (element.text or "") if element is not None else ""
+
+
+def parse_feed_items(content: bytes, is_seen: Callable[[str], bool] = lambda guid: False,
+                     seen_run_to_stop: int = SEEN_RUN_TO_STOP) -> tuple[list[FeedItem], int, bool]:
+    """
+    Streams the <item> entries of an RSS document with iterparse and returns
+    (new items, skipped seen items, stopped early). Parsing stops after
+    `seen_run_to_stop` consecutive seen items. Raises ET.ParseError on invalid XML.
+    """
+    items, skipped, seen_run = [], 0, 0
+    for _, element in ET.iterparse(io.BytesIO(content), events=('end',)):
+        if element.tag != 'item':
+            continue
+        link = _text(element, 'link').strip()
+        guid = _text(element, 'guid').strip() or link
+        if is_seen(guid):
+            skipped += 1
+            seen_run += 1
+            if seen_run >= seen_run_to_stop:
+                return items, skipped, True
+        else:
+            seen_run = 0
+            items.append(FeedItem(
+                title=_text(element, 'title').strip(),
+                link=link,
+                description=_text(element, 'description').strip(),
+                guid=guid,
+            ))
+        element.clear()
+    return items, skipped, False
+
+
+async def fetch_feed(client: httpx.AsyncClient, feed: FeedConfig,
+                     state: FeedStateStore = feed_state_store,
+                     seen: SeenItemStore = seen_item_store) -> FeedFetchResult:
+    """Fetches and parses the new items of one feed. Never raises; failures are reported in the result."""
+    start = time.perf_counter()
+
+    def result(status: str, **kwargs) -> FeedFetchResult:
+        return FeedFetchResult(feed=feed, status=status,
+                               elapsed_ms=(time.perf_counter() - start) * 1000, **kwargs)
+
+    try:
+        response = await asyncio.wait_for(
+            client.get(feed.url, headers=state.conditional_headers(feed.url), timeout=feed.timeout),
+            timeout=feed.timeout)
+        if response.status_code == 304:
+            return result('not_modified')
+        response.raise_for_status()
+        items, skipped, stopped_early = parse_feed_items(
+            response.content, lambda guid: seen.is_seen(feed.name, guid))
+        return result('ok', items=items, skipped=skipped, stopped_early=stopped_early,
+                      etag=response.headers.get('ETag'), last_modified=response.headers.get('Last-Modified'))
+    except (asyncio.TimeoutError, httpx.TimeoutException):
+        return result('timeout', error=f"No response within {feed.timeout:g}s")
+    except httpx.HTTPError as e:
+        return result('error', error=f"RSS fetch failed: {e}")
+    except ET.ParseError as e:
+        return result('error', error=f"XML parse failed: {e}")
+
+
+async def scan_feeds(feeds: list[FeedConfig] | None = None, client: httpx.AsyncClient | None = None,
+                     state: FeedStateStore = feed_state_store,
+                     seen: SeenItemStore = seen_item_store) -> list[FeedFetchResult]:
+    """
+    Fetches all feeds concurrently and returns one result per feed, in registry order.
+    New items are not marked as seen and the feeds' validators are not stored here;
+    call mark_scanned once the items are processed. Both stores are reread first,
+    since a scan on another worker may have updated them.
+    """
+    feeds = feeds if feeds is not None else load_feed_registry()
+    state.reload()
+    seen.reload()
+    client = client or get_http_client()
+    results = await asyncio.gather(*(fetch_feed(client, feed, state, seen) for feed in feeds))
+    for r in results:
+        marker = "[+]" if r.status in ('ok', 'not_modified') else "[!]"
+        print(f"{marker} FEED '{r.feed.name}': {r.status}, {len(r.items)} new / {r.skipped} seen items, "
+              f"{r.elapsed_ms:.0f} ms" + (f" ({r.error})" if r.error else ""))
+    return results
+
+
+def mark_scanned(results: list[FeedFetchResult], seen: SeenItemStore = seen_item_store,
+                 state: FeedStateStore = feed_state_store):
+    """
+    Records the new items of a scan as seen and stores the feeds' validators, so
+    later scans skip the items (or get a 304). Until then a failed scan refetches them.
+    """
+    for r in results:
+        if r.items:
+            seen.mark_seen(r.feed.name, (item.guid for item in r.items))
+        if r.status == 'ok':
+            state.update_validators(r.feed.url, r.etag, r.last_modified)
+
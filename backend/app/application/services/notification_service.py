@@ -0,0 +1,162 @@
+# File: backend/app/application/services/notification_service.py
+# Description: Batched, multi-recipient push delivery for the Proactive Agent.
+# Each notification is sent as FCM multicast batches of at most FCM_BATCH_LIMIT
+# tokens, several batches in flight at once. Tokens that FCM reports as
+# unregistered are pruned from the device registry. Broadcasts go to a topic.
+# The messaging backend is pluggable, so delivery can run against a local fake.
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Protocol
+
+from starlette.concurrency import run_in_threadpool
+
+from app.infrastructure.storage.device_token_store import DeviceTokenStore, device_token_store
+
+FCM_BATCH_LIMIT = 500  # maximum tokens per FCM multicast request
+FCM_BATCH_CONCURRENCY = int(os.getenv("FCM_BATCH_CONCURRENCY", "8"))
+NEWS_BROADCAST_TOPIC = os.getenv("NEWS_BROADCAST_TOPIC", "peluang-umkm")
+
+# FCM errors meaning the token will never work again.
+INVALID_TOKEN_ERRORS = {'UnregisteredError', 'SenderIdMismatchError'}
+
+
+@dataclass
+class PushNotification:
+    title: str
+    body: str
+    data: dict[str, str] = field(default_factory=dict)
+
+
+class MessagingBackend(Protocol):
+    def send_multicast(self, notification: PushNotification, tokens: list[str]) -> list[Exception | None]:
+        """Sends one notification to up to FCM_BATCH_LIMIT tokens; returns one error (or None) per token."""
+
+    def send_to_topic(self, notification: PushNotification, topic: str) -> str:
+        """Sends one notification to every device subscribed to `topic`; returns the message id."""
+
+
+class FirebaseMessagingBackend:
+    """Messaging backend using the Firebase Admin SDK (initialized by the Proactive Agent router)."""
+
+    def send_multicast(self, notification: PushNotification, tokens: list[str]) -> list[Exception | None]:
+        from firebase_admin import messaging
+        message = messaging.MulticastMessage(
+            notification=messaging.Notification(title=notification.title, body=notification.body),
+            data=notification.data,
+            tokens=tokens,
+        )
+        response = messaging.send_each_for_multicast(message)
+        return [None if r.success else r.exception for r in response.responses]
+
+    def send_to_topic(self, notification: PushNotification, topic: str) -> str:
+        from firebase_admin import messaging
+        return messaging.send(messaging.Message(
+            notification=messaging.Notification(title=notification.title, body=notification.body),
+            data=notification.data,
+            topic=topic,
+        ))
+
+
+@dataclass
+class DeliveryReport:
+    recipients: int = 0
+    tokens: int = 0
+    batches: int = 0
+    sent: int = 0
+    failed: int = 0
+    pruned_tokens: int = 0
+    topic_message_id: str | None = None
+    elapsed_ms: float = 0.0
+
+
+def is_invalid_token_error(error: Exception) -> bool:
+    return any(cls.__name__ in INVALID_TOKEN_ERRORS for cls in type(error).__mro__)
+
+
+def _batches(tokens: list[str], size: int) -> list[list[str]]:
+    return [tokens[i:i + size] for i in range(0, len(tokens), size)]
+
+
+async def deliver(deliveries: list[tuple[PushNotification, list[str]]],
+                  backend: MessagingBackend | None = None,
+                  store: DeviceTokenStore = device_token_store,
+                  batch_limit: int = FCM_BATCH_LIMIT,
+                  concurrency: int = FCM_BATCH_CONCURRENCY) -> DeliveryReport:
+    """
+    Sends each (notification, tokens) pair as multicast batches, with at most
+    `concurrency` batches in flight across all notifications, and prunes the
+    tokens FCM reports as invalid.
+    """
+    backend = backend or default_backend
+    start = time.perf_counter()
+    report = DeliveryReport()
+    semaphore = asyncio.Semaphore(concurrency)
+    invalid_tokens: list[str] = []
+
+    async def send_batch(notification: PushNotification, batch: list[str]):
+        async with semaphore:
+            try:
+                errors = await run_in_threadpool(backend.send_multicast, notification, batch)
+            except Exception as e:
+                print(f"[!] FCM batch of {len(batch)} failed: {e}")
+                report.failed += len(batch)
+                return
+        for token, error in zip(batch, errors):
+            if error is None:
+                report.sent += 1
+            else:
+                report.failed += 1
+                if is_invalid_token_error(error):
+                    invalid_tokens.append(token)
+
+    jobs = []
+    for notification, tokens in deliveries:
+        tokens = list(dict.fromkeys(tokens))
+        report.tokens += len(tokens)
+        for batch in _batches(tokens, batch_limit):
+            jobs.append(send_batch(notification, batch))
+    report.batches = len(jobs)
+    await asyncio.gather(*jobs)
+
+    if invalid_tokens:
+        report.pruned_tokens = await run_in_threadpool(store.prune, invalid_tokens)
+    report.elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"[+] FCM: {report.sent} sent, {report.failed} failed in {report.batches} batches, "
+          f"{report.pruned_tokens} invalid tokens pruned, {report.elapsed_ms:.0f} ms.")
+    return report
+
+
+async def deliver_to_users(notifications: dict[str, PushNotification],
+                           backend: MessagingBackend | None = None,
+                           store: DeviceTokenStore = device_token_store, **kwargs) -> DeliveryReport:
+    """
+    Delivers a notification per user to all of the user's devices. Users getting
+    the same notification share multicast batches.
+    """
+    groups: dict[int, tuple[PushNotification, list[str]]] = {}
+    for user_id, notification in notifications.items():
+        tokens = store.tokens_for([user_id])
+        if tokens:
+            groups.setdefault(id(notification), (notification, []))[1].extend(tokens)
+    report = await deliver(list(groups.values()), backend, store, **kwargs)
+    report.recipients = len(notifications)
+    return report
+
+
+async def broadcast_to_topic(notification: PushNotification, topic: str = NEWS_BROADCAST_TOPIC,
+                             backend: MessagingBackend | None = None) -> str | None:
+    """Fans a notification out to every device subscribed to `topic`. Returns the message id, or None on failure."""
+    backend = backend or default_backend
+    try:
+        message_id = await run_in_threadpool(backend.send_to_topic, notification, topic)
+        print(f"[+] FCM: Broadcast to topic '{topic}': {message_id}")
+        return message_id
+    except Exception as e:
+        print(f"[!] Error sending FCM topic message: {e}")
+        return None
+
+
+default_backend: MessagingBackend = FirebaseMessagingBackend()
@@ -0,0 +1,91 @@
+# File: backend/app/application/services/query_coalescer.py
+# Description: Request coalescing for agent queries.
+# A push notification makes many users ask near-identical questions within
+# seconds. Concurrent requests with the same (agent, normalized query) share one
+# in-flight pipeline run (embedding, search, generation) instead of each running
+# their own. Only concurrent requests are coalesced; nothing is cached afterwards.
+# The shared run uses the first request's deadline budget (which decides kNN
+# skipping, model downgrades and timeouts), so only requests whose deadlines end
+# in the same COALESCE_BUDGET_BUCKET_SECONDS window are coalesced. Joining
+# requests get the shared run's stages in their Server-Timing and degraded stages.
+
+import copy
+import math
+import os
+import re
+import threading
+import unicodedata
+from typing import Any, Awaitable, Callable
+
+from app.core import deadlines
+from app.core.metrics import add_request_timings, request_timings
+from app.core.singleflight import SingleFlight
+
+COALESCE_BUDGET_BUCKET_SECONDS = float(os.getenv("COALESCE_BUDGET_BUCKET_SECONDS", "5"))
+
+_WHITESPACE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = " \t\n.,!?;:'\"“”‘’()"
+
+
+def normalize_query(query: str) -> str:
+    """Case-, whitespace- and edge-punctuation-insensitive form of a query."""
+    query = unicodedata.normalize("NFKC", query).casefold()
+    return _WHITESPACE.sub(" ", query).strip(_EDGE_PUNCTUATION)
+
+
+def budget_bucket() -> int | None:
+    """Window in which the current request's deadline ends; requests in the same window can share a run."""
+    expires_at = deadlines.expires_at()
+    return None if expires_at is None else math.floor(expires_at / COALESCE_BUDGET_BUCKET_SECONDS)
+
+
+class QueryCoalescer:
+    """Singleflight over agent pipelines, with per-agent counts of coalesced requests."""
+
+    def __init__(self):
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._stats: dict[str, dict[str, int]] = {}
+
+    def _count(self, agent: str, counter: str):
+        with self._lock:
+            stats = self._stats.setdefault(agent, {"requests": 0, "executions": 0, "coalesced": 0})
+            stats[counter] += 1
+
+    async def run(self, agent: str, query: str, pipeline: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Runs `pipeline()` for the query, or joins the identical query already in
+        flight. Each caller gets its own copy of the result, so callers may modify it.
+        """
+        key = (agent, normalize_query(query), budget_bucket())
+        self._count(agent, "requests")
+        if self._flight.in_flight(key):
+            self._count(agent, "coalesced")
+            print(f"[*] COALESCE: {agent} query joins an identical one in flight.")
+        else:
+            self._count(agent, "executions")
+
+        async def shared_pipeline():
+            # Runs in the first caller's context; what it records there is handed on to the joiners.
+            first_stage = len(request_timings())
+            result = await pipeline()
+            return result, request_timings()[first_stage:], deadlines.degraded_stages()
+
+        (result, timings, degraded), shared = await self._flight.do(key, shared_pipeline)
+        if not shared:
+            return result
+        add_request_timings(timings)
+        for stage_name in degraded:
+            deadlines.degrade(stage_name, "shared run of a coalesced request")
+        return copy.deepcopy(result)
+
+    def stats(self) -> dict[str, dict]:
+        with self._lock:
+            return {
+                agent: {**counts, "coalesced_ratio": round(counts["coalesced"] / counts["requests"], 3)}
+                for agent, counts in self._stats.items()
+            }
+
+
+# Create a single, reusable coalescer
+query_coalescer = QueryCoalescer()
@@ -0,0 +1,255 @@
+# File: backend/app/application/services/sales_analytics.py
+# Description: Vectorized per-product and time-series analytics for sales data.
+# Every function works on whole columns (groupby / resample / rolling), never on
+# individual rows, so millions of rows are aggregated in well under a second.
+# Partial aggregates are mergeable, which lets the ingestion layer build them
+# chunk by chunk.
+
+import numpy as np
+import pandas as pd
+
+# Optional columns recognised in uploads, in order of preference.
+DATE_COLUMN_CANDIDATES = ['date', 'transaction_date', 'order_date', 'timestamp', 'tanggal']
+ORDER_COLUMN_CANDIDATES = ['order_id', 'transaction_id', 'invoice_id', 'receipt_id']
+
+# Sizes of the series included in the summary sent to Gemini.
+TOP_N = 5
+DAILY_SERIES_DAYS = 14
+WEEKLY_SERIES_WEEKS = 12
+MOVING_AVERAGE_DAYS = 7
+
+# Above this many (distinct date value x product) combinations, the per-day
+# reduction switches from a dense bincount to hashing the combined keys.
+DENSE_KEY_SPACE_LIMIT = 4_000_000
+
+
+def find_column(columns, candidates: list[str]) -> str | None:
+    """Returns the first candidate present in `columns`, or None."""
+    for candidate in candidates:
+        if candidate in columns:
+            return candidate
+    return None
+
+
+def with_revenue(df: pd.DataFrame) -> pd.DataFrame:
+    return df.assign(revenue=df['quantity'] * df['price'])
+
+
+def _aggregate_by(df: pd.DataFrame, keys) -> pd.DataFrame:
+    grouped = df.groupby(keys, observed=True, sort=False)
+    result = grouped.agg(
+        quantity=('quantity', 'sum'),
+        revenue=('revenue', 'sum'),
+        transactions=('quantity', 'size'),
+    )
+    return result.astype({'quantity': 'float64', 'revenue': 'float64', 'transactions': 'int64'})
+
+
+def product_aggregates(df: pd.DataFrame) -> pd.DataFrame:
+    """Per-product quantity, revenue and number of sales rows, indexed by product name."""
+    result = _aggregate_by(df, 'product_name')
+    result.index = result.index.astype(str)
+    return result
+
+
+def _codes(values: pd.Series) -> tuple[np.ndarray, pd.Index]:
+    """Integer codes (-1 for missing) and unique values of a column."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), values.cat.categories
+    codes, uniques = pd.factorize(values)
+    return codes, pd.Index(uniques)
+
+
+def _parse_days(values: pd.Index) -> np.ndarray:
+    """Parses distinct date strings to day-resolution datetime64 values (NaT if invalid)."""
+    raw = pd.Series(values, dtype=object)
+    days = pd.to_datetime(raw, errors='coerce')
+    unparsed = days.isna() & raw.notna()
+    if unparsed.any():
+        # Inference locks onto the first value's format; retry the rest one by one.
+        days[unparsed] = pd.to_datetime(raw[unparsed], errors='coerce', format='mixed')
+    return days.dt.normalize().to_numpy(dtype='datetime64[ns]')
+
+
+def daily_product_aggregates(df: pd.DataFrame, date_column: str) -> pd.DataFrame:
+    """Per-(day, product) aggregates, indexed by a (date, product_name) MultiIndex."""
+    # Dates are parsed once per distinct value, and the (day, product) pairs are
+    # reduced with bincount over a combined integer key instead of a groupby on
+    # datetime and string columns.
+    date_codes, date_values = _codes(df[date_column])
+    days = _parse_days(date_values)
+    product_codes, product_names = _codes(df['product_name'])
+
+    valid = (date_codes >= 0) & (product_codes >= 0)
+    if len(days):
+        valid &= ~np.isnat(days[np.maximum(date_codes, 0)])
+    n_products = max(len(product_names), 1)
+    key = date_codes[valid].astype(np.int64) * n_products + product_codes[valid]
+    quantity = np.nan_to_num(df['quantity'].to_numpy(dtype='float64')[valid])
+    revenue = np.nan_to_num(df['revenue'].to_numpy(dtype='float64')[valid])
+
+    key_space = len(date_values) * n_products
+    if key_space <= DENSE_KEY_SPACE_LIMIT:
+        counts = np.bincount(key, minlength=key_space)
+        group_keys = np.flatnonzero(counts)
+        transactions = counts[group_keys]
+        quantity = np.bincount(key, weights=quantity, minlength=key_space)[group_keys]
+        revenue = np.bincount(key, weights=revenue, minlength=key_space)[group_keys]
+    else:
+        group_ids, group_keys = pd.factorize(key)
+        transactions = np.bincount(group_ids, minlength=len(group_keys))
+        quantity = np.bincount(group_ids, weights=quantity, minlength=len(group_keys))
+        revenue = np.bincount(group_ids, weights=revenue, minlength=len(group_keys))
+
+    values = pd.DataFrame({
+        'quantity': quantity.astype('float64'),
+        'revenue': revenue.astype('float64'),
+        'transactions': transactions.astype('int64'),
+    })
+    date_group_codes = group_keys // n_products
+    used_dates = np.unique(date_group_codes)
+    day_level = pd.DatetimeIndex(days[used_dates])
+    if day_level.has_duplicates:
+        # Different raw values fell on the same day (e.g. timestamps); fold them together.
+        values['date'] = days[date_group_codes]
+        values['product_name'] = product_names.astype(str)[group_keys % n_products]
+        return values.groupby(['date', 'product_name'], sort=False).sum()
+
+    # Build the MultiIndex straight from the integer codes; this avoids
+    # materialising and re-hashing one string per (day, product) pair.
+    values.index = pd.MultiIndex(
+        levels=[day_level, product_names.astype(str)],
+        codes=[np.searchsorted(used_dates, date_group_codes), group_keys % n_products],
+        names=['date', 'product_name'],
+        verify_integrity=False,
+    )
+    return values
+
+
+def order_aggregates(df: pd.DataFrame, order_column: str) -> pd.DataFrame:
+    """Per-order (basket) item count and revenue, indexed by order id."""
+    frame = pd.DataFrame({
+        'order_id': df[order_column],
+        'quantity': df['quantity'],
+        'revenue': df['revenue'],
+    })
+    return _aggregate_by(frame, 'order_id')
+
+
+def merge_aggregates(left: pd.DataFrame | None, right: pd.DataFrame | None) -> pd.DataFrame | None:
+    """Adds two partial aggregates that share the same index layout."""
+    if left is None or left.empty:
+        return right
+    if right is None or right.empty:
+        return left
+    merged = left.add(right, fill_value=0)
+    return merged.astype({'quantity': 'float64', 'revenue': 'float64', 'transactions': 'int64'})
+
+
+def top_n(aggregates: pd.DataFrame, by: str, n: int = TOP_N) -> list[dict]:
+    """Returns the `n` largest rows by `by` as a list of plain dictionaries."""
+    top = aggregates.nlargest(n, by)
+    return [
+        {"name": str(name), "quantity": int(row.quantity), "revenue": float(row.revenue),
+         "transactions": int(row.transactions)}
+        for name, row in zip(top.index, top.itertuples(index=False))
+    ]
+
+
+def revenue_series(daily_product: pd.DataFrame, freq: str = 'D') -> pd.Series:
+    """
+    Revenue per period ('D' for daily, 'W' for weeks ending Sunday), with
+    missing periods filled with zero.
+    """
+    daily = daily_product['revenue'].groupby(level='date').sum().sort_index()
+    return daily.resample(freq).sum()
+
+
+def moving_average(series: pd.Series, window: int = MOVING_AVERAGE_DAYS) -> pd.Series:
+    return series.rolling(window, min_periods=1).mean()
+
+
+def basket_size(orders: pd.DataFrame) -> dict:
+    """Basket statistics across orders."""
+    return {
+        "orders": int(len(orders)),
+        "avg_items_per_order": float(orders['quantity'].mean()),
+        "median_items_per_order": float(orders['quantity'].median()),
+        "avg_revenue_per_order": float(orders['revenue'].mean()),
+    }
+
+
+def _series_to_list(series: pd.Series, value_name: str) -> list[dict]:
+    return [
+        {"period": period.strftime('%Y-%m-%d'), value_name: round(float(value), 2)}
+        for period, value in series.items()
+    ]
+
+
+def time_series_summary(daily_product: pd.DataFrame) -> dict:
+    """Compact daily/weekly revenue view with moving averages and a week-over-week trend."""
+    daily = revenue_series(daily_product, 'D')
+    weekly = revenue_series(daily_product, 'W')
+    daily_ma = moving_average(daily, MOVING_AVERAGE_DAYS)
+
+    summary = {
+        "first_date": daily.index.min().strftime('%Y-%m-%d'),
+        "last_date": daily.index.max().strftime('%Y-%m-%d'),
+        "days_covered": int(len(daily)),
+        "best_day": {"date": daily.idxmax().strftime('%Y-%m-%d'), "revenue": float(daily.max())},
+        "avg_daily_revenue": float(daily.mean()),
+        f"revenue_{MOVING_AVERAGE_DAYS}d_moving_average": float(daily_ma.iloc[-1]),
+        "daily_revenue": _series_to_list(daily.tail(DAILY_SERIES_DAYS), "revenue"),
+        "weekly_revenue": _series_to_list(weekly.tail(WEEKLY_SERIES_WEEKS), "revenue"),
+    }
+    if len(daily) >= 2 * MOVING_AVERAGE_DAYS:
+        previous = float(daily_ma.iloc[-1 - MOVING_AVERAGE_DAYS])
+        current = float(daily_ma.iloc[-1])
+        summary["week_over_week_change_pct"] = (
+            round((current - previous) / previous * 100, 1) if previous else None)
+    return summary
+
+
+def summarize_sales(products: pd.DataFrame,
+                    daily_product: pd.DataFrame | None = None,
+                    orders: pd.DataFrame | None = None,
+                    top: int = TOP_N) -> dict:
+    """Builds the compact statistics dictionary sent to Gemini and returned to the client."""
+    if products is None or products.empty:
+        raise ValueError("CSV contains no sales rows.")
+
+    best_by_quantity = products['quantity'].idxmax()
+    best_by_revenue = products['revenue'].idxmax()
+    total_rows = int(products['transactions'].sum())
+
+    statistics = {
+        "total_revenue": float(products['revenue'].sum()),
+        "total_items_sold": int(products['quantity'].sum()),
+        "total_transactions": total_rows,
+        "distinct_products": int(len(products)),
+        "best_selling_by_quantity": {
+            "name": str(best_by_quantity),
+            "quantity": int(products.at[best_by_quantity, 'quantity'])
+        },
+        "highest_revenue_product": {
+            "name": str(best_by_revenue),
+            "revenue": float(products.at[best_by_revenue, 'revenue'])
+        },
+        "top_products_by_quantity": top_n(products, 'quantity', top),
+        "top_products_by_revenue": top_n(products, 'revenue', top),
+    }
+
+    if orders is not None and not orders.empty:
+        statistics["basket"] = basket_size(orders)
+    else:
+        # Without an order id every row is treated as its own basket.
+        statistics["basket"] = {
+            "orders": total_rows,
+            "avg_items_per_order": float(products['quantity'].sum() / total_rows) if total_rows else 0.0,
+        }
+
+    if daily_product is not None and not daily_product.empty:
+        statistics["time_series"] = time_series_summary(daily_product)
+
+    return statistics
+
@@ -0,0 +1,275 @@
+# File: backend/app/application/services/sales_forecasting.py
+# Description: Vectorized demand forecasting and anomaly detection for the Operational Agent.
+# All products are processed at once as a (days x products) matrix with NumPy, so the
+# cost grows with the size of the matrix, not with a Python loop per product.
+
+import numpy as np
+import pandas as pd
+
+HORIZON_DAYS = 7
+MIN_HISTORY_DAYS = 14
+# Recent window used for the demand level and the weekday seasonality.
+SEASONALITY_WEEKS = 8
+LEVEL_SHORT_DAYS = 7
+LEVEL_LONG_DAYS = 28
+# Weight of the store-wide weekday pattern vs. each product's own pattern;
+# stabilises seasonality for products with sparse sales.
+STORE_SEASONALITY_WEIGHT = 0.5
+
+# Restock alert: forecast demand at least this much above the typical (median)
+# weekly sales of the SEASONALITY_WEEKS weeks before the last RESTOCK_RECENT_WEEKS,
+# and above them by at least RESTOCK_MIN_Z times the weekly noise (robust spread
+# of those weekly totals, at least the Poisson spread sqrt(median) of count data).
+# One low week, or plain noise, must not look like rising demand; leaving out the
+# recent weeks keeps a real rise from inflating its own baseline.
+RESTOCK_GROWTH_THRESHOLD = 0.25
+RESTOCK_MIN_Z = 2.5
+RESTOCK_RECENT_WEEKS = 2
+RESTOCK_MIN_QUANTITY = 5
+
+# Anomalies: robust z-score (median/MAD) of weekday-adjusted values. Store-wide
+# days are scored against a sliding trailing window; products, in the recent
+# period only, against the fixed baseline of the preceding weeks.
+ANOMALY_WINDOW_DAYS = 28
+ANOMALY_LOOKBACK_DAYS = 90
+PRODUCT_ANOMALY_DAYS = 28
+PRODUCT_BASELINE_WEEKS = 8
+ANOMALY_Z_THRESHOLD = 3.5
+# Slow movers: ignore product-day deviations smaller than this many units.
+PRODUCT_ANOMALY_MIN_UNITS = 5
+# Store-wide revenue is only weekday-adjusted before scoring when the weekday
+# effect is real: enough whole weeks, and a one-way ANOVA F statistic above its
+# 0.1% critical value (real weekday patterns score far higher). A pattern fitted
+# to plain noise shrinks the MAD and turns ordinary days into anomalies.
+SEASONALITY_MIN_WEEKS = 4
+SEASONALITY_MIN_F = 5.0
+
+MAX_LISTED = 10
+
+
+def daily_matrices(daily_product: pd.DataFrame) -> tuple[pd.DatetimeIndex, pd.Index, np.ndarray, np.ndarray]:
+    """
+    Dense (days x products) quantity and revenue matrices over the full date
+    range, with days without sales as zero. Built straight from the MultiIndex
+    codes with bincount instead of unstacking.
+    """
+    index = daily_product.index
+    day_codes, product_codes = index.codes[0], index.codes[1]
+    level_days = pd.DatetimeIndex(index.levels[0]).normalize()
+    used_days = level_days[np.bincount(day_codes, minlength=len(level_days)) > 0]
+    first_day = used_days.min()
+    dates = pd.date_range(first_day, used_days.max(), freq='D')
+    day_offsets = ((level_days - first_day) // pd.Timedelta(days=1)).to_numpy()
+
+    # Products left over as unused index levels (e.g. after filtering) get no column.
+    used_products = np.bincount(product_codes, minlength=len(index.levels[1])) > 0
+    product_columns = np.cumsum(used_products) - 1
+    products = index.levels[1][used_products]
+
+    flat = day_offsets[day_codes].astype(np.int64) * len(products) + product_columns[product_codes]
+    shape = (len(dates), len(products))
+    quantity, revenue = (
+        np.bincount(flat, weights=daily_product[column].to_numpy(dtype=np.float64),
+                    minlength=shape[0] * shape[1]).reshape(shape)
+        for column in ('quantity', 'revenue')
+    )
+    return dates, products, quantity, revenue
+
+
+def weekday_seasonality(values: np.ndarray, dates: pd.DatetimeIndex,
+                        store_weight: float = STORE_SEASONALITY_WEIGHT) -> np.ndarray:
+    """
+    (7 x columns) multiplicative weekday indexes, indexed by dayofweek, from the
+    trailing whole weeks of a (days x columns) array. Each column's mean-based
+    pattern is blended with the store-wide pattern, which uses weekly medians
+    so a single exceptional day does not shift it. Columns without sales get
+    the store-wide pattern only.
+    """
+    n_days = len(values) // 7 * 7
+    values, weekdays = values[-n_days:], dates[-n_days:].dayofweek.to_numpy()
+    slot_weekdays = weekdays[:7]                            # weekday of each position in a week
+    weekly = values.reshape(-1, 7, values.shape[1])          # (weeks x 7 x columns)
+
+    slot_mean = weekly.mean(axis=0)
+    overall_mean = values.mean(axis=0)
+    store_slots = np.median(weekly.sum(axis=2), axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        column_index = np.where(overall_mean > 0, slot_mean / overall_mean, 1.0)
+        store_index = store_slots / store_slots.mean() if store_slots.mean() > 0 else np.ones(7)
+    blended = (1 - store_weight) * column_index + store_weight * store_index[:, None]
+    blended = np.where(overall_mean > 0, blended, store_index[:, None])
+
+    seasonality = np.empty_like(blended)
+    seasonality[slot_weekdays] = blended
+    return seasonality
+
+
+def weekday_effect_f(values: np.ndarray) -> float:
+    """One-way ANOVA F statistic of a daily series grouped by weekday, over its trailing whole weeks."""
+    n_days = len(values) // 7 * 7
+    weekly = values[-n_days:].reshape(-1, 7)  # (weeks x weekday slots)
+    if len(weekly) < 2:
+        return 0.0
+    slot_mean = weekly.mean(axis=0)
+    between = len(weekly) * ((slot_mean - weekly.mean()) ** 2).sum() / 6
+    within = ((weekly - slot_mean) ** 2).sum() / (n_days - 7)
+    if within == 0:
+        return np.inf if between > 0 else 0.0
+    return between / within
+
+
+def forecast_next_week(dates: pd.DatetimeIndex, quantity: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Per-product forecast for the next HORIZON_DAYS days: a level blended from
+    the last 7 and 28 days, shaped by weekday seasonality of the last weeks.
+    Returns the forecast quantities and the (7 x products) seasonal indexes.
+    """
+    seasonality = weekday_seasonality(quantity[-SEASONALITY_WEEKS * 7:], dates)
+
+    level = 0.5 * quantity[-LEVEL_SHORT_DAYS:].mean(axis=0) + 0.5 * quantity[-LEVEL_LONG_DAYS:].mean(axis=0)
+    future_weekdays = (dates[-1] + pd.to_timedelta(np.arange(1, HORIZON_DAYS + 1), unit='D')).dayofweek
+    daily_forecast = level[None, :] * seasonality[future_weekdays.to_numpy()]  # (horizon x products)
+    return daily_forecast.sum(axis=0), seasonality
+
+
+def weekly_baseline(quantity: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Per-product median and noise (standard deviation) of the weekly totals over
+    the trailing whole weeks of the last SEASONALITY_WEEKS weeks, without the
+    last RESTOCK_RECENT_WEEKS unless fewer than two weeks would be left.
+    """
+    n_days = min(len(quantity), SEASONALITY_WEEKS * 7) // 7 * 7
+    weekly = quantity[-n_days:].reshape(-1, 7, quantity.shape[1]).sum(axis=1)  # (weeks x products)
+    if len(weekly) - RESTOCK_RECENT_WEEKS >= 2:
+        weekly = weekly[:-RESTOCK_RECENT_WEEKS]
+    median = np.median(weekly, axis=0)
+    spread = 1.4826 * np.median(np.abs(weekly - median), axis=0)
+    return median, np.maximum(spread, np.sqrt(median))
+
+
+def _robust_z(values: np.ndarray, median: np.ndarray, mad: np.ndarray) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = 0.6745 * (values - median) / mad
+    # Baselines without any variation are not scored.
+    return np.where(mad > 0, z, np.nan)
+
+
+def detect_anomalous_days(dates: pd.DatetimeIndex, revenue: np.ndarray) -> list[dict]:
+    """Days whose weekday-adjusted total revenue departs strongly from the trailing window."""
+    window = ANOMALY_WINDOW_DAYS
+    daily_revenue = revenue[-(ANOMALY_LOOKBACK_DAYS + window):].sum(axis=1)
+    if len(daily_revenue) <= window:
+        return []
+    recent_dates = dates[-len(daily_revenue):]
+    weekdays = recent_dates.dayofweek.to_numpy()
+    if (len(daily_revenue) >= SEASONALITY_MIN_WEEKS * 7
+            and weekday_effect_f(daily_revenue) >= SEASONALITY_MIN_F):
+        seasonal = weekday_seasonality(daily_revenue[:, None], recent_dates, store_weight=1.0)[weekdays, 0]
+    else:
+        seasonal = np.ones(len(daily_revenue))
+    adjusted = daily_revenue / np.where(seasonal > 0, seasonal, 1.0)
+
+    windows = np.lib.stride_tricks.sliding_window_view(adjusted[:-1], window)
+    median = np.median(windows, axis=1)
+    mad = np.median(np.abs(windows - median[:, None]), axis=1)
+    # The MAD of 28 days is itself noisy; a calm window must not make ordinary days
+    # look extreme, so the scale is at least that of the whole lookback.
+    mad = np.maximum(mad, np.median(np.abs(adjusted - np.median(adjusted))))
+    z = _robust_z(adjusted[window:], median, mad)
+
+    flagged = np.flatnonzero(np.abs(np.nan_to_num(z)) >= ANOMALY_Z_THRESHOLD)
+    flagged = np.sort(flagged[np.argsort(-np.abs(z[flagged]))][:MAX_LISTED])
+    return [
+        {"date": recent_dates[window + i].strftime('%Y-%m-%d'),
+         "revenue": float(daily_revenue[window + i]),
+         "expected_revenue": round(float(median[i] * seasonal[window + i]), 2),
+         "z_score": round(float(z[i]), 1),
+         "direction": "spike" if z[i] > 0 else "drop"}
+        for i in flagged
+    ]
+
+
+def detect_product_anomalies(dates: pd.DatetimeIndex, products: pd.Index, quantity: np.ndarray,
+                             seasonality: np.ndarray) -> list[dict]:
+    """The strongest per-product daily quantity anomalies in the recent period."""
+    baseline_days = PRODUCT_BASELINE_WEEKS * 7
+    if len(dates) < PRODUCT_ANOMALY_DAYS + baseline_days:
+        return []
+    weekdays = dates.dayofweek.to_numpy()
+    adjusted = quantity[-(PRODUCT_ANOMALY_DAYS + baseline_days):] / np.maximum(
+        seasonality[weekdays[-(PRODUCT_ANOMALY_DAYS + baseline_days):]], 1e-6)
+    baseline, recent = adjusted[:baseline_days], adjusted[baseline_days:]
+
+    median = np.median(baseline, axis=0)
+    mad = np.median(np.abs(baseline - median), axis=0)
+    z = _robust_z(recent, median, mad)
+    expected = median * seasonality[weekdays[-PRODUCT_ANOMALY_DAYS:]]
+    deviation = np.abs(quantity[-PRODUCT_ANOMALY_DAYS:] - expected)
+    abs_z = np.where(deviation >= PRODUCT_ANOMALY_MIN_UNITS, np.abs(np.nan_to_num(z)), 0.0)
+    flat = np.flatnonzero(abs_z >= ANOMALY_Z_THRESHOLD)
+    if not len(flat):
+        return []
+    flat = flat[np.argsort(-abs_z.ravel()[flat])][:MAX_LISTED]
+    day_idx, product_idx = np.unravel_index(flat, recent.shape)
+    offset = len(dates) - PRODUCT_ANOMALY_DAYS
+    return [
+        {"date": dates[offset + d].strftime('%Y-%m-%d'),
+         "product": str(products[p]),
+         "quantity": float(quantity[offset + d, p]),
+         "expected_quantity": round(float(expected[d, p]), 1),
+         "z_score": round(float(z[d, p]), 1),
+         "direction": "spike" if z[d, p] > 0 else "drop"}
+        for d, p in zip(day_idx, product_idx)
+    ]
+
+
+def forecast_demand(daily_product: pd.DataFrame | None) -> dict | None:
+    """
+    Builds the structured forecast added to the Gemini prompt: next-week demand
+    per product, restock alerts and anomalous days. Returns None without enough
+    dated history.
+    """
+    if daily_product is None or daily_product.empty:
+        return None
+    dates, products, quantity, revenue = daily_matrices(daily_product)
+    if len(dates) < MIN_HISTORY_DAYS:
+        return None
+
+    forecast_quantity, seasonality = forecast_next_week(dates, quantity)
+    baseline, noise = weekly_baseline(quantity)
+    forecast = pd.DataFrame({
+        'forecast_quantity': forecast_quantity,
+        'last_week_quantity': quantity[-7:].sum(axis=0),
+        'typical_week_quantity': baseline,
+    }, index=products)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = np.where(forecast['last_week_quantity'] > 0,
+                          forecast['forecast_quantity'] / forecast['last_week_quantity'] - 1, np.nan)
+    forecast['change_pct'] = np.round(growth * 100, 1)
+
+    def to_rows(frame: pd.DataFrame) -> list[dict]:
+        return [
+            {"name": str(name), "forecast_quantity": round(float(row.forecast_quantity), 1),
+             "last_week_quantity": float(row.last_week_quantity),
+             "typical_week_quantity": float(row.typical_week_quantity),
+             "change_pct": None if np.isnan(row.change_pct) else float(row.change_pct)}
+            for name, row in zip(frame.index, frame.itertuples(index=False))
+        ]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = np.where(noise > 0, (forecast_quantity - baseline) / noise, 0.0)
+    restock = forecast[(forecast_quantity >= baseline * (1 + RESTOCK_GROWTH_THRESHOLD))
+                       & (z >= RESTOCK_MIN_Z)
+                       & (forecast_quantity >= RESTOCK_MIN_QUANTITY)]
+
+    return {
+        "method": f"weekday-seasonal level forecast over the last {SEASONALITY_WEEKS} weeks",
+        "history_days": int(len(dates)),
+        "horizon_days": HORIZON_DAYS,
+        "forecast_start": (dates[-1] + pd.Timedelta(days=1)).strftime('%Y-%m-%d'),
+        "next_week_total_quantity": round(float(forecast['forecast_quantity'].sum()), 1),
+        "top_products_next_week": to_rows(forecast.nlargest(MAX_LISTED, 'forecast_quantity')),
+        "restock_alerts": to_rows(restock.nlargest(MAX_LISTED, 'forecast_quantity')),
+        "anomalous_days": detect_anomalous_days(dates, revenue),
+        "product_anomalies": detect_product_anomalies(dates, products, quantity, seasonality),
+    }
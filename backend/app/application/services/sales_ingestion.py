@@ -0,0 +1,195 @@
+# File: backend/app/application/services/sales_ingestion.py
+# Description: Streaming, chunked ingestion of sales data for the Operational Agent.
+# The upload (CSV, Parquet or Arrow IPC) is parsed straight from its spooled file
+# in fixed-size chunks and statistics are accumulated incrementally, so peak
+# memory is bounded by the chunk size instead of the file size.
+
+import os
+from typing import BinaryIO, Iterator
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.application.services import sales_analytics, sales_forecasting
+
+REQUIRED_COLUMNS = ['product_name', 'quantity', 'price']
+
+# Explicit dtypes avoid pandas' type inference pass and keep product names as
+# compact categoricals. Quantities are parsed as floats so missing values are allowed.
+SALES_CSV_DTYPES = {
+    'product_name': 'category',
+    'quantity': 'float64',
+    'price': 'float64',
+}
+
+# Optional columns are read as plain strings; dates are parsed per chunk.
+OPTIONAL_COLUMNS = sales_analytics.DATE_COLUMN_CANDIDATES + sales_analytics.ORDER_COLUMN_CANDIDATES
+
+CSV_CHUNK_ROWS = int(os.getenv("OPERATIONAL_CSV_CHUNK_ROWS", "250000"))
+
+# Accepted upload formats, recognised by content type or, for generic content
+# types such as application/octet-stream, by file extension.
+UPLOAD_FORMATS = {
+    'csv': ({'text/csv', 'application/csv'}, ('.csv',)),
+    'parquet': ({'application/vnd.apache.parquet', 'application/x-parquet'}, ('.parquet', '.pq')),
+    'arrow': ({'application/vnd.apache.arrow.file', 'application/vnd.apache.arrow.stream'},
+              ('.arrow', '.feather', '.ipc')),
+}
+
+
+class SalesAggregator:
+    """
+    Accumulates mergeable per-product, per-day and per-order aggregates chunk
+    by chunk. Memory grows with the number of distinct products, days and
+    orders, never with the number of rows.
+    """
+
+    def __init__(self):
+        self.products: pd.DataFrame | None = None
+        self.daily_product: pd.DataFrame | None = None
+        self.orders: pd.DataFrame | None = None
+
+    def update(self, chunk: pd.DataFrame):
+        """Folds one chunk of sales rows into the running aggregates."""
+        if chunk.empty:
+            return
+        chunk = sales_analytics.with_revenue(chunk)
+        self.products = sales_analytics.merge_aggregates(
+            self.products, sales_analytics.product_aggregates(chunk))
+
+        date_column = sales_analytics.find_column(chunk.columns, sales_analytics.DATE_COLUMN_CANDIDATES)
+        if date_column:
+            self.daily_product = sales_analytics.merge_aggregates(
+                self.daily_product, sales_analytics.daily_product_aggregates(chunk, date_column))
+
+        order_column = sales_analytics.find_column(chunk.columns, sales_analytics.ORDER_COLUMN_CANDIDATES)
+        if order_column:
+            self.orders = sales_analytics.merge_aggregates(
+                self.orders, sales_analytics.order_aggregates(chunk, order_column))
+
+    def merge(self, other: "SalesAggregator") -> "SalesAggregator":
+        """Adds another aggregator's totals into this one."""
+        self.products = sales_analytics.merge_aggregates(self.products, other.products)
+        self.daily_product = sales_analytics.merge_aggregates(self.daily_product, other.daily_product)
+        self.orders = sales_analytics.merge_aggregates(self.orders, other.orders)
+        return self
+
+    def statistics(self) -> dict:
+        """Returns the structured statistics dictionary sent to Gemini and the client."""
+        return sales_analytics.summarize_sales(self.products, self.daily_product, self.orders)
+
+    def forecast(self) -> dict | None:
+        """Returns next-week demand, restock alerts and anomalies, or None without dated history."""
+        return sales_forecasting.forecast_demand(self.daily_product)
+
+
+def detect_upload_format(content_type: str | None, filename: str | None) -> str | None:
+    """Returns 'csv', 'parquet' or 'arrow' for a supported upload, otherwise None."""
+    for upload_format, (content_types, _) in UPLOAD_FORMATS.items():
+        if content_type in content_types:
+            return upload_format
+    name = (filename or "").lower()
+    for upload_format, (_, extensions) in UPLOAD_FORMATS.items():
+        if name.endswith(extensions):
+            return upload_format
+    return None
+
+
+def normalize_sales_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    Checks the required columns and coerces a chunk from any format to the
+    dtypes the CSV reader produces. Raises ValueError on missing columns.
+    """
+    missing = [col for col in REQUIRED_COLUMNS if col not in chunk.columns]
+    if missing:
+        raise ValueError(f"Upload must contain columns: {REQUIRED_COLUMNS}")
+    chunk = chunk[[col for col in chunk.columns if col in SALES_CSV_DTYPES or col in OPTIONAL_COLUMNS]]
+    conversions = {}
+    if not isinstance(chunk['product_name'].dtype, pd.CategoricalDtype):
+        conversions['product_name'] = chunk['product_name'].astype(str).astype('category')
+    for col in ('quantity', 'price'):
+        if chunk[col].dtype != 'float64':
+            conversions[col] = pd.to_numeric(chunk[col]).astype('float64')
+    for col in sales_analytics.ORDER_COLUMN_CANDIDATES:
+        if col in chunk.columns and chunk[col].dtype != object:
+            conversions[col] = chunk[col].astype(str)
+    return chunk.assign(**conversions) if conversions else chunk
+
+
+def read_sales_csv_chunks(fileobj: BinaryIO, chunk_rows: int = CSV_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Yields the required (and any recognised optional) columns of a sales CSV in chunks of `chunk_rows` rows.
+    Raises ValueError if a required column is missing or a value cannot be parsed.
+    """
+    reader = pd.read_csv(
+        fileobj,
+        usecols=lambda column: column in SALES_CSV_DTYPES or column in OPTIONAL_COLUMNS,
+        dtype={**SALES_CSV_DTYPES, **{column: 'str' for column in OPTIONAL_COLUMNS}},
+        encoding='utf-8',
+        chunksize=chunk_rows,
+    )
+    with reader:
+        for chunk in reader:
+            missing = [col for col in REQUIRED_COLUMNS if col not in chunk.columns]
+            if missing:
+                raise ValueError(f"CSV must contain columns: {REQUIRED_COLUMNS}")
+            yield chunk
+
+
+def _wanted_columns(schema: pa.Schema) -> list[str]:
+    return [name for name in schema.names if name in SALES_CSV_DTYPES or name in OPTIONAL_COLUMNS]
+
+
+def read_sales_parquet_chunks(fileobj: BinaryIO, chunk_rows: int = CSV_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Yields a Parquet upload in record batches of at most `chunk_rows` rows."""
+    parquet_file = pq.ParquetFile(fileobj)
+    columns = _wanted_columns(parquet_file.schema_arrow)
+    for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=columns):
+        yield normalize_sales_chunk(batch.to_pandas())
+
+
+def read_sales_arrow_chunks(fileobj: BinaryIO, chunk_rows: int = CSV_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Yields an Arrow IPC upload (file or stream format) in slices of at most `chunk_rows` rows."""
+    try:
+        reader = pa.ipc.open_file(fileobj)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    except pa.ArrowInvalid:
+        fileobj.seek(0)
+        reader = pa.ipc.open_stream(fileobj)
+        batches = iter(reader)
+    columns = _wanted_columns(reader.schema)
+    for batch in batches:
+        batch = batch.select(columns)
+        for offset in range(0, batch.num_rows, chunk_rows):
+            yield normalize_sales_chunk(batch.slice(offset, chunk_rows).to_pandas())
+
+
+def read_sales_chunks(fileobj: BinaryIO, upload_format: str = 'csv',
+                      chunk_rows: int = CSV_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Yields normalized sales chunks from an upload in any supported format."""
+    readers = {
+        'csv': read_sales_csv_chunks,
+        'parquet': read_sales_parquet_chunks,
+        'arrow': read_sales_arrow_chunks,
+    }
+    return readers[upload_format](fileobj, chunk_rows)
+
+
+def analyze_sales_upload(fileobj: BinaryIO, upload_format: str = 'csv', chunk_rows: int = CSV_CHUNK_ROWS,
+                         with_forecast: bool = False) -> dict | tuple[dict, dict | None]:
+    """
+    Parses a sales upload from a (spooled) binary file and returns its statistics,
+    or (statistics, forecast) if `with_forecast` is set.
+    """
+    aggregator = SalesAggregator()
+    for chunk in read_sales_chunks(fileobj, upload_format, chunk_rows):
+        aggregator.update(chunk)
+    if with_forecast:
+        return aggregator.statistics(), aggregator.forecast()
+    return aggregator.statistics()
+
+
+def analyze_sales_csv(fileobj: BinaryIO, chunk_rows: int = CSV_CHUNK_ROWS) -> dict:
+    """Parses a sales CSV from a (spooled) binary file and returns its statistics."""
+    return analyze_sales_upload(fileobj, 'csv', chunk_rows)
@@ -0,0 +1,233 @@
+# File: backend/app/application/services/scan_scheduler.py
+# Description: Optional in-process scheduler for the Proactive Agent's opportunity scans.
+# Each feed is scanned on its own interval, with jitter so workers and restarts do
+# not all hit the feeds at once. Every scan, scheduled or triggered over HTTP, goes
+# through a singleflight: concurrent triggers for the same feeds share one in-flight
+# scan, and different scans run one after another.
+# A file lock elects one leader process, so only one uvicorn worker runs the schedule.
+# A second file lock is held around every scan, scheduled or manual, so scans on
+# different workers also run one after another; each scan reloads the seen-item
+# and feed-state stores first, so items are never notified twice.
+
+import asyncio
+import os
+import random
+import tempfile
+import time
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable
+
+from app.application.services.news_feed_service import FeedConfig, load_feed_registry
+from app.core.singleflight import SingleFlight
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+PROACTIVE_SCHEDULER_ENABLED = os.getenv("PROACTIVE_SCHEDULER_ENABLED", "false").lower() in ("1", "true", "yes")
+# Fraction of a feed's interval by which each run is randomly moved earlier or later.
+SCAN_JITTER = float(os.getenv("NEWS_SCAN_JITTER", "0.1"))
+PROACTIVE_SCHEDULER_LOCK_FILE = (os.getenv("PROACTIVE_SCHEDULER_LOCK_FILE")
+                                 or os.path.join(tempfile.gettempdir(), "umkm-go-proactive-scheduler.lock"))
+PROACTIVE_SCAN_LOCK_FILE = (os.getenv("PROACTIVE_SCAN_LOCK_FILE")
+                            or os.path.join(tempfile.gettempdir(), "umkm-go-proactive-scan.lock"))
+# How often a non-leader worker retries the leader lock, and the longest the
+# leader sleeps before reloading the feed registry.
+SCHEDULER_POLL_SECONDS = 60.0
+# How often a scan waiting for another worker's scan retries the scan lock.
+SCAN_LOCK_POLL_SECONDS = 0.5
+
+
+class FileLock:
+    """Non-blocking exclusive flock on a file; held by at most one process at a time."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._warned = False
+
+    @property
+    def held(self) -> bool:
+        return self._file is not None
+
+    def acquire(self) -> bool:
+        if self._file is not None:
+            return True
+        if fcntl is None:
+            if not self._warned:
+                print("[!] SCHEDULER: File locks are not supported here; assuming a single worker.")
+                self._warned = True
+            self._file = True
+            return True
+        try:
+            lock_file = open(self.path, 'a+')
+        except OSError as e:
+            if not self._warned:
+                print(f"[!] SCHEDULER: Cannot open lock file '{self.path}': {e}")
+                self._warned = True
+            return False
+        self._warned = False
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        lock_file.truncate(0)
+        lock_file.write(str(os.getpid()))
+        lock_file.flush()
+        self._file = lock_file
+        return True
+
+    def release(self):
+        if self._file not in (None, True):
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+        self._file = None
+
+
+@dataclass
+class ScanRun:
+    trigger: str  # 'schedule' or 'manual'
+    feeds: list[str]
+    started_at: str
+    duration_ms: float = 0.0
+    items: int = 0
+    items_per_second: float = 0.0
+    shared_callers: int = 0  # triggers that joined this scan instead of starting another
+    error: str | None = None
+
+
+class ScanScheduler:
+    """
+    Runs `scan(feeds)` on a per-feed schedule and for manual triggers, deduplicated
+    with a singleflight. `count_items(result)` gives the items a scan processed,
+    for the items/sec figure.
+    """
+
+    def __init__(self, scan: Callable[[list[FeedConfig]], Awaitable[Any]],
+                 count_items: Callable[[Any], int] = lambda result: 0,
+                 load_feeds: Callable[[], list[FeedConfig]] = load_feed_registry,
+                 lock_path: str = PROACTIVE_SCHEDULER_LOCK_FILE, scan_lock_path: str = PROACTIVE_SCAN_LOCK_FILE,
+                 jitter: float = SCAN_JITTER):
+        self.scan = scan
+        self.count_items = count_items
+        self.load_feeds = load_feeds
+        self.jitter = jitter
+        self.leader_lock = FileLock(lock_path)
+        self.scan_lock = FileLock(scan_lock_path)
+        self._flight = SingleFlight()
+        self._scan_lock = asyncio.Lock()
+        self._next_due: dict[str, float] = {}
+        self._pending: dict[tuple, ScanRun] = {}
+        self._task: asyncio.Task | None = None
+        self._current: ScanRun | None = None
+        self.last_run: ScanRun | None = None
+        self.runs = 0
+
+    async def run(self, feeds: list[FeedConfig] | None = None, trigger: str = 'manual') -> tuple[Any, bool]:
+        """Scans `feeds` (default: the whole registry). Returns (result, shared with an in-flight scan)."""
+        feeds = feeds if feeds is not None else self.load_feeds()
+        key = tuple(sorted(feed.name for feed in feeds))
+        if self._flight.in_flight(key):
+            self._pending[key].shared_callers += 1
+            print(f"[*] SCHEDULER: {trigger} scan joins the scan already in flight.")
+            run = None
+        else:
+            run = self._pending[key] = ScanRun(trigger=trigger, feeds=list(key), started_at="")
+        return await self._flight.do(key, lambda: self._run_exclusive(key, run, feeds))
+
+    async def _run_exclusive(self, key: tuple, run: ScanRun, feeds: list[FeedConfig]) -> Any:
+        try:
+            async with self._scan_lock:
+                # Scans on other workers share the seen-item store, so they take turns too.
+                while not self.scan_lock.acquire():
+                    await asyncio.sleep(SCAN_LOCK_POLL_SECONDS)
+                run.started_at = datetime.now(timezone.utc).isoformat()
+                self._current = run
+                start = time.perf_counter()
+                try:
+                    result = await self.scan(feeds)
+                    run.items = self.count_items(result)
+                    return result
+                except Exception as e:
+                    run.error = str(getattr(e, 'detail', e))
+                    raise
+                finally:
+                    self.scan_lock.release()
+                    elapsed = time.perf_counter() - start
+                    run.duration_ms = round(elapsed * 1000, 1)
+                    run.items_per_second = round(run.items / elapsed, 1) if elapsed > 0 else 0.0
+                    self._current = None
+                    self.last_run = run
+                    self.runs += 1
+                    print(f"[*] SCHEDULER: {run.trigger} scan of {len(feeds)} feeds took {run.duration_ms:.0f} ms, "
+                          f"{run.items} items ({run.items_per_second:.1f} items/s).")
+        finally:
+            # A cancelled scan may finish after a new one for the same feeds has started.
+            if self._pending.get(key) is run:
+                del self._pending[key]
+
+    def _jittered(self, interval: float) -> float:
+        return interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    async def _loop(self):
+        while True:
+            if not self.leader_lock.acquire():
+                await asyncio.sleep(SCHEDULER_POLL_SECONDS)
+                continue
+            feeds = self.load_feeds()
+            now = time.monotonic()
+            # New feeds get a random first run within their jitter window, so
+            # restarts do not scan every feed in the same second.
+            for feed in feeds:
+                self._next_due.setdefault(feed.name, now + random.uniform(0, self.jitter * feed.interval))
+            due = [feed for feed in feeds if self._next_due[feed.name] <= now]
+            if due:
+                try:
+                    await self.run(due, trigger='schedule')
+                except Exception as e:
+                    print(f"[!] SCHEDULER: Scheduled scan failed: {e}")
+                now = time.monotonic()
+                for feed in due:
+                    self._next_due[feed.name] = now + self._jittered(feed.interval)
+            names = {feed.name for feed in feeds}
+            next_due = min((t for name, t in self._next_due.items() if name in names), default=now)
+            await asyncio.sleep(min(max(next_due - time.monotonic(), 1.0), SCHEDULER_POLL_SECONDS))
+
+    def start(self):
+        """Starts the schedule if PROACTIVE_SCHEDULER_ENABLED; call from the app lifespan."""
+        if not PROACTIVE_SCHEDULER_ENABLED or self._task is not None:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._loop())
+        print(f"[+] SCHEDULER: Started (leader lock: {self.leader_lock.path}).")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self.leader_lock.release()
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        feeds = self.load_feeds()
+        return {
+            "enabled": PROACTIVE_SCHEDULER_ENABLED,
+            "running": self._task is not None,
+            "leader": self.leader_lock.held,
+            "scan_in_flight": self._current is not None,
+            "runs": self.runs,
+            "last_run": asdict(self.last_run) if self.last_run else None,
+            "feeds": [
+                {"name": feed.name, "interval_seconds": feed.interval,
+                 "next_run_in_seconds": round(max(self._next_due[feed.name] - now, 0.0), 1)
+                 if feed.name in self._next_due else None}
+                for feed in feeds
+            ],
+        }
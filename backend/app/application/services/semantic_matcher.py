@@ -0,0 +1,117 @@
+# File: backend/app/application/services/semantic_matcher.py
+# Description: Semantic opportunity matching for the Proactive Agent.
+# New feed items are embedded in one batch, and all items are scored against all
+# merchant profiles with matrix products over chunks of the profile matrix, so
+# memory stays bounded (chunk x items scores at a time) for 100k+ merchants.
+# Each merchant keeps its top-k items above a similarity threshold.
+
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.infrastructure.storage.profile_vector_store import ProfileVectorStore, profile_vector_store
+
+SEMANTIC_MATCH_THRESHOLD = float(os.getenv("SEMANTIC_MATCH_THRESHOLD", "0.55"))
+SEMANTIC_TOP_K = int(os.getenv("SEMANTIC_TOP_K", "3"))
+# Profiles scored per matrix product; 4096 x 500 items is 8 MB of float32 scores.
+PROFILE_CHUNK_ROWS = int(os.getenv("PROFILE_CHUNK_ROWS", "4096"))
+EMBEDDING_BATCH_SIZE = 64
+
+
+@dataclass
+class SemanticMatches:
+    """Sparse (merchant, item, score) triples, one row per match."""
+    merchant_ids: list[str]
+    merchant_rows: np.ndarray
+    item_indices: np.ndarray
+    scores: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def by_item(self, max_listed: int) -> dict[int, tuple[int, list[tuple[str, float]]]]:
+        """Item index -> (number of merchants matched, best `max_listed` (merchant id, score) pairs)."""
+        result: dict[int, tuple[int, list[tuple[str, float]]]] = {}
+        order = np.lexsort((-self.scores, self.item_indices))
+        item_indices = self.item_indices[order]
+        boundaries = np.flatnonzero(np.diff(item_indices)) + 1
+        for group in np.split(order, boundaries) if len(order) else []:
+            top = group[:max_listed]
+            result[int(self.item_indices[group[0]])] = (
+                len(group),
+                [(self.merchant_ids[self.merchant_rows[i]], float(self.scores[i])) for i in top])
+        return result
+
+    def by_merchant(self) -> dict[str, list[tuple[int, float]]]:
+        """Merchant id -> (item index, score) pairs, best first."""
+        result: dict[str, list[tuple[int, float]]] = {}
+        for i in np.lexsort((-self.scores, self.merchant_rows)):
+            result.setdefault(self.merchant_ids[self.merchant_rows[i]], []).append(
+                (int(self.item_indices[i]), float(self.scores[i])))
+        return result
+
+
+def item_text(title: str, description: str) -> str:
+    return f"{title}. {description}".strip()
+
+
+def embed_texts(texts: list[str]) -> np.ndarray:
+    """Embeds texts in batches with the shared MiniLM model, as L2-normalized float32 rows."""
+    from app.core.models import embedding_model
+    return embedding_model.encode(texts, batch_size=EMBEDDING_BATCH_SIZE,
+                                  normalize_embeddings=True, convert_to_numpy=True).astype(np.float32)
+
+
+def score_profiles(item_vectors: np.ndarray, profile_vectors: np.ndarray, profile_scales: np.ndarray,
+                   top_k: int = SEMANTIC_TOP_K, threshold: float = SEMANTIC_MATCH_THRESHOLD,
+                   chunk_rows: int = PROFILE_CHUNK_ROWS) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Cosine similarity of every profile with every item, computed chunk by chunk.
+    Returns (profile rows, item indices, scores) of each profile's top-k items
+    scoring at least `threshold`.
+    """
+    n_items = len(item_vectors)
+    if n_items == 0 or len(profile_vectors) == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0, dtype=np.float32)
+    items_t = np.ascontiguousarray(item_vectors.T, dtype=np.float32)  # (dims x items)
+    rows_out, items_out, scores_out = [], [], []
+    for start in range(0, len(profile_vectors), chunk_rows):
+        chunk = profile_vectors[start:start + chunk_rows].astype(np.float32)
+        scores = chunk @ items_t
+        # The per-row int8 scale is applied to the (smaller) score matrix instead of the vectors.
+        scores *= profile_scales[start:start + chunk_rows, None]
+        above = scores >= threshold
+        crowded = above.sum(axis=1) > top_k
+        # Rows with at most top_k items above the threshold keep all of them;
+        # only the remaining rows need a partial sort.
+        keep_rows, keep_items = np.nonzero(above & ~crowded[:, None])
+        rows_out.append(keep_rows + start)
+        items_out.append(keep_items)
+        scores_out.append(scores[keep_rows, keep_items])
+        if crowded.any():
+            crowded_rows = np.flatnonzero(crowded)
+            best = np.argpartition(scores[crowded_rows], n_items - top_k, axis=1)[:, -top_k:]
+            rows_out.append(np.repeat(crowded_rows + start, top_k))
+            items_out.append(best.ravel())
+            scores_out.append(np.take_along_axis(scores[crowded_rows], best, axis=1).ravel())
+    return np.concatenate(rows_out), np.concatenate(items_out), np.concatenate(scores_out)
+
+
+def match_items_to_profiles(item_vectors: np.ndarray, store: ProfileVectorStore = profile_vector_store,
+                            top_k: int = SEMANTIC_TOP_K, threshold: float = SEMANTIC_MATCH_THRESHOLD,
+                            chunk_rows: int = PROFILE_CHUNK_ROWS) -> SemanticMatches:
+    """Scores embedded items against every stored merchant profile."""
+    merchant_ids, vectors, scales = store.snapshot()
+    rows, items, scores = score_profiles(item_vectors, vectors, scales, top_k, threshold, chunk_rows)
+    return SemanticMatches(merchant_ids, rows, items, scores)
+
+
+def match_texts_to_profiles(texts: list[str], store: ProfileVectorStore = profile_vector_store,
+                            top_k: int = SEMANTIC_TOP_K,
+                            threshold: float = SEMANTIC_MATCH_THRESHOLD) -> SemanticMatches | None:
+    """Embeds item texts and matches them to profiles; None if there is nothing to match."""
+    if not texts or len(store) == 0:
+        return None
+    return match_items_to_profiles(embed_texts(texts), store, top_k, threshold)
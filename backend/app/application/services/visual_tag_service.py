@@ -0,0 +1,86 @@
+# File: backend/app/application/services/visual_tag_service.py
+# Description: Infers visual KB tags for an image locally, by vector similarity
+# between its multimodal embedding and the precomputed tag text embeddings.
+
+import os
+import threading
+import time
+
+import numpy as np
+
+from app.infrastructure.database.elasticsearch_connector import es_client
+
+# Populated by data_processing/embeddings/embed_and_index_visual_tags.py
+VISUAL_TAGS_INDEX = "umkm_visual_tags"
+MAX_TAGS_TO_LOAD = 10000
+# After a failed or empty load, callers fall back at once for this long instead
+# of each running another match_all search.
+VISUAL_TAGS_RETRY_SECONDS = float(os.getenv("VISUAL_TAGS_RETRY_SECONDS", "60"))
+
+
+class TagVocabulary:
+    """Tag vocabulary of the visual KB with L2-normalized text embeddings."""
+
+    def __init__(self, tags: list[str], embeddings: np.ndarray):
+        self.tags = tags
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        self.matrix = (embeddings / np.maximum(norms, 1e-12)).astype(np.float32)
+
+    def infer_tags(self, image_embedding: list[float], top_k: int = 5) -> list[str]:
+        """Returns the `top_k` tags whose text embedding is closest to the image embedding."""
+        query = np.asarray(image_embedding, dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+        scores = self.matrix @ query
+        top_k = min(top_k, len(self.tags))
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best])]
+        return [self.tags[i] for i in best]
+
+
+_vocabulary: TagVocabulary | None = None
+_vocabulary_lock = threading.Lock()
+_retry_at = 0.0  # monotonic time before which a failed load is not retried
+
+
+def load_tag_vocabulary() -> TagVocabulary | None:
+    """
+    Loads the tag embeddings from Elasticsearch once and caches them in memory.
+    Returns None if they are not available; the load is retried at most every
+    VISUAL_TAGS_RETRY_SECONDS.
+    """
+    global _vocabulary, _retry_at
+    if _vocabulary is not None or time.monotonic() < _retry_at:
+        return _vocabulary
+    with _vocabulary_lock:
+        if _vocabulary is not None or time.monotonic() < _retry_at:
+            return _vocabulary
+        if not es_client:
+            return None
+        # Set before the search, so a failure anywhere below holds off the retries.
+        _retry_at = time.monotonic() + VISUAL_TAGS_RETRY_SECONDS
+        try:
+            print(f"[*] VISUAL TAGS: Loading tag embeddings from '{VISUAL_TAGS_INDEX}'...")
+            response = es_client.search(index=VISUAL_TAGS_INDEX, size=MAX_TAGS_TO_LOAD,
+                                        query={"match_all": {}}, _source=["tag", "embedding"])
+            hits = response['hits']['hits']
+            if not hits:
+                print("[!] VISUAL TAGS: Tag index is empty.")
+                return None
+            tags = [hit['_source']['tag'] for hit in hits]
+            embeddings = np.array([hit['_source']['embedding'] for hit in hits], dtype=np.float32)
+            _vocabulary = TagVocabulary(tags, embeddings)
+            print(f"[+] VISUAL TAGS: Loaded {len(tags)} tag embeddings.")
+        except Exception as e:
+            print(f"[!] VISUAL TAGS: Failed to load tag embeddings: {e}")
+            return None
+    return _vocabulary
+
+
+def infer_tags_from_embedding(image_embedding: list[float] | None, top_k: int = 5) -> list[str]:
+    """Returns up to `top_k` inferred tags, or an empty list if inference is not possible."""
+    if not image_embedding:
+        return []
+    vocabulary = load_tag_vocabulary()
+    if vocabulary is None:
+        return []
+    return vocabulary.infer_tags(image_embedding, top_k=top_k)
@@ -0,0 +1,213 @@
+# File: backend/app/core/admission.py
+# Description: Admission control for the expensive endpoints.
+# Each pool (brand kit generation, sales analysis, batch queries) admits at most
+# `max_concurrent` requests at a time. Further requests wait in a bounded FIFO
+# queue for up to `queue_timeout` seconds. When the queue is full, or the wait
+# runs out, the request is shed at once with 503 and a Retry-After estimated
+# from the queue length and recent service times. A request keeps its slot until
+# its response (streamed or not) has been sent.
+# Routes outside the pools, e.g. the health check and single legal/marketing
+# queries, are never queued. Limits apply per worker process.
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+
+from fastapi.responses import JSONResponse
+
+from app.core import deadlines
+from app.core.metrics import register_collector, stage
+
+ADMISSION_CONTROL_ENABLED = os.getenv("ADMISSION_CONTROL_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Pool name -> (route prefixes, default "max_concurrent:max_queue:queue_timeout_seconds").
+# A pool's limits can be overridden with ADMISSION_<NAME>, e.g. ADMISSION_BRAND="2:8:20".
+ADMISSION_POOLS = {
+    "brand": (("/api/v1/agent/brand/generate_kit",), "2:8:20"),
+    "operational": (("/api/v1/agent/operational/analyze",), "4:16:10"),
+    "batch": (("/api/v1/agent/legal/batch_query", "/api/v1/agent/marketing/batch_query"), "2:4:10"),
+}
+
+# Retry-After is clamped to this range (seconds).
+MIN_RETRY_AFTER, MAX_RETRY_AFTER = 1, 120
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of admitted."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionPool:
+    """
+    Concurrency limit with a bounded wait queue. A released slot is handed
+    directly to the oldest waiter, so queued requests are admitted in order.
+    Used from a single event loop; not thread-safe.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._service_seconds: float | None = None  # moving average of the time a slot is held
+        self.admitted = 0
+        self.shed = {"queue_full": 0, "queue_timeout": 0}
+
+    @classmethod
+    def parse(cls, name: str, spec: str) -> "AdmissionPool":
+        """Pool from "max_concurrent:max_queue:queue_timeout_seconds"."""
+        max_concurrent, max_queue, queue_timeout = spec.split(":")
+        return cls(name, max(int(max_concurrent), 1), max(int(max_queue), 0), float(queue_timeout))
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free for a new request: the queue ahead of it drained at the recent rate."""
+        service = self._service_seconds if self._service_seconds is not None else self.queue_timeout
+        estimate = (self.queue_depth + 1) * service / self.max_concurrent
+        return min(max(math.ceil(estimate), MIN_RETRY_AFTER), MAX_RETRY_AFTER)
+
+    def _reject(self, reason: str):
+        self.shed[reason] += 1
+        print(f"[!] ADMISSION: {self.name} shed a request ({reason}, "
+              f"{self.in_flight} in flight, {self.queue_depth} queued).")
+        raise AdmissionRejected(reason, self.retry_after())
+
+    async def acquire(self):
+        """Takes a slot, waiting in the queue if needed. Raises AdmissionRejected if shed."""
+        if self.in_flight < self.max_concurrent and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+        if self.queue_depth >= self.max_queue:
+            self._reject("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # Never wait past the request's deadline.
+            await asyncio.wait((waiter,), timeout=deadlines.timeout(self.queue_timeout))
+        except BaseException:
+            # Cancelled while queued (e.g. the client went away): give back a slot handed over meanwhile.
+            if waiter.done():
+                self.release()
+            else:
+                self._waiters.remove(waiter)
+            raise
+        if not waiter.done():
+            self._waiters.remove(waiter)
+            self._reject("queue_timeout")
+        self.admitted += 1
+
+    def release(self, held_seconds: float | None = None):
+        """Frees a slot, handing it to the oldest waiter if there is one."""
+        if held_seconds is not None:
+            self._service_seconds = (held_seconds if self._service_seconds is None
+                                     else 0.8 * self._service_seconds + 0.2 * held_seconds)
+        if self._waiters:
+            self._waiters.popleft().set_result(None)  # the slot stays taken by the waiter
+        else:
+            self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "queue_timeout_seconds": self.queue_timeout,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "admitted": self.admitted,
+            "shed": dict(self.shed),
+            "recent_service_seconds": round(self._service_seconds, 3) if self._service_seconds is not None else None,
+        }
+
+
+def load_pools() -> list[tuple[tuple[str, ...], AdmissionPool]]:
+    """Configured pools with their route prefixes; a pool set to "off" is left out."""
+    pools = []
+    for name, (prefixes, default) in ADMISSION_POOLS.items():
+        spec = os.getenv(f"ADMISSION_{name.upper()}", default)
+        if spec.lower() in ("", "off", "none"):
+            continue
+        try:
+            pools.append((prefixes, AdmissionPool.parse(name, spec)))
+        except ValueError:
+            print(f"[!] ADMISSION: Invalid ADMISSION_{name.upper()}='{spec}', using '{default}'.")
+            pools.append((prefixes, AdmissionPool.parse(name, default)))
+    return pools
+
+
+admission_pools = load_pools()
+
+
+def admission_stats() -> dict[str, dict]:
+    return {pool.name: pool.stats() for _, pool in admission_pools}
+
+
+def _expose_admission() -> list[str]:
+    lines = [
+        "# HELP umkm_admission_in_flight Requests holding an admission slot.",
+        "# TYPE umkm_admission_in_flight gauge",
+        *(f'umkm_admission_in_flight{{pool="{p.name}"}} {p.in_flight}' for _, p in admission_pools),
+        "# HELP umkm_admission_queue_depth Requests waiting for an admission slot.",
+        "# TYPE umkm_admission_queue_depth gauge",
+        *(f'umkm_admission_queue_depth{{pool="{p.name}"}} {p.queue_depth}' for _, p in admission_pools),
+        "# HELP umkm_admission_admitted_total Requests admitted.",
+        "# TYPE umkm_admission_admitted_total counter",
+        *(f'umkm_admission_admitted_total{{pool="{p.name}"}} {p.admitted}' for _, p in admission_pools),
+        "# HELP umkm_admission_shed_total Requests rejected with 503.",
+        "# TYPE umkm_admission_shed_total counter",
+    ]
+    for _, pool in admission_pools:
+        lines.extend(f'umkm_admission_shed_total{{pool="{pool.name}",reason="{reason}"}} {count}'
+                     for reason, count in pool.shed.items())
+    return lines
+
+
+if ADMISSION_CONTROL_ENABLED:
+    register_collector(_expose_admission)
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying the admission pool of the request's route, if any."""
+
+    def __init__(self, app):
+        self.app = app
+
+    def _pool_for(self, path: str) -> AdmissionPool | None:
+        for prefixes, pool in admission_pools:
+            if path.startswith(prefixes):
+                return pool
+        return None
+
+    async def __call__(self, scope, receive, send):
+        pool = self._pool_for(scope["path"]) if scope["type"] == "http" else None
+        if pool is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            with stage("queue", pool.name):
+                await pool.acquire()
+        except AdmissionRejected as e:
+            detail = (f"The server is busy ({pool.name} requests at capacity, {e.reason.replace('_', ' ')}). "
+                      f"Please retry in {e.retry_after} seconds.")
+            response = JSONResponse({"detail": detail}, status_code=503, headers={"Retry-After": str(e.retry_after)})
+            await response(scope, receive, send)
+            return
+
+        start = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            pool.release(time.monotonic() - start)
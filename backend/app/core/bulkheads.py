@@ -0,0 +1,140 @@
+# File: backend/app/core/bulkheads.py
+# Description: Separately sized thread pools ("bulkheads") per class of blocking work.
+# Starlette's run_in_threadpool shares one pool (40 threads) across the app, so
+# a burst of slow Imagen calls could occupy every thread and stall the embedding
+# and Gemini calls of legal queries. Each workload class gets its own executor:
+#   embedding - local sentence-transformers encodes (CPU-bound, few threads)
+#   llm       - Gemini calls of the legal, marketing, orchestrator and operational agents
+#   image     - the brand agent: Vertex image embeddings, Gemini vision, Imagen, GCS, ES
+#   data      - pandas parsing and analysis, semantic matching
+# `await run_in("llm", fn, *args)` replaces run_in_threadpool; context variables
+# (trace spans, Server-Timing) carry over into the worker thread. Other small
+# blocking calls (file stores, FCM) stay on the default pool.
+# With BULKHEADS_ENABLED=false every call goes to the default pool, as before.
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Iterator
+
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+
+from app.core.metrics import STAGE_BUCKETS, Histogram, register_collector
+
+BULKHEADS_ENABLED = os.getenv("BULKHEADS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Default thread count per workload class, overridable with BULKHEAD_<NAME>_THREADS.
+BULKHEAD_THREADS = {"embedding": 2, "llm": 32, "image": 16, "data": 4}
+
+bulkhead_wait = Histogram("umkm_bulkhead_wait_seconds", "Time blocking calls waited for a bulkhead thread.",
+                          ("workload",), STAGE_BUCKETS)
+
+
+class Bulkhead:
+    """A named thread pool that counts queued, running and completed calls."""
+
+    def __init__(self, name: str, threads: int):
+        self.name = name
+        self.threads = threads
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix=f"bulkhead-{name}")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.peak_queued = 0
+
+    async def run(self, fn, *args, **kwargs):
+        """Runs fn(*args, **kwargs) on this bulkhead's threads in the caller's context."""
+        context = contextvars.copy_context()
+        submitted = time.perf_counter()
+
+        def call():
+            bulkhead_wait.observe((self.name,), time.perf_counter() - submitted)
+            with self._lock:
+                self.queued -= 1
+                self.active += 1
+            try:
+                return context.run(fn, *args, **kwargs)
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    self.completed += 1
+
+        with self._lock:
+            self.queued += 1
+            self.peak_queued = max(self.peak_queued, self.queued)
+        future = self._executor.submit(call)
+        future.add_done_callback(self._count_cancelled)
+        return await asyncio.wrap_future(future)
+
+    def _count_cancelled(self, future):
+        # A call cancelled while still queued (its caller was cancelled) never runs.
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"threads": self.threads, "active": self.active, "queued": self.queued,
+                    "peak_queued": self.peak_queued, "completed": self.completed,
+                    "saturation": round(self.active / self.threads, 3)}
+
+
+def _threads(name: str, default: int) -> int:
+    value = os.getenv(f"BULKHEAD_{name.upper()}_THREADS", "")
+    return max(int(value), 1) if value.isdigit() else default
+
+
+bulkheads = {name: Bulkhead(name, _threads(name, default)) for name, default in BULKHEAD_THREADS.items()} \
+    if BULKHEADS_ENABLED else {}
+
+
+async def run_in(workload: str, fn, *args, **kwargs):
+    """Runs a blocking call on the bulkhead of `workload` (or the default pool if bulkheads are disabled)."""
+    if not BULKHEADS_ENABLED:
+        return await run_in_threadpool(fn, *args, **kwargs)
+    return await bulkheads[workload].run(fn, *args, **kwargs)
+
+
+async def iterate_in(workload: str, iterator: Iterator) -> AsyncIterator:
+    """Iterates a blocking iterator (e.g. a streamed Gemini response) on the bulkhead of `workload`."""
+    if not BULKHEADS_ENABLED:
+        async for item in iterate_in_threadpool(iterator):
+            yield item
+        return
+    iterator = iter(iterator)
+    done = object()
+    while (item := await bulkheads[workload].run(next, iterator, done)) is not done:
+        yield item
+
+
+def bulkhead_stats() -> dict[str, dict]:
+    return {name: bulkhead.stats() for name, bulkhead in bulkheads.items()}
+
+
+def shutdown_bulkheads():
+    for bulkhead in bulkheads.values():
+        bulkhead.shutdown()
+
+
+def _expose_bulkheads() -> list[str]:
+    stats = bulkhead_stats()
+    lines = []
+    for metric, key, kind, description in (
+            ("umkm_bulkhead_threads", "threads", "gauge", "Threads of the bulkhead."),
+            ("umkm_bulkhead_active", "active", "gauge", "Blocking calls running on the bulkhead."),
+            ("umkm_bulkhead_queued", "queued", "gauge", "Blocking calls waiting for a bulkhead thread."),
+            ("umkm_bulkhead_completed_total", "completed", "counter", "Blocking calls completed.")):
+        lines += [f"# HELP {metric} {description}", f"# TYPE {metric} {kind}"]
+        lines += [f'{metric}{{workload="{name}"}} {values[key]}' for name, values in stats.items()]
+    return lines + bulkhead_wait.expose()
+
+
+if BULKHEADS_ENABLED:
+    register_collector(_expose_bulkheads)
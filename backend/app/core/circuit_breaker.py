@@ -0,0 +1,91 @@
+# File: backend/app/core/circuit_breaker.py
+# Description: Circuit breaker for calls to an external dependency.
+# After `failure_threshold` consecutive failures the circuit opens and calls fail
+# fast with CircuitOpenError. After `reset_timeout` seconds one trial call is let
+# through (half-open); its success closes the circuit, its failure re-opens it.
+# A call that ends without an answer either way (e.g. it was cancelled) records
+# nothing and only gives up the trial slot, via release_trial().
+
+import threading
+import time
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised instead of calling a dependency whose circuit is open."""
+
+
+class CircuitBreaker:
+    """Thread-safe consecutive-failure circuit breaker."""
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Raises CircuitOpenError unless a call may go through now. Returns True for the half-open trial call."""
+        with self._lock:
+            if self._state == CLOSED:
+                return False
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = HALF_OPEN
+            if self._state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            retry_in = max(self.reset_timeout - (time.monotonic() - self._opened_at), 0.0)
+            raise CircuitOpenError(f"{self.name} is unavailable (circuit open, retry in {retry_in:.0f}s).")
+
+    def record_success(self):
+        with self._lock:
+            if self._state != CLOSED:
+                print(f"[+] CIRCUIT: {self.name} recovered, circuit closed.")
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == HALF_OPEN or (self._state == CLOSED and self._failures >= self.failure_threshold):
+                self._trip(f"{self._failures} consecutive failures")
+
+    def release_trial(self):
+        """Ends the trial call without a verdict, so the next call becomes the trial."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def trip(self, reason: str = "tripped"):
+        """Opens the circuit (or restarts its reset timeout) at once, without waiting for failure_threshold."""
+        with self._lock:
+            self._trial_in_flight = False
+            self._trip(reason)
+
+    def _trip(self, reason: str):
+        was_open = self._state == OPEN
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        if was_open:
+            return
+        self.times_opened += 1
+        print(f"[!] CIRCUIT: {self.name} failing ({reason}), circuit opened for {self.reset_timeout:g}s.")
+
+    def stats(self) -> dict:
+        state = self.state
+        with self._lock:
+            return {"state": state, "consecutive_failures": self._failures, "times_opened": self.times_opened}
@@ -0,0 +1,196 @@
+# File: backend/app/core/deadlines.py
+# Description: Per-request time budgets.
+# Every request gets a deadline from the client's DEADLINE_HEADER (seconds,
+# capped at DEADLINE_MAX_SECONDS) or the default of its route. The budget flows
+# through a context variable (also into bulkhead threads), so each outbound call
+# can take what is left of it:
+#   - Elasticsearch calls get the remaining time as their request timeout,
+#   - Gemini, Imagen and other blocking calls are awaited with `within()`,
+#   - optional stages check `has_budget()` first and call `degrade()` when they
+#     are skipped or cut short, and the response lists the degraded stages (in an
+#     `x-degraded-stages` header and a `degraded_stages` field).
+# A mandatory stage that runs out of time raises DeadlineExceeded (504).
+# Blocking calls that time out keep running in their thread; only the wait ends.
+
+import asyncio
+import os
+import time
+from contextvars import ContextVar
+from typing import AsyncIterator
+
+from app.core import tracing
+
+DEADLINES_ENABLED = os.getenv("DEADLINES_ENABLED", "true").lower() in ("1", "true", "yes")
+DEADLINE_HEADER = os.getenv("DEADLINE_HEADER", "x-request-timeout").lower()
+DEADLINE_MAX_SECONDS = float(os.getenv("DEADLINE_MAX_SECONDS", "300"))
+DEGRADED_HEADER = "x-degraded-stages"
+# Time kept back for the final Gemini generation when deciding whether to run optional stages.
+GENERATION_RESERVE_SECONDS = float(os.getenv("DEADLINE_GENERATION_RESERVE_SECONDS", "5"))
+
+# Route prefix -> default budget in seconds; the first matching prefix wins.
+DEADLINE_DEFAULTS = (
+    ("/api/v1/agent/brand/generate_kit", float(os.getenv("DEADLINE_BRAND_SECONDS", "90"))),
+    ("/api/v1/agent/operational/analyze", float(os.getenv("DEADLINE_OPERATIONAL_SECONDS", "60"))),
+    ("/api/v1/agent/legal/batch_query", float(os.getenv("DEADLINE_BATCH_SECONDS", "120"))),
+    ("/api/v1/agent/marketing/batch_query", float(os.getenv("DEADLINE_BATCH_SECONDS", "120"))),
+    ("/api/v1/agent/proactive/scan_opportunities", float(os.getenv("DEADLINE_SCAN_SECONDS", "120"))),
+    ("/api/v1/", float(os.getenv("DEADLINE_QUERY_SECONDS", "30"))),
+)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a mandatory stage cannot finish within the request's budget."""
+
+    def __init__(self, stage: str):
+        super().__init__(f"The request's time budget ran out during '{stage}'.")
+        self.stage = stage
+
+
+class Budget:
+    """Absolute deadline of one request and the stages degraded to meet it."""
+    __slots__ = ("expires_at", "degraded", "from_client")
+
+    def __init__(self, seconds: float, from_client: bool = False):
+        self.expires_at = time.monotonic() + seconds
+        self.degraded: list[str] = []
+        self.from_client = from_client  # the client's own deadline, never extended
+
+
+_budget: ContextVar[Budget | None] = ContextVar("request_budget", default=None)
+
+
+def remaining() -> float | None:
+    """Seconds left in the current request's budget, or None outside a request."""
+    budget = _budget.get()
+    return None if budget is None else max(budget.expires_at - time.monotonic(), 0.0)
+
+
+def expires_at() -> float | None:
+    """Monotonic time at which the current request's budget runs out, or None outside a request."""
+    budget = _budget.get()
+    return None if budget is None else budget.expires_at
+
+
+def timeout(cap: float | None = None) -> float | None:
+    """Timeout for an outbound call: the remaining budget, but at most `cap`."""
+    left = remaining()
+    if left is None:
+        return cap
+    return left if cap is None else min(left, cap)
+
+
+def has_budget(seconds: float) -> bool:
+    """True if at least `seconds` are left (always true outside a request)."""
+    left = remaining()
+    return left is None or left >= seconds
+
+
+def check(stage: str):
+    """Raises DeadlineExceeded if the budget is used up."""
+    if remaining() == 0.0:
+        raise DeadlineExceeded(stage)
+
+
+def extend_default(seconds: float):
+    """
+    Adds `seconds` to the current budget if it is a route default, for requests
+    whose work grows with their input (e.g. batch queries). A deadline sent by the
+    client is kept as is.
+    """
+    budget = _budget.get()
+    if budget is not None and not budget.from_client:
+        budget.expires_at += seconds
+
+
+def degrade(stage: str, reason: str):
+    """Records that an optional stage was skipped or cut short."""
+    budget = _budget.get()
+    if budget is None or stage in budget.degraded:
+        return
+    budget.degraded.append(stage)
+    span = tracing.current_span()
+    if span is not None:
+        span.set_attribute("deadline.degraded", ",".join(budget.degraded))
+    print(f"[!] DEADLINE: {stage} degraded ({reason}, {remaining():.1f}s left).")
+
+
+def degraded_stages() -> list[str]:
+    budget = _budget.get()
+    return list(budget.degraded) if budget is not None else []
+
+
+async def within(awaitable, stage: str, reserve: float = 0.0):
+    """Awaits `awaitable` for at most the remaining budget minus `reserve`; raises DeadlineExceeded after that."""
+    left = remaining()
+    if left is None:
+        return await awaitable
+    if left - reserve <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceeded(stage)
+    try:
+        return await asyncio.wait_for(awaitable, left - reserve)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(stage) from None
+
+
+async def iterate_within(iterator: AsyncIterator, stage: str) -> AsyncIterator:
+    """Yields from `iterator`, raising DeadlineExceeded if the budget runs out while waiting for an item."""
+    iterator = aiter(iterator)
+    end = object()
+    while (item := await within(anext(iterator, end), stage)) is not end:
+        yield item
+
+
+def client_budget(header_value: str | None) -> float | None:
+    """The client's deadline header in seconds (capped at DEADLINE_MAX_SECONDS), or None if absent or invalid."""
+    if header_value:
+        try:
+            seconds = float(header_value)
+            if seconds > 0:
+                return min(seconds, DEADLINE_MAX_SECONDS)
+        except ValueError:
+            pass
+    return None
+
+
+def default_budget(path: str) -> float | None:
+    """Default budget in seconds of a route, or None for routes without a deadline."""
+    for prefix, seconds in DEADLINE_DEFAULTS:
+        if path.startswith(prefix):
+            return seconds
+    return None
+
+
+class DeadlineMiddleware:
+    """ASGI middleware starting each request's budget and reporting its degraded stages."""
+
+    def __init__(self, app):
+        self.app = app
+        self._header = DEADLINE_HEADER.encode()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        header_value = next((value.decode("latin-1") for name, value in scope["headers"] if name == self._header),
+                            None)
+        client_seconds = client_budget(header_value)
+        seconds = client_seconds if client_seconds is not None else default_budget(scope["path"])
+        if seconds is None:
+            await self.app(scope, receive, send)
+            return
+        budget = Budget(seconds, from_client=client_seconds is not None)
+        token = _budget.set(budget)
+
+        async def send_with_degraded(message):
+            # Streamed responses send headers first; their later degradations are in the body.
+            if message["type"] == "http.response.start" and budget.degraded:
+                message["headers"] = list(message.get("headers", [])) + [
+                    (DEGRADED_HEADER.encode(), ",".join(budget.degraded).encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_degraded)
+        finally:
+            _budget.reset(token)
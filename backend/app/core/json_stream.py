@@ -0,0 +1,138 @@
+# File: backend/app/core/json_stream.py
+# Description: Incremental JSON parser for streamed LLM responses.
+
+import json
+from typing import Any, Iterable, Optional
+
+_WHITESPACE = " \t\r\n"
+
+
+class IncrementalJsonParser:
+    """
+    Parses a JSON document that arrives in arbitrary text chunks (e.g. a Gemini
+    stream) and reports every value as soon as it is complete.
+
+    Each call to `feed()` returns a list of `(path, value)` tuples, where `path`
+    is a tuple of object keys and array indexes leading to the value. Nested
+    values are reported before their parents, so `("brand_identity",
+    "suggested_names", 0)` is emitted long before `("brand_identity",)`.
+    Any text before the first '{' or '[' (such as a ```json fence) and after
+    the root value is ignored.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._stack: list[dict] = []
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._token_start: Optional[int] = None
+        self.done = False
+        self.root: Any = None
+
+    def feed(self, chunk: str) -> list[tuple[tuple, Any]]:
+        """Consumes the next chunk of text and returns newly completed values."""
+        if self.done or not chunk:
+            return []
+        self._buffer += chunk
+        events: list[tuple[tuple, Any]] = []
+
+        while self._pos < len(self._buffer) and not self.done:
+            i = self._pos
+            c = self._buffer[i]
+            self._pos += 1
+
+            if not self._started:
+                if c in "{[":
+                    self._started = True
+                    self._open(c, i, ())
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    self._close_string(i, events)
+                continue
+
+            if c == '"':
+                self._flush_scalar(i, events)
+                self._in_string = True
+                self._token_start = i
+            elif c in "{[":
+                self._flush_scalar(i, events)
+                self._open(c, i, self._child_path())
+            elif c in "}]":
+                self._flush_scalar(i, events)
+                self._close_container(i, events)
+            elif c == ":":
+                self._flush_scalar(i, events)
+                self._stack[-1]["expect"] = "value"
+            elif c == ",":
+                self._flush_scalar(i, events)
+                frame = self._stack[-1]
+                if frame["kind"] == "{":
+                    frame["expect"] = "key"
+                else:
+                    frame["index"] += 1
+            elif c in _WHITESPACE:
+                self._flush_scalar(i, events)
+            elif self._token_start is None:
+                self._token_start = i
+
+        return events
+
+    def _child_path(self) -> tuple:
+        frame = self._stack[-1]
+        if frame["kind"] == "{":
+            return frame["path"] + (frame["key"],)
+        return frame["path"] + (frame["index"],)
+
+    def _open(self, kind: str, start: int, path: tuple):
+        self._stack.append({"kind": kind, "start": start, "path": path,
+                            "key": None, "index": 0, "expect": "key"})
+
+    def _close_string(self, end: int, events: list):
+        literal = self._buffer[self._token_start:end + 1]
+        self._token_start = None
+        frame = self._stack[-1]
+        if frame["kind"] == "{" and frame["expect"] == "key":
+            frame["key"] = json.loads(literal)
+        else:
+            events.append((self._child_path(), json.loads(literal)))
+
+    def _flush_scalar(self, end: int, events: list):
+        if self._token_start is None or self._in_string:
+            return
+        literal = self._buffer[self._token_start:end]
+        self._token_start = None
+        events.append((self._child_path(), json.loads(literal)))
+
+    def _close_container(self, end: int, events: list):
+        frame = self._stack.pop()
+        value = json.loads(self._buffer[frame["start"]:end + 1])
+        events.append((frame["path"], value))
+        if not self._stack:
+            self.root = value
+            self.done = True
+
+
+def parse_json_stream(chunks: Iterable[str]) -> Optional[Any]:
+    """
+    Parses the first JSON object or array found in a sequence of text chunks.
+    Returns None if the text does not contain a complete, valid JSON value.
+    """
+    parser = IncrementalJsonParser()
+    try:
+        for chunk in chunks:
+            parser.feed(chunk)
+            if parser.done:
+                break
+    except json.JSONDecodeError as e:
+        print(f"[!] JSON stream: Failed decode: {e}")
+        return None
+    return parser.root
@@ -0,0 +1,171 @@
+# File: backend/app/core/metrics.py
+# Description: Per-stage latency metrics.
+# `with stage("search", "legal"):` records the block's duration in a histogram
+# (exposed in Prometheus text format on /metrics) and in the current request's
+# Server-Timing header, and opens a trace span if the request is traced.
+# With METRICS_ENABLED=false, stage() only traces (a shared no-op when untraced)
+# and no middleware is installed.
+
+import bisect
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+from app.core import tracing
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Upper bounds in seconds; covers cached lookups up to slow image generations.
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# (stage, duration in seconds) of the stages run for the current request, or None outside requests.
+_request_timings: ContextVar[list | None] = ContextVar("request_timings", default=None)
+
+
+class Histogram:
+    """Thread-safe cumulative histogram per label set, in the Prometheus data model."""
+
+    def __init__(self, name: str, description: str, label_names: tuple[str, ...], buckets: tuple[float, ...]):
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series: dict[tuple, list] = {}  # labels -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, labels: tuple, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def expose(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for labels, series in sorted(snapshot.items()):
+            label_text = ",".join(f'{name}="{value}"' for name, value in zip(self.label_names, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f'{self.name}_bucket{{{label_text},le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{{{label_text}}} {cumulative}")
+        return lines
+
+
+stage_duration = Histogram("umkm_stage_duration_seconds", "Duration of agent pipeline stages.",
+                           ("component", "stage"), STAGE_BUCKETS)
+
+# Functions returning further exposition lines for /metrics (e.g. admission control gauges).
+_collectors: list = []
+
+
+def register_collector(expose):
+    """Adds a function returning Prometheus text lines to the /metrics output."""
+    _collectors.append(expose)
+
+
+class _Stage:
+    __slots__ = ("name", "component", "start", "span")
+
+    def __init__(self, name: str, component: str):
+        self.name = name
+        self.component = component
+
+    def set_attribute(self, key: str, value):
+        """Sets an attribute on the stage's trace span (no-op if untraced)."""
+        self.span.set_attribute(key, value)
+
+    def __enter__(self):
+        self.span = tracing.span(f"{self.component}.{self.name}").__enter__()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        self.span.__exit__(*exc_info)
+        stage_duration.observe((self.component, self.name), elapsed)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((self.name, elapsed))
+        return False
+
+
+def stage(name: str, component: str):
+    """
+    Context manager timing one pipeline stage (embed, search, generate, upload,
+    parse, ...). The value it yields takes span attributes via set_attribute().
+    """
+    if not METRICS_ENABLED:
+        return tracing.span(f"{component}.{name}")
+    return _Stage(name, component)
+
+
+def request_timings() -> list[tuple[str, float]]:
+    """The stages recorded so far for the current request (a copy; empty outside requests)."""
+    timings = _request_timings.get()
+    return list(timings) if timings is not None else []
+
+
+def add_request_timings(timings: list[tuple[str, float]]):
+    """Adds stages run on the request's behalf elsewhere (e.g. by a coalesced request) to its Server-Timing."""
+    current = _request_timings.get()
+    if current is not None:
+        current.extend(timings)
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines = stage_duration.expose()
+    for expose in _collectors:
+        lines.extend(expose())
+    return "\n".join(lines) + "\n"
+
+
+def server_timing_header(timings: list[tuple[str, float]], total: float) -> str:
+    """Server-Timing value; repeated stages (e.g. several generations) are summed with a count."""
+    totals: dict[str, list] = {}
+    for name, elapsed in timings:
+        entry = totals.setdefault(name, [0.0, 0])
+        entry[0] += elapsed
+        entry[1] += 1
+    parts = [f'{name};dur={elapsed * 1000:.1f}' + (f';desc="x{count}"' if count > 1 else "")
+             for name, (elapsed, count) in totals.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware adding a Server-Timing header with the stages recorded so far.
+    For streamed responses the header is sent with the first bytes, so it only
+    covers the stages that finished before streaming started.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timings: list = []
+        token = _request_timings.set(timings)
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                header = server_timing_header(timings, time.perf_counter() - start)
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", header.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
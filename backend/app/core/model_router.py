@@ -0,0 +1,215 @@
+# File: backend/app/core/model_router.py
+# Description: Chooses the Gemini model tier for each call site.
+# Short, structured calls (intent classification, image tags, operational
+# insights) use the flash tier; long-form answers and the brand concept use pro.
+# A pro call site is downgraded to flash for GEMINI_DOWNGRADE_SECONDS when:
+#   - "slo": the p90 of its recent pro latencies exceeds the site's SLO,
+#   - "rate_limited": pro answered 429 / ResourceExhausted (the call is retried
+#     on flash at once, and every site avoids pro for the cooldown),
+#   - "deadline": the request's remaining budget is shorter than the SLO (this
+#     call only).
+# After a downgrade expires, pro is tried again with a fresh latency window.
+# Tier choices, latencies and token counts per call site are exported on
+# /metrics and /health/models.
+#
+# `model_router.generate_content("legal.generate", prompt)` replaces
+# `gemini_model.generate_content(prompt)`; it is blocking, like the SDK call.
+
+import os
+import threading
+import time
+from collections import deque
+
+from app.core import deadlines, tracing
+from app.core.metrics import STAGE_BUCKETS, Histogram, register_collector
+
+FLASH, PRO = "flash", "pro"
+
+# Call site -> (preferred tier, latency SLO in seconds).
+MODEL_ROUTES = {
+    "orchestrator.classify": (FLASH, 2.0),
+    "brand.generate_tags": (FLASH, 3.0),
+    "operational.generate": (FLASH, 8.0),
+    "legal.generate": (PRO, 20.0),
+    "marketing.generate": (PRO, 20.0),
+    "brand.generate": (PRO, 30.0),
+}
+DEFAULT_ROUTE = (PRO, 30.0)  # for call sites not listed above
+
+# Overrides as "site=tier[:slo_seconds],...", e.g. "marketing.generate=flash,legal.generate=pro:15".
+GEMINI_MODEL_ROUTES = os.getenv("GEMINI_MODEL_ROUTES", "")
+GEMINI_SLO_WINDOW = int(os.getenv("GEMINI_SLO_WINDOW", "20"))  # recent pro calls per site checked against the SLO
+GEMINI_SLO_MIN_CALLS = 5
+GEMINI_DOWNGRADE_SECONDS = float(os.getenv("GEMINI_DOWNGRADE_SECONDS", "120"))
+GEMINI_RATE_LIMIT_COOLDOWN_SECONDS = float(os.getenv("GEMINI_RATE_LIMIT_COOLDOWN_SECONDS", "30"))
+
+model_call_duration = Histogram("umkm_model_call_seconds", "Duration of Gemini calls per call site and tier.",
+                                ("site", "tier"), STAGE_BUCKETS)
+
+
+def parse_routes(overrides: str) -> dict[str, tuple[str, float]]:
+    routes = dict(MODEL_ROUTES)
+    for entry in filter(None, (part.strip() for part in overrides.split(","))):
+        try:
+            site, spec = entry.split("=")
+            tier, _, slo = spec.partition(":")
+            if tier not in (FLASH, PRO):
+                raise ValueError(tier)
+            routes[site.strip()] = (tier, float(slo) if slo else routes.get(site.strip(), DEFAULT_ROUTE)[1])
+        except ValueError:
+            print(f"[!] MODEL ROUTER: Ignoring invalid route override '{entry}'.")
+    return routes
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """True for Vertex AI quota errors (google.api_core ResourceExhausted / TooManyRequests, HTTP 429)."""
+    return type(error).__name__ in ("ResourceExhausted", "TooManyRequests") or getattr(error, "code", None) == 429
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class Route:
+    """Tier preference, SLO, downgrade state and counters of one call site."""
+
+    def __init__(self, site: str, tier: str, slo: float):
+        self.site = site
+        self.tier = tier
+        self.slo = slo
+        self.latencies = {FLASH: deque(maxlen=GEMINI_SLO_WINDOW), PRO: deque(maxlen=GEMINI_SLO_WINDOW)}
+        self.downgraded_until = 0.0
+        self.calls: dict[tuple[str, str], int] = {}  # (tier, reason or "preferred") -> count
+        self.tokens = {FLASH: [0, 0], PRO: [0, 0]}  # input, output
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "preferred_tier": self.tier,
+            "slo_seconds": self.slo,
+            "downgraded_for_seconds": round(max(self.downgraded_until - now, 0.0), 1),
+            "calls": {f"{tier}:{reason}": n for (tier, reason), n in sorted(self.calls.items())},
+            "latency_ms": {tier: {"p50": round(percentile(values, 50) * 1000, 1),
+                                  "p95": round(percentile(values, 95) * 1000, 1), "window": len(values)}
+                           for tier, values in self.latencies.items() if values},
+            "tokens": {tier: {"input": tokens[0], "output": tokens[1]} for tier, tokens in self.tokens.items()
+                       if any(tokens)},
+        }
+
+
+class ModelRouter:
+    """Routes Gemini calls to the flash or pro model per call site, with latency- and quota-driven downgrades."""
+
+    def __init__(self, routes: dict[str, tuple[str, float]]):
+        self._lock = threading.Lock()
+        self._routes = {site: Route(site, tier, slo) for site, (tier, slo) in routes.items()}
+        self._pro_throttled_until = 0.0
+
+    def models(self) -> dict:
+        # Imported on first use, not with the app, so that the models (or the benchmark fakes) load on demand.
+        from app.core import models as shared_models
+        return {PRO: getattr(shared_models, "gemini_model", None), FLASH: getattr(shared_models, "gemini_flash_model", None)}
+
+    def _route(self, site: str) -> Route:
+        with self._lock:
+            route = self._routes.get(site)
+            if route is None:
+                route = self._routes[site] = Route(site, *DEFAULT_ROUTE)
+            return route
+
+    def _choose(self, route: Route, models: dict) -> tuple[str, str]:
+        """(tier, reason) for the next call of a site."""
+        if models[FLASH] is None:
+            return PRO, "preferred"
+        if route.tier == FLASH or models[PRO] is None:
+            return FLASH, "preferred"
+        now = time.monotonic()
+        with self._lock:
+            if self._pro_throttled_until > now:
+                return FLASH, "rate_limited"
+            if route.downgraded_until > now:
+                return FLASH, "slo"
+            if route.downgraded_until:
+                # The downgrade has expired: measure pro afresh.
+                route.downgraded_until = 0.0
+                route.latencies[PRO].clear()
+        left = deadlines.remaining()
+        if left is not None and left < route.slo:
+            return FLASH, "deadline"
+        return PRO, "preferred"
+
+    def _record(self, route: Route, tier: str, reason: str, seconds: float, response):
+        model_call_duration.observe((route.site, tier), seconds)
+        usage = getattr(response, "usage_metadata", None)
+        with self._lock:
+            route.calls[(tier, reason)] = route.calls.get((tier, reason), 0) + 1
+            route.latencies[tier].append(seconds)
+            if usage is not None:
+                route.tokens[tier][0] += getattr(usage, "prompt_token_count", 0) or 0
+                route.tokens[tier][1] += getattr(usage, "candidates_token_count", 0) or 0
+            window = route.latencies[PRO]
+            if (tier == PRO and route.tier == PRO and len(window) >= GEMINI_SLO_MIN_CALLS
+                    and percentile(window, 90) > route.slo and route.downgraded_until <= time.monotonic()):
+                route.downgraded_until = time.monotonic() + GEMINI_DOWNGRADE_SECONDS
+                print(f"[!] MODEL ROUTER: {route.site} p90 {percentile(window, 90):.1f}s exceeds its "
+                      f"{route.slo:g}s SLO, using flash for {GEMINI_DOWNGRADE_SECONDS:g}s.")
+
+    def _timed_stream(self, route: Route, tier: str, reason: str, start: float, stream):
+        # Streamed responses are timed until the consumer stops reading (usage is cumulative per chunk).
+        last = None
+        try:
+            for chunk in stream:
+                last = chunk
+                yield chunk
+        finally:
+            self._record(route, tier, reason, time.perf_counter() - start, last)
+
+    def _call(self, route: Route, tier: str, reason: str, model, contents, kwargs: dict):
+        span = tracing.current_span()
+        if span is not None:
+            span.set_attributes({"gen_ai.request.model": getattr(model, "_model_name", None), "gemini.tier": tier,
+                                 "gemini.tier_reason": reason})
+        start = time.perf_counter()
+        response = model.generate_content(contents, **kwargs)
+        if kwargs.get("stream"):
+            return self._timed_stream(route, tier, reason, start, response)
+        self._record(route, tier, reason, time.perf_counter() - start, response)
+        return response
+
+    def generate_content(self, site: str, contents, **kwargs):
+        """GenerativeModel.generate_content on the tier chosen for `site`; pro quota errors fall back to flash."""
+        route = self._route(site)
+        models = self.models()
+        tier, reason = self._choose(route, models)
+        try:
+            return self._call(route, tier, reason, models[tier], contents, kwargs)
+        except Exception as e:
+            if tier != PRO or models[FLASH] is None or not is_rate_limited(e):
+                raise
+            with self._lock:
+                self._pro_throttled_until = time.monotonic() + GEMINI_RATE_LIMIT_COOLDOWN_SECONDS
+            print(f"[!] MODEL ROUTER: pro is rate-limited ({e}); using flash for "
+                  f"{GEMINI_RATE_LIMIT_COOLDOWN_SECONDS:g}s.")
+            return self._call(route, FLASH, "rate_limited", models[FLASH], contents, kwargs)
+
+    def stats(self) -> dict:
+        with self._lock:
+            routes = list(self._routes.values())
+            throttled = max(self._pro_throttled_until - time.monotonic(), 0.0)
+        return {"pro_rate_limited_for_seconds": round(throttled, 1),
+                "routes": {route.site: route.stats() for route in routes}}
+
+    def expose(self) -> list[str]:
+        with self._lock:
+            counts = [(route.site, tier, reason, n) for route in self._routes.values()
+                      for (tier, reason), n in sorted(route.calls.items())]
+        lines = ["# HELP umkm_model_calls_total Gemini calls per call site, tier and reason for the tier.",
+                 "# TYPE umkm_model_calls_total counter"]
+        lines += [f'umkm_model_calls_total{{site="{site}",tier="{tier}",reason="{reason}"}} {n}'
+                  for site, tier, reason, n in counts]
+        return lines + model_call_duration.expose()
+
+
+model_router = ModelRouter(parse_routes(GEMINI_MODEL_ROUTES))
+register_collector(model_router.expose)
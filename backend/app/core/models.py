@@ -14,6 +14,9 @@ load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '..', '..', '.en
 GCP_PROJECT_ID = os.getenv("GCP_PROJECT_ID")
 GCP_LOCATION = os.getenv("GCP_LOCATION", "asia-southeast2")
 EMBEDDING_MODEL_NAME = 'paraphrase-multilingual-MiniLM-L12-v2'
+# Model tiers; which call uses which is decided by app.core.model_router.
+GEMINI_PRO_MODEL = os.getenv("GEMINI_PRO_MODEL", "gemini-2.5-pro")
+GEMINI_FLASH_MODEL = os.getenv("GEMINI_FLASH_MODEL", "gemini-2.5-flash")
 
 # --- Initialization ---
 # This code runs only once when the application starts.
@@ -27,6 +30,7 @@ print(f"[*] CORE: Loading embedding model: '{EMBEDDING_MODEL_NAME}'...")
 embedding_model = SentenceTransformer('/app/embedding_model_files')
 print("[+] CORE: Embedding model loaded.")
 
-print("[*] CORE: Loading Gemini model...")
-gemini_model = GenerativeModel("gemini-2.5-pro")
-print("[+] CORE: Gemini model loaded.")
\ No newline at end of file
+print("[*] CORE: Loading Gemini models...")
+gemini_model = GenerativeModel(GEMINI_PRO_MODEL)
+gemini_flash_model = GenerativeModel(GEMINI_FLASH_MODEL)
+print(f"[+] CORE: Gemini models loaded ({GEMINI_PRO_MODEL}, {GEMINI_FLASH_MODEL}).")
\ No newline at end of file
@@ -0,0 +1,216 @@
+# File: backend/app/core/profiling.py
+# Description: On-demand CPU profiling of single requests and tracemalloc snapshots.
+# Both are admin-only and off by default: without PROFILING_ADMIN_TOKEN the
+# middleware is not installed and the admin endpoints answer 404, and tracemalloc
+# is only started by the first snapshot request.
+# A request sent with `x-profile: <token>` runs under a sampling profiler that
+# walks the Python stacks of all threads every PROFILE_INTERVAL_MS (the event
+# loop plus the threadpool running encode / generate calls). The samples are
+# written in the folded-stack format read by flamegraph.pl and speedscope.
+
+import hmac
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timezone
+
+PROFILING_ADMIN_TOKEN = os.getenv("PROFILING_ADMIN_TOKEN", "")
+PROFILE_HEADER = os.getenv("PROFILE_HEADER", "x-profile").lower()
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.getenv("PROFILE_DIR") or "profiles"
+TRACEMALLOC_FRAMES = int(os.getenv("TRACEMALLOC_FRAMES", "10"))
+
+PROFILING_ENABLED = bool(PROFILING_ADMIN_TOKEN)
+
+
+def is_admin(token: str | None) -> bool:
+    """Constant-time check of an admin token; always False when profiling is disabled."""
+    return PROFILING_ENABLED and token is not None and hmac.compare_digest(token, PROFILING_ADMIN_TOKEN)
+
+
+class SamplingProfiler:
+    """
+    Samples the Python stack of every thread except its own at a fixed interval
+    and counts identical stacks. Requests served concurrently with the profiled
+    one show up in the samples too, so profile on a quiet instance when possible.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started
+        return False
+
+    def _run(self):
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            if len(names) != threading.active_count():
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[";".join(reversed(stack))] += 1
+            self.sample_count += 1
+
+    def folded(self) -> str:
+        """Samples as `thread;outer;...;inner count` lines, heaviest stacks first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+def profile_name(method: str, path: str) -> str:
+    """File name for a new profile, e.g. `20250101T120000000000Z-post-api_v1_agent_legal_query.folded`."""
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    return f"{stamp}-{method.lower()}-{re.sub(r'[^A-Za-z0-9]+', '_', path).strip('_') or 'root'}.folded"
+
+
+def save_profile(profiler: SamplingProfiler, name: str):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    with open(os.path.join(PROFILE_DIR, name), "w", encoding="utf-8") as f:
+        f.write(profiler.folded())
+
+
+def list_profiles() -> list[dict]:
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    return [{"name": name, "bytes": os.path.getsize(os.path.join(PROFILE_DIR, name))}
+            for name in sorted(os.listdir(PROFILE_DIR), reverse=True) if name.endswith(".folded")]
+
+
+def profile_path(name: str) -> str | None:
+    """Path of a stored profile, or None if there is no such profile (names cannot leave PROFILE_DIR)."""
+    if os.path.basename(name) != name or not name.endswith(".folded"):
+        return None
+    path = os.path.join(PROFILE_DIR, name)
+    return path if os.path.isfile(path) else None
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling requests that carry the admin token in PROFILE_HEADER.
+    The profile is stored under PROFILE_DIR and named in the `x-profile-file`
+    response header, and fetched with GET /admin/profiles/{name}. For streamed
+    responses the header is sent before the stream finishes, so the file is
+    written once the stream ends.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = next((value.decode("latin-1") for key, value in scope["headers"]
+                      if key.decode("latin-1").lower() == PROFILE_HEADER), None)
+        if token is None or not is_admin(token):
+            await self.app(scope, receive, send)
+            return
+
+        name = profile_name(scope["method"], scope["path"])
+
+        async def send_with_profile(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-file", name.encode())]
+            await send(message)
+
+        with SamplingProfiler(PROFILE_INTERVAL_MS / 1000) as profiler:
+            await self.app(scope, receive, send_with_profile)
+        save_profile(profiler, name)
+        print(f"[*] PROFILER: {scope['method']} {scope['path']} took {profiler.duration * 1000:.0f} ms, "
+              f"{profiler.sample_count} samples written to {name}.")
+
+
+class MemorySnapshots:
+    """
+    tracemalloc snapshots for chasing memory growth. The first snapshot starts
+    tracing (which slows allocations down until stop() is called); each later
+    one is compared with the first (the baseline) and with the previous one.
+    """
+
+    def __init__(self, frames: int):
+        self.frames = frames
+        self._lock = threading.Lock()
+        self.baseline: tracemalloc.Snapshot | None = None
+        self.previous: tracemalloc.Snapshot | None = None
+        self.count = 0
+
+    def take(self, top: int = 20, group_by: str = "lineno") -> dict:
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.frames)
+                self.baseline = self.previous = None
+                self.count = 0
+                print(f"[*] PROFILER: tracemalloc started ({self.frames} frames per allocation).")
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            ))
+            current, peak = tracemalloc.get_traced_memory()
+            result = {
+                "snapshot": self.count,
+                "traced_bytes": current,
+                "peak_traced_bytes": peak,
+                "tracemalloc_overhead_bytes": tracemalloc.get_tracemalloc_memory(),
+                "top": [_stat(stat) for stat in snapshot.statistics(group_by)[:top]],
+            }
+            if self.baseline is not None:
+                result["since_baseline"] = [_stat(stat) for stat in snapshot.compare_to(self.baseline, group_by)[:top]]
+                result["since_previous"] = [_stat(stat) for stat in snapshot.compare_to(self.previous, group_by)[:top]]
+            else:
+                self.baseline = snapshot
+            self.previous = snapshot
+            self.count += 1
+            return result
+
+    def stop(self) -> bool:
+        with self._lock:
+            was_tracing = tracemalloc.is_tracing()
+            tracemalloc.stop()
+            self.baseline = self.previous = None
+            self.count = 0
+            return was_tracing
+
+    def status(self) -> dict:
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        return {"tracing": tracing, "snapshots": self.count, "traced_bytes": current, "peak_traced_bytes": peak}
+
+
+def _stat(stat) -> dict:
+    """JSON form of a tracemalloc Statistic or StatisticDiff (innermost frame first)."""
+    entry = {
+        "location": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+        "size_bytes": stat.size,
+        "count": stat.count,
+    }
+    if hasattr(stat, "size_diff"):
+        entry["size_diff_bytes"] = stat.size_diff
+        entry["count_diff"] = stat.count_diff
+    return entry
+
+
+memory_snapshots = MemorySnapshots(TRACEMALLOC_FRAMES)
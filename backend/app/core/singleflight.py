@@ -0,0 +1,59 @@
+# File: backend/app/core/singleflight.py
+# Description: Deduplicates concurrent calls of the same async work.
+# While a call for a key is in flight, later callers with the same key await
+# its result (or exception) instead of starting the work again. The work runs
+# as its own task, so it continues while any caller still waits for it and is
+# cancelled only when every caller has gone away.
+
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class _Call:
+    __slots__ = ("task", "callers")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.callers = 0
+
+
+class SingleFlight:
+    """Per-key sharing of one in-flight coroutine between concurrent callers."""
+
+    def __init__(self):
+        self._calls: dict[Hashable, _Call] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    def _forget(self, key: Hashable, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def _finished(self, key: Hashable, call: _Call):
+        self._forget(key, call)
+        if not call.task.cancelled():
+            # Retrieve the exception so a failure nobody awaited any more is not reported as "never retrieved".
+            call.task.exception()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> tuple[Any, bool]:
+        """
+        Runs `fn()` unless a call for `key` is already in flight, in which case its
+        outcome is shared. Returns (result, shared). `fn()` runs in the first
+        caller's context. Cancelling a caller (the first one included) does not
+        cancel the shared call, unless no other caller is left waiting for it.
+        """
+        call = self._calls.get(key)
+        shared = call is not None
+        if call is None:
+            call = self._calls[key] = _Call(asyncio.ensure_future(fn()))
+            call.task.add_done_callback(lambda _, key=key, call=call: self._finished(key, call))
+        call.callers += 1
+        try:
+            return await asyncio.shield(call.task), shared
+        finally:
+            call.callers -= 1
+            if not call.callers and not call.task.done():
+                # The last caller went away: nobody needs the result any more.
+                self._forget(key, call)
+                call.task.cancel()
@@ -0,0 +1,203 @@
+# File: backend/app/core/tracing.py
+# Description: Lightweight distributed tracing with W3C trace context.
+# A request is traced if its `traceparent` header is sampled, if it carries the
+# debug header (TRACE_DEBUG_HEADER), or by TRACE_SAMPLE_RATE. Spans follow the
+# OpenTelemetry model (trace/span ids, parent, attributes, status) and are
+# written as JSON lines to the console or to TRACE_FILE, so traces can be read
+# without a collector. Untraced requests only pay for one context variable lookup
+# per span.
+
+import json
+import os
+import random
+import re
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+TRACE_DEBUG_HEADER = os.getenv("TRACE_DEBUG_HEADER", "x-debug-trace").lower()
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "console").lower()  # 'console', 'file' or 'none'
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+_current_span: ContextVar["Span | None"] = ContextVar("current_span", default=None)
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str = field(default_factory=lambda: f"{random.getrandbits(64):016x}")
+    parent_id: str | None = None
+    attributes: dict = field(default_factory=dict)
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: int | None = None
+    status: str = "ok"
+    error: str | None = None
+    _token: object = field(default=None, repr=False)
+
+    def set_attribute(self, key: str, value):
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_attributes(self, attributes: dict):
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.status, self.error = "error", f"{exc_type.__name__}: {exc}"
+        self.end()
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # Exited in another context (e.g. an async generator finalized elsewhere).
+            pass
+        return False
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            exporter.export(self)
+
+
+class _NoopSpan:
+    """Stands in for a span when the request is not traced."""
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class SpanExporter:
+    """Writes finished spans as JSON lines to the console or a file."""
+
+    def __init__(self, kind: str, path: str):
+        self.kind = kind
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def export(self, span: Span):
+        if self.kind == "none":
+            return
+        line = json.dumps({
+            "trace_id": span.trace_id,
+            "span_id": span.span_id,
+            "parent_span_id": span.parent_id,
+            "name": span.name,
+            "start_time": datetime.fromtimestamp(span.start_ns / 1e9, timezone.utc).isoformat(),
+            "duration_ms": round((span.end_ns - span.start_ns) / 1e6, 3),
+            "attributes": span.attributes,
+            "status": span.status,
+            "error": span.error,
+        }, ensure_ascii=False, default=str)
+        if self.kind == "file":
+            with self._lock:
+                if self._file is None:
+                    self._file = open(self.path, "a", encoding="utf-8")
+                self._file.write(line + "\n")
+                self._file.flush()
+        else:
+            print(f"[TRACE] {line}")
+
+
+exporter = SpanExporter(TRACE_EXPORTER, TRACE_FILE)
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+def span(name: str, attributes: dict | None = None):
+    """Child span of the current one, or a no-op span if the request is not traced."""
+    parent = _current_span.get()
+    if parent is None:
+        return NOOP_SPAN
+    child = Span(name=name, trace_id=parent.trace_id, parent_id=parent.span_id)
+    if attributes:
+        child.set_attributes(attributes)
+    return child
+
+
+def current_traceparent() -> str | None:
+    """`traceparent` header value for outbound calls from the current span, if traced."""
+    current = _current_span.get()
+    return current.traceparent if current is not None else None
+
+
+def set_token_usage(target, response):
+    """Records a Gemini response's prompt/response token counts on a span (or stage)."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None:
+        target.set_attribute("gen_ai.usage.input_tokens", getattr(usage, "prompt_token_count", None))
+        target.set_attribute("gen_ai.usage.output_tokens", getattr(usage, "candidates_token_count", None))
+
+
+def parse_traceparent(value: str | None) -> tuple[str, str, bool] | None:
+    """(trace id, parent span id, sampled) from a W3C traceparent header, or None if invalid."""
+    match = _TRACEPARENT.match((value or "").strip().lower())
+    if not match or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware starting the server span of sampled requests. The trace
+    continues an incoming `traceparent`, and the response carries the server
+    span's `traceparent` so a client can look the trace up.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or TRACE_EXPORTER == "none":
+            await self.app(scope, receive, send)
+            return
+        headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope["headers"]}
+        incoming = parse_traceparent(headers.get("traceparent"))
+        debug = headers.get(TRACE_DEBUG_HEADER, "").lower() in ("1", "true", "yes")
+        sampled = debug or (incoming[2] if incoming else random.random() < TRACE_SAMPLE_RATE)
+        if not sampled:
+            await self.app(scope, receive, send)
+            return
+
+        trace_id, parent_id = (incoming[0], incoming[1]) if incoming else (f"{random.getrandbits(128):032x}", None)
+        server_span = Span(name=f"HTTP {scope['method']} {scope['path']}", trace_id=trace_id, parent_id=parent_id)
+        server_span.set_attributes({"http.method": scope["method"], "http.target": scope["path"],
+                                    "trace.debug": debug or None})
+
+        async def send_with_trace(message):
+            if message["type"] == "http.response.start":
+                server_span.set_attribute("http.status_code", message["status"])
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"traceparent", server_span.traceparent.encode())]
+            await send(message)
+
+        with server_span:
+            await self.app(scope, receive, send_with_trace)
@@ -1,48 +1,347 @@
 # File: backend/app/infrastructure/database/elasticsearch_connector.py
 # Description: Manages the connection to the Elasticsearch cluster.
+# Sync and async clients share one set of settings (pool size, timeouts, retries)
+# and are created lazily on first use, so a cluster that is briefly unreachable at
+# startup no longer disables search until the next restart. A background health
+# check pings the cluster, and a circuit breaker makes calls fail fast while it is
+# down and lets them through again once it recovers.
+#
+# `es_client` and `es_async_client` are guarded proxies: call any client method on
+# them (`es_client.search(...)`, `await es_async_client.search(...)`), and use
+# `if not es_client` to check whether the cluster is currently usable.
+# Inside a request, each call's timeout is capped by the request's remaining time
+# budget; a call cut short by the budget raises DeadlineExceeded and, like a
+# cancelled call, is not counted for or against the cluster.
 
+import asyncio
+import functools
 import os
+import threading
+import time
+from datetime import datetime, timezone
+
 from dotenv import load_dotenv
-from elasticsearch import Elasticsearch
+
+from app.core import deadlines, tracing
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError, OPEN
 
 # Load environment variables from .env file in the backend directory
 load_dotenv()
 
+ELASTIC_POOL_SIZE = int(os.getenv("ELASTIC_POOL_SIZE", "10"))  # connections per node, per client
+ELASTIC_REQUEST_TIMEOUT = float(os.getenv("ELASTIC_REQUEST_TIMEOUT", "10"))
+ELASTIC_MAX_RETRIES = int(os.getenv("ELASTIC_MAX_RETRIES", "2"))
+ELASTIC_HEALTH_CHECK_SECONDS = float(os.getenv("ELASTIC_HEALTH_CHECK_SECONDS", "30"))
+ELASTIC_CIRCUIT_FAILURES = int(os.getenv("ELASTIC_CIRCUIT_FAILURES", "5"))
+ELASTIC_CIRCUIT_RESET_SECONDS = float(os.getenv("ELASTIC_CIRCUIT_RESET_SECONDS", "30"))
+
+
+def is_cluster_failure(error: Exception) -> bool:
+    """True for errors meaning the cluster is unreachable or failing (not e.g. a bad query)."""
+    if isinstance(error, CircuitOpenError):
+        return False
+    status = getattr(getattr(error, 'meta', None), 'status', None)
+    if isinstance(status, int):
+        return status >= 500
+    return (type(error).__name__ in ('ConnectionError', 'ConnectionTimeout', 'TlsError')
+            or isinstance(error, (OSError, TimeoutError)))
+
+
+def search_attributes(path: tuple[str, ...], kwargs: dict) -> dict:
+    """Trace span attributes of a client call: index, kNN k/num_candidates, result size, msearch count."""
+    attributes = {"db.system": "elasticsearch", "db.operation": ".".join(path), "elasticsearch.index": kwargs.get("index")}
+    body = kwargs.get("body") or {}
+    if "searches" in kwargs:
+        searches = kwargs["searches"]
+        attributes["elasticsearch.msearch.count"] = len(searches) // 2
+        body = searches[1] if len(searches) > 1 else {}
+        attributes["elasticsearch.index"] = searches[0].get("index") if searches else None
+    knn = kwargs.get("knn") or body.get("knn")
+    if isinstance(knn, dict):
+        attributes["elasticsearch.knn.k"] = knn.get("k")
+        attributes["elasticsearch.knn.num_candidates"] = knn.get("num_candidates")
+    attributes["elasticsearch.size"] = kwargs.get("size", body.get("size"))
+    return attributes
+
+
+class PoolGauge:
+    """
+    Counts requests in flight on one client against its connection pool size.
+    Utilization above 1 means requests were waiting for a free connection.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.failures = 0
+
+    def enter(self):
+        with self._lock:
+            self.in_flight += 1
+            self.requests += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def leave(self, failed: bool):
+        with self._lock:
+            self.in_flight -= 1
+            self.failures += failed
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pool_size": self.capacity,
+                "in_flight": self.in_flight,
+                "utilization": round(self.in_flight / self.capacity, 3),
+                "peak_in_flight": self.peak_in_flight,
+                "peak_utilization": round(self.peak_in_flight / self.capacity, 3),
+                "requests": self.requests,
+                "failures": self.failures,
+            }
+
+
 class ElasticsearchConnector:
-    """A singleton class to manage the Elasticsearch client connection."""
-    _instance = None
+    """Lazily created sync/async Elasticsearch clients behind a circuit breaker, with health checks."""
+
+    def __init__(self, endpoint: str | None, api_key: str | None, pool_size: int = ELASTIC_POOL_SIZE,
+                 request_timeout: float = ELASTIC_REQUEST_TIMEOUT, max_retries: int = ELASTIC_MAX_RETRIES,
+                 health_check_seconds: float = ELASTIC_HEALTH_CHECK_SECONDS):
+        self.endpoint = endpoint
+        self.api_key = api_key
+        self.pool_size = pool_size
+        self.request_timeout = request_timeout
+        self.max_retries = max_retries
+        self.health_check_seconds = health_check_seconds
+        self.breaker = CircuitBreaker("Elasticsearch", ELASTIC_CIRCUIT_FAILURES, ELASTIC_CIRCUIT_RESET_SECONDS)
+        self.sync_pool = PoolGauge(pool_size)
+        self.async_pool = PoolGauge(pool_size)
+        self._lock = threading.Lock()
+        self._client = None
+        self._async_client = None
+        self._health_task: asyncio.Task | None = None
+        self.last_health_check: dict | None = None
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.endpoint and self.api_key)
+
+    @property
+    def available(self) -> bool:
+        """Configured, and the circuit is not open."""
+        return self.configured and self.breaker.state != OPEN
+
+    def _client_options(self) -> dict:
+        if not self.configured:
+            raise ValueError("ELASTIC_ENDPOINT and ELASTIC_API_KEY must be set in .env file")
+        return {
+            "hosts": [self.endpoint],
+            "api_key": self.api_key,
+            "connections_per_node": self.pool_size,
+            "request_timeout": self.request_timeout,
+            "max_retries": self.max_retries,
+            "retry_on_timeout": True,
+        }
+
+    def get_client(self):
+        """Returns the sync client, creating it on first use (no network round trip)."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from elasticsearch import Elasticsearch
+                    print("[*] Creating Elasticsearch client...")
+                    self._client = Elasticsearch(**self._client_options())
+        return self._client
+
+    def get_async_client(self):
+        """Returns the async client (httpx transport), creating it on first use."""
+        if self._async_client is None:
+            with self._lock:
+                if self._async_client is None:
+                    from elasticsearch import AsyncElasticsearch
+                    print("[*] Creating async Elasticsearch client...")
+                    self._async_client = AsyncElasticsearch(**self._client_options(), node_class="httpxasync")
+        return self._async_client
+
+    def _record(self, error: Exception | None):
+        if error is not None and is_cluster_failure(error):
+            self.breaker.record_failure()
+        else:
+            # Any answer from the cluster, even a 4xx, shows it is reachable.
+            self.breaker.record_success()
 
-    def __new__(cls):
-        if cls._instance is None:
-            print("[*] Creating new Elasticsearch client instance...")
+    def _request_client(self, client, request_timeout: float | None):
+        """
+        The client for one call: sends the current trace context as a traceparent
+        header if the request is traced, and uses `request_timeout` without retries
+        if the request's budget is shorter than the configured timeout.
+        """
+        options = {}
+        traceparent = tracing.current_traceparent()
+        if traceparent:
+            options["headers"] = {"traceparent": traceparent}
+        if request_timeout is not None and request_timeout < self.request_timeout:
+            options.update(request_timeout=request_timeout, max_retries=0)
+        return client.options(**options) if options else client
+
+    def _finish(self, pool: PoolGauge, error: Exception | None, answered: bool, trial: bool):
+        """
+        Records a call's outcome. A call cut short by the request budget or
+        cancelled (e.g. the client disconnected) says nothing about the cluster:
+        it is not recorded, and if it was the half-open trial it frees the slot.
+        """
+        pool.leave(error is not None)
+        if answered:
+            self._record(error)
+        elif trial:
+            self.breaker.release_trial()
+
+    def _cut_short(self, error: Exception | None, request_timeout: float | None) -> bool:
+        """True if `error` is a timeout caused by a request budget shorter than the configured timeout."""
+        return (error is not None and request_timeout is not None and request_timeout < self.request_timeout
+                and "Timeout" in type(error).__name__)
+
+    def call(self, path: tuple[str, ...], *args, **kwargs):
+        """Calls a sync client method (e.g. ('indices', 'refresh')) through the circuit breaker."""
+        client = self.get_client()
+        deadlines.check(f"elasticsearch.{'.'.join(path)}")
+        request_timeout = deadlines.timeout()
+        trial = self.breaker.allow()
+        self.sync_pool.enter()
+        error, answered = None, False
+        try:
+            with tracing.span(f"elasticsearch.{'.'.join(path)}", search_attributes(path, kwargs)):
+                method = functools.reduce(getattr, path, self._request_client(client, request_timeout))
+                result = method(*args, **kwargs)
+            answered = True
+            return result
+        except Exception as e:
+            error, answered = e, not self._cut_short(e, request_timeout)
+            if not answered:
+                raise deadlines.DeadlineExceeded(f"elasticsearch.{'.'.join(path)}") from e
+            raise
+        finally:
+            self._finish(self.sync_pool, error, answered, trial)
+
+    async def acall(self, path: tuple[str, ...], *args, **kwargs):
+        """Awaits an async client method through the circuit breaker."""
+        client = self.get_async_client()
+        deadlines.check(f"elasticsearch.{'.'.join(path)}")
+        request_timeout = deadlines.timeout()
+        trial = self.breaker.allow()
+        self.async_pool.enter()
+        error, answered = None, False
+        try:
+            with tracing.span(f"elasticsearch.{'.'.join(path)}", search_attributes(path, kwargs)):
+                method = functools.reduce(getattr, path, self._request_client(client, request_timeout))
+                result = await method(*args, **kwargs)
+            answered = True
+            return result
+        except Exception as e:
+            error, answered = e, not self._cut_short(e, request_timeout)
+            if not answered:
+                raise deadlines.DeadlineExceeded(f"elasticsearch.{'.'.join(path)}") from e
+            raise
+        finally:
+            self._finish(self.async_pool, error, answered, trial)
+
+    # --- Health checks
+
+    async def check_health(self) -> bool:
+        """Pings the cluster; an answer closes the circuit, a failed ping counts as one failure."""
+        start = time.perf_counter()
+        try:
+            ok = bool(await asyncio.wait_for(self.get_async_client().ping(), timeout=self.request_timeout))
+            error = None if ok else "ping returned false"
+        except Exception as e:
+            ok, error = False, str(e) or type(e).__name__
+        if ok:
+            self.breaker.record_success()
+        else:
+            # Like a failed call, so one transient blip does not open the circuit.
+            self.breaker.record_failure()
+        self.last_health_check = {
+            "ok": ok,
+            "at": datetime.now(timezone.utc).isoformat(),
+            "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+            "error": error,
+        }
+        return ok
+
+    async def _health_loop(self):
+        while True:
+            ok = await self.check_health()
+            if not ok:
+                print(f"[!] Elasticsearch health check failed: {self.last_health_check['error']}")
+            await asyncio.sleep(self.health_check_seconds)
+
+    def start_health_checks(self):
+        """Starts periodic health checks; call from the app lifespan."""
+        if not self.configured:
+            print("[!] Elasticsearch is not configured (ELASTIC_ENDPOINT / ELASTIC_API_KEY); search is disabled.")
+            return
+        if self._health_task is None:
+            self._health_task = asyncio.get_running_loop().create_task(self._health_loop())
+
+    async def close(self):
+        """Stops the health checks and closes both clients' connection pools."""
+        if self._health_task is not None:
+            self._health_task.cancel()
             try:
-                cls._instance = super(ElasticsearchConnector, cls).__new__(cls)
-                
-                endpoint = os.getenv("ELASTIC_ENDPOINT")
-                api_key = os.getenv("ELASTIC_API_KEY")
-
-                if not endpoint or not api_key:
-                    raise ValueError("ELASTIC_ENDPOINT and ELASTIC_API_KEY must be set in .env file")
-
-                cls.client = Elasticsearch(
-                    hosts=[endpoint],
-                    api_key=api_key
-                )
-                if not cls.client.ping():
-                    raise ConnectionError("Could not connect to Elasticsearch.")
-                
-                print("[+] Elasticsearch client initialized and connected.")
-
-            except Exception as e:
-                print(f"[!] Failed to connect to Elasticsearch: {e}")
-                cls._instance = None # Ensure instance is not set on failure
-                
-        return cls._instance
-
-    def get_client(self) -> Elasticsearch:
-        """Returns the active Elasticsearch client."""
-        return self.client
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    def stats(self) -> dict:
+        return {
+            "configured": self.configured,
+            "available": self.available,
+            "circuit": self.breaker.stats(),
+            "last_health_check": self.last_health_check,
+            "pools": {"sync": self.sync_pool.stats(), "async": self.async_pool.stats()},
+        }
+
+
+class _GuardedMethod:
+    """Attribute path on a client (e.g. `indices.refresh`) that is called through the connector."""
+
+    def __init__(self, connector: ElasticsearchConnector, path: tuple[str, ...], is_async: bool):
+        self._connector = connector
+        self._path = path
+        self._is_async = is_async
+
+    def __getattr__(self, name: str) -> "_GuardedMethod":
+        return _GuardedMethod(self._connector, self._path + (name,), self._is_async)
+
+    def __call__(self, *args, **kwargs):
+        if self._is_async:
+            return self._connector.acall(self._path, *args, **kwargs)
+        return self._connector.call(self._path, *args, **kwargs)
+
+
+class GuardedClient:
+    """Client proxy: falsy while Elasticsearch is unusable, methods go through the circuit breaker."""
+
+    def __init__(self, connector: ElasticsearchConnector, is_async: bool = False):
+        self._connector = connector
+        self._is_async = is_async
+
+    def __bool__(self) -> bool:
+        return self._connector.available
+
+    def __getattr__(self, name: str) -> _GuardedMethod:
+        return _GuardedMethod(self._connector, (name,), self._is_async)
+
 
 # Create a single, reusable instance of the connector
-es_connector = ElasticsearchConnector()
-es_client = es_connector.get_client() if es_connector._instance else None
\ No newline at end of file
+es_connector = ElasticsearchConnector(os.getenv("ELASTIC_ENDPOINT"), os.getenv("ELASTIC_API_KEY"))
+es_client = GuardedClient(es_connector)
+es_async_client = GuardedClient(es_connector, is_async=True)
@@ -0,0 +1,99 @@
+# File: backend/app/infrastructure/storage/device_token_store.py
+# Description: Registry of FCM device registration tokens per user for the
+# Proactive Agent's notifications. A user may have several devices; a token
+# belongs to one user at a time (re-registering moves it).
+# State is kept in memory and, if DEVICE_TOKENS_FILE is set, persisted as JSON
+# shared by the workers: registrations made on one worker are seen by the others.
+
+import os
+import threading
+from typing import Iterable
+
+from app.infrastructure.storage.json_file import JsonFile
+
+DEVICE_TOKENS_FILE = os.getenv("DEVICE_TOKENS_FILE")
+
+
+class DeviceTokenStore:
+    """JSON-file-backed map of user id -> device tokens, with a reverse token index."""
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self._file = JsonFile(path, "DEVICE TOKENS")
+        self._lock = threading.Lock()
+        self._set_users(self._file.read())
+
+    def _set_users(self, users: dict[str, list[str]]):
+        self._users = users
+        self._owners = {token: user_id for user_id, tokens in users.items() for token in tokens}
+
+    def _refresh(self):
+        """Reloads the registry if another worker saved it (call with self._lock held)."""
+        if self._file.changed():
+            self._set_users(self._file.read())
+
+    def _save(self):
+        self._file.write(self._users)
+
+    def _remove_token(self, token: str):
+        user_id = self._owners.pop(token, None)
+        if user_id is None:
+            return
+        tokens = self._users.get(user_id, [])
+        if token in tokens:
+            tokens.remove(token)
+        if not tokens:
+            self._users.pop(user_id, None)
+
+    def register(self, user_id: str, token: str) -> int:
+        """Adds a device token for a user and returns the user's number of devices."""
+        with self._lock, self._file.locked():
+            self._refresh()
+            if self._owners.get(token) != user_id:
+                self._remove_token(token)
+                self._users.setdefault(user_id, []).append(token)
+                self._owners[token] = user_id
+                self._save()
+            return len(self._users[user_id])
+
+    def unregister(self, user_id: str, token: str | None = None) -> int:
+        """Removes one token of a user, or all of them if no token is given. Returns how many were removed."""
+        with self._lock, self._file.locked():
+            self._refresh()
+            tokens = [token] if token else list(self._users.get(user_id, []))
+            removed = 0
+            for t in tokens:
+                if self._owners.get(t) == user_id:
+                    self._remove_token(t)
+                    removed += 1
+            if removed:
+                self._save()
+            return removed
+
+    def prune(self, tokens: Iterable[str]) -> int:
+        """Removes tokens that FCM reported as invalid. Returns how many were removed."""
+        with self._lock, self._file.locked():
+            self._refresh()
+            removed = 0
+            for token in tokens:
+                if token in self._owners:
+                    self._remove_token(token)
+                    removed += 1
+            if removed:
+                self._save()
+            return removed
+
+    def tokens_for(self, user_ids: Iterable[str]) -> list[str]:
+        """All device tokens of the given users."""
+        with self._lock:
+            self._refresh()
+            return [token for user_id in user_ids for token in self._users.get(user_id, [])]
+
+    def count(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._owners)
+
+
+# Create a single, reusable store
+device_token_store = DeviceTokenStore(DEVICE_TOKENS_FILE)
@@ -0,0 +1,52 @@
+# File: backend/app/infrastructure/storage/feed_state_store.py
+# Description: Per-feed HTTP cache validators (ETag / Last-Modified) for the
+# Proactive Agent, so unchanged feeds are answered with a 304 instead of a full download.
+# State is kept in memory and, if NEWS_FEED_STATE_FILE is set, persisted as JSON
+# shared by the workers.
+
+import os
+import threading
+
+from app.infrastructure.storage.json_file import JsonFile
+
+NEWS_FEED_STATE_FILE = os.getenv("NEWS_FEED_STATE_FILE")
+
+
+class FeedStateStore:
+    """JSON-file-backed map of feed URL -> cache validators."""
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self._file = JsonFile(path, "FEED STATE")
+        self._lock = threading.Lock()
+        self._state: dict[str, dict] = self._file.read()
+
+    def reload(self):
+        """Rereads the file if a scan on another worker has written it since."""
+        with self._lock:
+            if self._file.changed():
+                self._state = self._file.read()
+
+    def conditional_headers(self, url: str) -> dict[str, str]:
+        """If-None-Match / If-Modified-Since headers from the validators stored for `url`."""
+        validators = self._state.get(url, {})
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        return headers
+
+    def update_validators(self, url: str, etag: str | None, last_modified: str | None):
+        """Stores the validators of a full (200) response; a response without any clears them."""
+        with self._lock, self._file.locked():
+            if self._file.changed():
+                self._state = self._file.read()
+            entry = self._state.setdefault(url, {})
+            entry["etag"] = etag
+            entry["last_modified"] = last_modified
+            self._file.write(self._state, ensure_ascii=False)
+
+
+# Create a single, reusable store
+feed_state_store = FeedStateStore(NEWS_FEED_STATE_FILE)
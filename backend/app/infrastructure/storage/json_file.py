@@ -0,0 +1,79 @@
+# File: backend/app/infrastructure/storage/json_file.py
+# Description: JSON file shared by the uvicorn workers, for the Proactive Agent's
+# small registries (device tokens, keywords, seen items, feed validators).
+# Readers reload the file once another worker has replaced it, and writers
+# reread, change and replace it while holding an exclusive flock on a lock
+# file beside it, so updates made on different workers are merged instead of
+# the last writer's copy overwriting the others.
+
+import json
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+
+class JsonFile:
+    """A JSON object persisted at `path`; without a path nothing is read or written."""
+
+    def __init__(self, path: str | None, label: str):
+        self.path = path
+        self.label = label  # log prefix, e.g. "DEVICE TOKENS"
+        self._signature = None  # (inode, mtime, size) of the file as last read or written here
+
+    def _stat(self) -> tuple | None:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def _make_directory(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def changed(self) -> bool:
+        """True if the file was written elsewhere since it was last read or written here."""
+        return bool(self.path) and self._stat() != self._signature
+
+    def read(self) -> dict:
+        if not self.path:
+            return {}
+        self._signature = self._stat()
+        if self._signature is None:
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[!] {self.label}: Could not read '{self.path}', starting empty: {e}")
+            return {}
+
+    def write(self, data: dict, **dump_kwargs):
+        """Replaces the file atomically; call while holding locked()."""
+        if not self.path:
+            return
+        self._make_directory()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, **dump_kwargs)
+        os.replace(tmp_path, self.path)
+        self._signature = self._stat()
+
+    @contextmanager
+    def locked(self):
+        """Holds the file's lock across processes for a read-change-write."""
+        if not self.path or fcntl is None:
+            yield
+            return
+        self._make_directory()
+        with open(f"{self.path}.lock", 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
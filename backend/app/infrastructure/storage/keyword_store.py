@@ -0,0 +1,86 @@
+# File: backend/app/infrastructure/storage/keyword_store.py
+# Description: Registry of opportunity keywords per subscriber (merchant) for the
+# Proactive Agent. The version number changes on every update, here or saved by
+# another worker, so the compiled keyword matcher knows when it must be rebuilt.
+# State is kept in memory and, if NEWS_KEYWORDS_FILE is set, persisted as JSON
+# shared by the workers.
+
+import os
+import threading
+
+from app.infrastructure.storage.json_file import JsonFile
+
+NEWS_KEYWORDS_FILE = os.getenv("NEWS_KEYWORDS_FILE")
+
+# Keywords that signify an opportunity for any SME; every scan matches them.
+DEFAULT_SUBSCRIBER = "default"
+DEFAULT_KEYWORDS = ["umkm", "peluang", "ekspor", "bantuan", "pameran", "bazar", "subsidi", "kredit usaha"]
+
+
+class KeywordStore:
+    """JSON-file-backed map of subscriber id -> keyword list."""
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self._file = JsonFile(path, "KEYWORDS")
+        self._lock = threading.Lock()
+        self._version = 0
+        self._set_subscribers(self._file.read())
+
+    def _set_subscribers(self, subscribers: dict[str, list[str]]):
+        subscribers.setdefault(DEFAULT_SUBSCRIBER, list(DEFAULT_KEYWORDS))
+        self._subscribers = subscribers
+
+    def _refresh(self):
+        """Reloads the registry if another worker saved it (call with self._lock held)."""
+        if self._file.changed():
+            self._set_subscribers(self._file.read())
+            self._version += 1
+
+    def _save(self):
+        self._file.write(self._subscribers, ensure_ascii=False)
+
+    @property
+    def version(self) -> int:
+        with self._lock:
+            self._refresh()
+            return self._version
+
+    def get_keywords(self, subscriber_id: str) -> list[str] | None:
+        with self._lock:
+            self._refresh()
+            keywords = self._subscribers.get(subscriber_id)
+            return list(keywords) if keywords is not None else None
+
+    def set_keywords(self, subscriber_id: str, keywords: list[str]) -> list[str]:
+        """Replaces a subscriber's keywords (trimmed, deduplicated, order kept) and returns them."""
+        cleaned = list(dict.fromkeys(k.strip() for k in keywords if k and k.strip()))
+        with self._lock, self._file.locked():
+            self._refresh()
+            self._subscribers[subscriber_id] = cleaned
+            self._version += 1
+            self._save()
+        return cleaned
+
+    def delete(self, subscriber_id: str) -> bool:
+        with self._lock, self._file.locked():
+            self._refresh()
+            if self._subscribers.pop(subscriber_id, None) is None:
+                return False
+            self._version += 1
+            self._save()
+        return True
+
+    def keyword_subscribers(self) -> tuple[int, dict[str, set[str]]]:
+        """Returns the current version and a map of keyword -> subscribers, read consistently."""
+        with self._lock:
+            self._refresh()
+            result: dict[str, set[str]] = {}
+            for subscriber_id, keywords in self._subscribers.items():
+                for keyword in keywords:
+                    result.setdefault(keyword.casefold(), set()).add(subscriber_id)
+            return self._version, result
+
+
+# Create a single, reusable store
+keyword_store = KeywordStore(NEWS_KEYWORDS_FILE)
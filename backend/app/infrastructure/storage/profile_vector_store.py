@@ -0,0 +1,189 @@
+# File: backend/app/infrastructure/storage/profile_vector_store.py
+# Description: Compact in-memory store of merchant profile embeddings for the
+# Proactive Agent's semantic matching. Vectors are L2-normalized and kept as
+# float16, or as int8 with one float32 scale per row (about 4x smaller than
+# float32), in contiguous arrays so all profiles can be scored with matrix
+# products. If MERCHANT_PROFILES_FILE is set, the store is persisted as .npz,
+# at most every MERCHANT_PROFILES_SAVE_DELAY_SECONDS (updates in between are
+# written together, off the request path) and at shutdown.
+# Updates never modify the arrays in place, so a snapshot stays consistent
+# while it is scored.
+
+import os
+import threading
+
+import numpy as np
+
+MERCHANT_PROFILES_FILE = os.getenv("MERCHANT_PROFILES_FILE")
+PROFILE_VECTOR_DTYPE = os.getenv("PROFILE_VECTOR_DTYPE", "int8")
+PROFILE_DIMENSIONS = 384  # paraphrase-multilingual-MiniLM-L12-v2
+MERCHANT_PROFILES_SAVE_DELAY_SECONDS = float(os.getenv("MERCHANT_PROFILES_SAVE_DELAY_SECONDS", "5"))
+
+
+def quantize_int8(vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 quantization; returns (codes, scales) with vectors ~= codes * scales."""
+    max_abs = np.maximum(np.abs(vectors).max(axis=1), 1e-12)
+    scales = (max_abs / 127.0).astype(np.float32)
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales
+
+
+class ProfileVectorStore:
+    """Merchant id -> normalized profile vector, stored as float16 or int8 rows."""
+
+    def __init__(self, path: str | None = None, dtype: str = PROFILE_VECTOR_DTYPE,
+                 dimensions: int = PROFILE_DIMENSIONS, save_delay: float = MERCHANT_PROFILES_SAVE_DELAY_SECONDS):
+        if dtype not in ('int8', 'float16'):
+            raise ValueError("Profile vector dtype must be 'int8' or 'float16'.")
+        self.path = path
+        self.dtype = dtype
+        self.dimensions = dimensions
+        self.save_delay = save_delay
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # one writer of the file at a time
+        self._save_timer: threading.Timer | None = None
+        self._dirty = False
+        self.ids: list[str] = []
+        self._rows: dict[str, int] = {}
+        self._vectors = np.zeros((0, dimensions), dtype=np.int8 if dtype == 'int8' else np.float16)
+        self._scales = np.zeros(0, dtype=np.float32)
+        self.version = 0
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # --- Persistence
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                vectors = data['vectors']
+                ids = [str(i) for i in data['ids']]
+                scales = data['scales'] if 'scales' in data else np.ones(len(ids), dtype=np.float32)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[!] PROFILES: Could not read '{self.path}', starting empty: {e}")
+            return
+        if vectors.ndim != 2 or vectors.shape[1] != self.dimensions:
+            print(f"[!] PROFILES: '{self.path}' has vectors of shape {vectors.shape}, ignoring it.")
+            return
+        self.ids = ids
+        self._rows = {merchant_id: row for row, merchant_id in enumerate(ids)}
+        if self.dtype == 'int8' and vectors.dtype != np.int8:
+            self._vectors, self._scales = quantize_int8(vectors.astype(np.float32) * scales[:, None])
+        elif self.dtype == 'float16' and vectors.dtype != np.float16:
+            self._vectors = (vectors.astype(np.float32) * scales[:, None]).astype(np.float16)
+            self._scales = np.ones(len(ids), dtype=np.float32)
+        else:
+            self._vectors, self._scales = vectors, scales.astype(np.float32)
+        print(f"[+] PROFILES: Loaded {len(ids)} merchant profiles ({self.dtype}).")
+
+    def _schedule_save(self):
+        """Marks the store changed and starts the save timer if none is pending (call with self._lock held)."""
+        if not self.path:
+            return
+        self._dirty = True
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(self.save_delay, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def flush(self):
+        """Writes pending changes to disk now; run by the save timer and at shutdown."""
+        with self._save_lock:
+            with self._lock:
+                if self._save_timer is not None:
+                    self._save_timer.cancel()
+                    self._save_timer = None
+                if not self._dirty:
+                    return
+                self._dirty = False
+                ids, vectors, scales = list(self.ids), self._vectors, self._scales
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                tmp_path = f"{self.path}.tmp.npz"
+                np.savez(tmp_path, ids=np.array(ids, dtype=str), vectors=vectors, scales=scales)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"[!] PROFILES: Could not save '{self.path}', retrying later: {e}")
+                with self._lock:
+                    self._schedule_save()
+
+    # --- Updates
+
+    def _encode(self, vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dimensions)
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        if self.dtype == 'int8':
+            return quantize_int8(vectors)
+        return vectors.astype(np.float16), np.ones(len(vectors), dtype=np.float32)
+
+    def upsert_many(self, merchant_ids: list[str], vectors: np.ndarray, persist: bool = True):
+        """Inserts or replaces the profile vectors of several merchants at once (on copies of the arrays)."""
+        codes, scales = self._encode(vectors)
+        with self._lock:
+            new_rows: dict[str, int] = {}
+            updated: dict[int, int] = {}  # stored row -> input row
+            for row, merchant_id in enumerate(merchant_ids):
+                existing = self._rows.get(merchant_id)
+                if existing is not None:
+                    updated[existing] = row
+                else:
+                    new_rows[merchant_id] = row
+            stored_vectors, stored_scales = self._vectors, self._scales
+            if updated:
+                stored_vectors, stored_scales = stored_vectors.copy(), stored_scales.copy()
+                stored_vectors[list(updated)] = codes[list(updated.values())]
+                stored_scales[list(updated)] = scales[list(updated.values())]
+            if new_rows:
+                self._rows.update({merchant_id: len(self.ids) + i for i, merchant_id in enumerate(new_rows)})
+                self.ids.extend(new_rows)
+                stored_vectors = np.concatenate([stored_vectors, codes[list(new_rows.values())]])
+                stored_scales = np.concatenate([stored_scales, scales[list(new_rows.values())]])
+            self._vectors, self._scales = stored_vectors, stored_scales
+            self.version += 1
+            if persist:
+                self._schedule_save()
+
+    def upsert(self, merchant_id: str, vector: np.ndarray):
+        self.upsert_many([merchant_id], vector)
+
+    def delete(self, merchant_id: str) -> bool:
+        """Removes a merchant by moving the last row into its slot (on copies of the arrays)."""
+        with self._lock:
+            row = self._rows.pop(merchant_id, None)
+            if row is None:
+                return False
+            last = len(self.ids) - 1
+            vectors, scales = self._vectors[:last].copy(), self._scales[:last].copy()
+            if row != last:
+                self.ids[row] = self.ids[last]
+                self._rows[self.ids[row]] = row
+                vectors[row] = self._vectors[last]
+                scales[row] = self._scales[last]
+            self.ids.pop()
+            self._vectors, self._scales = vectors, scales
+            self.version += 1
+            self._schedule_save()
+        return True
+
+    def __contains__(self, merchant_id: str) -> bool:
+        return merchant_id in self._rows
+
+    # --- Reads
+
+    def snapshot(self) -> tuple[list[str], np.ndarray, np.ndarray]:
+        """Consistent (ids, stored vectors, scales) view for scoring; arrays are not copied."""
+        with self._lock:
+            return list(self.ids), self._vectors, self._scales
+
+    def nbytes(self) -> int:
+        return int(self._vectors.nbytes + self._scales.nbytes)
+
+
+# Create a single, reusable store
+profile_vector_store = ProfileVectorStore(MERCHANT_PROFILES_FILE)
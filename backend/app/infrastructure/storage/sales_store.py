@@ -0,0 +1,307 @@
+# File: backend/app/infrastructure/storage/sales_store.py
+# Description: Optional per-merchant columnar store for the Operational Agent.
+# Each merchant (keyed by user_id) gets a directory holding:
+#   rows/part-NNNNNN.parquet                appended, deduplicated sales rows (one part per upload)
+#   state-NNNNNN/row_counts.parquet         multiset of row hashes already stored, for deduplication
+#   state-NNNNNN/rollups/*.parquet          product, day x product and order rollups
+#   manifest.json                           data version, its state directory and the cached
+#                                           statistics/forecast/insights
+# Re-uploading a growing sales history therefore only aggregates the new rows,
+# and re-analysing unchanged data is served from the cache.
+# An upload writes its part and a new state directory first and commits them by
+# replacing the manifest, so a crash midway leaves the previous version intact.
+# Stores written before state directories keep rollups/ and row_counts.parquet
+# at the top level until their next upload.
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.application.services.sales_analytics import DATE_COLUMN_CANDIDATES, find_column
+from app.application.services.sales_ingestion import OPTIONAL_COLUMNS, SALES_CSV_DTYPES, SalesAggregator
+
+# The store is disabled unless a directory is configured.
+SALES_STORE_DIR = os.getenv("SALES_STORE_DIR")
+
+ROLLUPS = ('products', 'daily_product', 'orders')
+
+# Bumped when row_hashes changes; stores hashed with an older version have their
+# row counts rebuilt from the stored rows on the next upload.
+ROW_HASH_VERSION = 2
+
+
+def canonical_days(values: pd.Series) -> np.ndarray:
+    """ISO day ("2024-02-28") of every value of a date column (strings or timestamps), "" if missing or invalid."""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.dt.strftime('%Y-%m-%d').fillna('').to_numpy(dtype=object)
+    # Parsed once per distinct value; code -1 (missing) picks the trailing "".
+    codes, uniques = pd.factorize(values)
+    days = pd.to_datetime(pd.Series(uniques, dtype=object), errors='coerce', format='mixed')
+    return np.append(days.dt.strftime('%Y-%m-%d').fillna('').to_numpy(dtype=object), '')[codes]
+
+
+def row_hashes(chunk: pd.DataFrame) -> np.ndarray:
+    """
+    Stable 64-bit hash of every row over the canonical sale fields: product name,
+    quantity and price as floats, and the day of the first date column. Other
+    columns (order ids, extra dates) and the upload format do not change the hash,
+    so re-uploading the same sales with a different layout is still deduplicated.
+    """
+    date_column = find_column(chunk.columns, DATE_COLUMN_CANDIDATES)
+    frame = pd.DataFrame({
+        'product_name': chunk['product_name'].astype(str).to_numpy(dtype=object),
+        'quantity': chunk['quantity'].to_numpy(dtype='float64'),
+        'price': chunk['price'].to_numpy(dtype='float64'),
+        'day': canonical_days(chunk[date_column]) if date_column else np.full(len(chunk), '', dtype=object),
+    })
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy(dtype=np.uint64)
+
+
+def part_schema(columns: Iterable[str]) -> pa.Schema:
+    """
+    Arrow schema of the stored rows of an upload with these columns. Optional
+    columns are always strings: inferred from the first chunk, a column that is
+    empty there would be typed null and reject the values of later chunks.
+    """
+    types = {column: pa.string() if dtype == 'category' else pa.from_numpy_dtype(np.dtype(dtype))
+             for column, dtype in SALES_CSV_DTYPES.items()}
+    return pa.schema([(column, types.get(column, pa.string())) for column in columns
+                      if column in SALES_CSV_DTYPES or column in OPTIONAL_COLUMNS])
+
+
+def stored_rows(chunk: pd.DataFrame, schema: pa.Schema) -> pa.Table:
+    """The chunk's rows as a table of the part's schema (dates from Parquet/Arrow uploads become strings)."""
+    conversions = {column: chunk[column].astype(str if column == 'product_name' else 'string')
+                   for column in schema.names if schema.field(column).type == pa.string()}
+    return pa.Table.from_pandas(chunk.assign(**conversions)[schema.names], schema=schema, preserve_index=False)
+
+
+def select_new_rows(hashes: np.ndarray, stored_counts: pd.Series,
+                    upload_counts: pd.Series) -> tuple[np.ndarray, pd.Series]:
+    """
+    Multiset deduplication: the k-th occurrence of a row in this upload is new
+    only if the store holds fewer than k copies of it. Identical rows within
+    one upload (two equal sales on the same day) are therefore preserved.
+    Returns the mask of new rows and the updated per-upload occurrence counts.
+    """
+    hash_series = pd.Series(hashes)
+    seen_before = upload_counts.reindex(hashes, fill_value=0).to_numpy()
+    occurrence = hash_series.groupby(hashes, sort=False).cumcount().to_numpy() + seen_before
+    stored = stored_counts.reindex(hashes, fill_value=0).to_numpy()
+    chunk_counts = hash_series.value_counts()
+    return occurrence >= stored, upload_counts.add(chunk_counts, fill_value=0).astype('int64')
+
+
+class SalesStore:
+    """Filesystem-backed per-merchant sales store with incremental rollups."""
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+        self._locks: dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        os.makedirs(root_dir, exist_ok=True)
+
+    # --- Layout helpers
+
+    def _user_dir(self, user_id: str) -> str:
+        safe = re.sub(r'[^A-Za-z0-9_.-]', '_', user_id)[:48]
+        digest = hashlib.sha256(user_id.encode('utf-8')).hexdigest()[:12]
+        return os.path.join(self.root_dir, f"{safe}-{digest}")
+
+    def _lock_for(self, user_id: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(user_id, threading.Lock())
+
+    @staticmethod
+    def _write_atomic(path: str, write):
+        tmp_path = f"{path}.tmp"
+        write(tmp_path)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _state_dir(user_dir: str, manifest: dict) -> str:
+        """Directory of the rollups and row counts committed with the manifest's data version."""
+        state = manifest.get("state")
+        return os.path.join(user_dir, state) if state else user_dir
+
+    def _load_manifest(self, user_dir: str) -> dict:
+        path = os.path.join(user_dir, 'manifest.json')
+        if not os.path.exists(path):
+            return {"version": 0, "total_rows": 0, "analysis": None, "row_hash_version": ROW_HASH_VERSION}
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_manifest(self, user_dir: str, manifest: dict):
+        def write(tmp_path):
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False)
+        self._write_atomic(os.path.join(user_dir, 'manifest.json'), write)
+
+    def _load_aggregator(self, state_dir: str) -> SalesAggregator:
+        aggregator = SalesAggregator()
+        for name in ROLLUPS:
+            path = os.path.join(state_dir, 'rollups', f"{name}.parquet")
+            if os.path.exists(path):
+                setattr(aggregator, name, pd.read_parquet(path))
+        return aggregator
+
+    def _save_aggregator(self, state_dir: str, aggregator: SalesAggregator):
+        os.makedirs(os.path.join(state_dir, 'rollups'), exist_ok=True)
+        for name in ROLLUPS:
+            rollup = getattr(aggregator, name)
+            if rollup is not None:
+                self._write_atomic(os.path.join(state_dir, 'rollups', f"{name}.parquet"),
+                                   lambda tmp_path: rollup.to_parquet(tmp_path))
+
+    def _load_row_counts(self, state_dir: str) -> pd.Series:
+        path = os.path.join(state_dir, 'row_counts.parquet')
+        if not os.path.exists(path):
+            return pd.Series(dtype='int64', index=pd.Index([], dtype=np.uint64))
+        table = pq.read_table(path)
+        return pd.Series(table.column('count').to_numpy(),
+                         index=pd.Index(table.column('hash').to_numpy()))
+
+    def _rebuild_row_counts(self, user_dir: str, version: int) -> pd.Series:
+        """Row hash counts recomputed from the parts of data versions up to `version` (after a ROW_HASH_VERSION change)."""
+        counts = pd.Series(dtype='int64', index=pd.Index([], dtype=np.uint64))
+        rows_dir = os.path.join(user_dir, 'rows')
+        for name in sorted(os.listdir(rows_dir)):
+            # Parts of an upload that crashed before its manifest was written are not part of the data.
+            match = re.fullmatch(r'part-(\d+)\.parquet', name)
+            if not match or int(match.group(1)) > version:
+                continue
+            for batch in pq.ParquetFile(os.path.join(rows_dir, name)).iter_batches():
+                counts = counts.add(pd.Series(row_hashes(batch.to_pandas())).value_counts(), fill_value=0)
+        return counts.astype('int64')
+
+    def _save_row_counts(self, state_dir: str, counts: pd.Series):
+        table = pa.table({'hash': pa.array(counts.index.to_numpy(dtype=np.uint64)),
+                          'count': pa.array(counts.to_numpy(dtype=np.int64))})
+        self._write_atomic(os.path.join(state_dir, 'row_counts.parquet'),
+                           lambda tmp_path: pq.write_table(table, tmp_path))
+
+    @staticmethod
+    def _remove_state(state_dir: str, user_dir: str):
+        """Deletes the rollups and row counts of a superseded data version."""
+        if state_dir != user_dir:
+            shutil.rmtree(state_dir, ignore_errors=True)
+            return
+        shutil.rmtree(os.path.join(user_dir, 'rollups'), ignore_errors=True)
+        if os.path.exists(os.path.join(user_dir, 'row_counts.parquet')):
+            os.remove(os.path.join(user_dir, 'row_counts.parquet'))
+
+    # --- Public API
+
+    def ingest(self, user_id: str, chunks: Iterable[pd.DataFrame]) -> dict:
+        """
+        Appends the rows of an upload that are not stored yet and folds only
+        those rows into the merchant's rollups. Returns the data version, row
+        counts and the aggregator over the merchant's full history.
+        """
+        user_dir = self._user_dir(user_id)
+        with self._lock_for(user_id):
+            os.makedirs(os.path.join(user_dir, 'rows'), exist_ok=True)
+            manifest = self._load_manifest(user_dir)
+            state_dir = self._state_dir(user_dir, manifest)
+            if manifest.get("row_hash_version", 1) == ROW_HASH_VERSION:
+                stored_counts = self._load_row_counts(state_dir)
+            else:
+                # A crash between these two writes only means rebuilding again next time.
+                stored_counts = self._rebuild_row_counts(user_dir, manifest["version"])
+                manifest["row_hash_version"] = ROW_HASH_VERSION
+                self._save_row_counts(state_dir, stored_counts)
+                self._save_manifest(user_dir, manifest)
+                print(f"[*] SALES STORE: '{user_id}' row hashes rebuilt for {len(stored_counts)} distinct rows.")
+            aggregator = self._load_aggregator(state_dir)
+
+            new_aggregator = SalesAggregator()
+            upload_counts = pd.Series(dtype='int64', index=pd.Index([], dtype=np.uint64))
+            new_rows = duplicate_rows = 0
+            part_path = os.path.join(user_dir, 'rows', f"part-{manifest['version'] + 1:06d}.parquet")
+            writer = schema = None
+            try:
+                for chunk in chunks:
+                    new_mask, upload_counts = select_new_rows(row_hashes(chunk), stored_counts, upload_counts)
+                    fresh = chunk[new_mask]
+                    duplicate_rows += len(chunk) - len(fresh)
+                    if fresh.empty:
+                        continue
+                    new_rows += len(fresh)
+                    new_aggregator.update(fresh)
+                    if writer is None:
+                        schema = part_schema(fresh.columns)
+                        writer = pq.ParquetWriter(f"{part_path}.tmp", schema)
+                    writer.write_table(stored_rows(fresh, schema))
+            except Exception:
+                if writer is not None:
+                    writer.close()
+                    os.remove(f"{part_path}.tmp")
+                raise
+
+            if writer is not None:
+                writer.close()
+                aggregator.merge(new_aggregator)
+                # After this upload the store holds max(stored, uploaded) copies of every row.
+                index = stored_counts.index.union(upload_counts.index)
+                stored_counts = pd.Series(
+                    np.maximum(stored_counts.reindex(index, fill_value=0).to_numpy(dtype=np.int64),
+                               upload_counts.reindex(index, fill_value=0).to_numpy(dtype=np.int64)),
+                    index=index)
+                # Everything of the new version is written before the manifest
+                # commits it; a leftover of a crashed upload is overwritten here.
+                new_state = f"state-{manifest['version'] + 1:06d}"
+                new_state_dir = os.path.join(user_dir, new_state)
+                shutil.rmtree(new_state_dir, ignore_errors=True)
+                self._save_aggregator(new_state_dir, aggregator)
+                self._save_row_counts(new_state_dir, stored_counts)
+                os.replace(f"{part_path}.tmp", part_path)
+                manifest["version"] += 1
+                manifest["state"] = new_state
+                manifest["total_rows"] += new_rows
+                manifest["updated_at"] = time.time()
+                self._save_manifest(user_dir, manifest)
+                self._remove_state(state_dir, user_dir)
+
+            print(f"[+] SALES STORE: '{user_id}' v{manifest['version']}: "
+                  f"{new_rows} new rows, {duplicate_rows} duplicates, {manifest['total_rows']} total.")
+            return {
+                "version": manifest["version"],
+                "new_rows": new_rows,
+                "duplicate_rows": duplicate_rows,
+                "total_rows": manifest["total_rows"],
+                "aggregator": aggregator,
+            }
+
+    def cached_analysis(self, user_id: str, version: int) -> dict | None:
+        """Returns the cached statistics, forecast and insights if they were computed for `version`."""
+        manifest = self._load_manifest(self._user_dir(user_id))
+        analysis = manifest.get("analysis")
+        if analysis and analysis.get("version") == version:
+            return analysis
+        return None
+
+    def save_analysis(self, user_id: str, version: int, statistics: dict, insights: str,
+                      forecast: dict | None = None):
+        """Caches the analysis of a data version, unless newer data arrived meanwhile."""
+        user_dir = self._user_dir(user_id)
+        with self._lock_for(user_id):
+            manifest = self._load_manifest(user_dir)
+            if manifest["version"] != version:
+                return
+            manifest["analysis"] = {"version": version, "statistics": statistics,
+                                   "forecast": forecast, "insights": insights}
+            self._save_manifest(user_dir, manifest)
+
+
+# Create a single, reusable store if one is configured
+sales_store = SalesStore(SALES_STORE_DIR) if SALES_STORE_DIR else None
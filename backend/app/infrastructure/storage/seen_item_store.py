@@ -0,0 +1,68 @@
+# File: backend/app/infrastructure/storage/seen_item_store.py
+# Description: Persistent index of feed items the Proactive Agent has already processed,
+# keyed per feed by a hash of the item's GUID (or link). Retention is bounded both
+# by age and by the number of entries kept per feed.
+# State is kept in memory and, if NEWS_SEEN_ITEMS_FILE is set, persisted as JSON
+# shared by the workers.
+
+import hashlib
+import os
+import threading
+import time
+from typing import Iterable
+
+from app.infrastructure.storage.json_file import JsonFile
+
+NEWS_SEEN_ITEMS_FILE = os.getenv("NEWS_SEEN_ITEMS_FILE")
+SEEN_ITEM_RETENTION_DAYS = float(os.getenv("NEWS_SEEN_ITEM_RETENTION_DAYS", "30"))
+SEEN_ITEMS_MAX_PER_FEED = int(os.getenv("NEWS_SEEN_ITEMS_MAX_PER_FEED", "5000"))
+
+
+def item_key(guid: str) -> str:
+    """Short, stable hash of an item's GUID or link."""
+    return hashlib.sha1(guid.encode('utf-8')).hexdigest()[:16]
+
+
+class SeenItemStore:
+    """JSON-file-backed map of feed name -> {item hash: first seen timestamp}."""
+
+    def __init__(self, path: str | None = None,
+                 retention_days: float = SEEN_ITEM_RETENTION_DAYS,
+                 max_per_feed: int = SEEN_ITEMS_MAX_PER_FEED):
+        self.path = path
+        self.retention_seconds = retention_days * 86400
+        self.max_per_feed = max_per_feed
+        self._file = JsonFile(path, "SEEN ITEMS")
+        self._lock = threading.Lock()
+        self._feeds: dict[str, dict[str, float]] = self._file.read()
+
+    def reload(self):
+        """Rereads the file if a scan on another worker has written it since."""
+        with self._lock:
+            if self._file.changed():
+                self._feeds = self._file.read()
+
+    def is_seen(self, feed_name: str, guid: str) -> bool:
+        return item_key(guid) in self._feeds.get(feed_name, {})
+
+    def mark_seen(self, feed_name: str, guids: Iterable[str]):
+        """Records items as processed and prunes entries past the retention limits."""
+        now = time.time()
+        with self._lock, self._file.locked():
+            if self._file.changed():
+                self._feeds = self._file.read()
+            seen = self._feeds.setdefault(feed_name, {})
+            for guid in guids:
+                seen.setdefault(item_key(guid), now)
+            cutoff = now - self.retention_seconds
+            # Dicts keep insertion order, so the oldest entries come first.
+            kept = [(key, ts) for key, ts in seen.items() if ts >= cutoff][-self.max_per_feed:]
+            self._feeds[feed_name] = dict(kept)
+            self._file.write(self._feeds)
+
+    def count(self, feed_name: str) -> int:
+        return len(self._feeds.get(feed_name, {}))
+
+
+# Create a single, reusable store
+seen_item_store = SeenItemStore(NEWS_SEEN_ITEMS_FILE)
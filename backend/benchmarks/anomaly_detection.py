@@ -0,0 +1,116 @@
+# File: backend/benchmarks/anomaly_detection.py
+# Description: Checks the store-wide anomalous-day detection and the restock
+# alerts of the Operational Agent's forecast on synthetic sales:
+#   - stationary noise (uniform daily revenue, no weekday pattern) must flag nothing,
+#   - a strong weekday pattern with one planted spike and one planted drop must
+#     flag both planted days,
+#   - a stationary catalogue (Poisson daily sales) must raise restock alerts for
+#     at most 1% of its products.
+# The false-positive rate on Gaussian noise and the share of products whose
+# doubled demand is alerted are reported for information.
+# Exits with status 1 if a check fails.
+#
+# Usage (from the backend directory):
+#   python -m benchmarks.anomaly_detection [--runs 300] [--days 60]
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from app.application.services.sales_forecasting import detect_anomalous_days, forecast_demand
+
+RESTOCK_MAX_FALSE_ALERTS = 0.01
+CATALOGUE_PRODUCTS = 200
+
+
+def flagged_runs(make_revenue, runs: int, days: int) -> list[tuple[int, list[dict]]]:
+    dates = pd.date_range("2024-01-01", periods=days, freq="D")
+    results = []
+    for seed in range(runs):
+        anomalies = detect_anomalous_days(dates, make_revenue(np.random.default_rng(seed), dates))
+        if anomalies:
+            results.append((seed, anomalies))
+    return results
+
+
+def uniform_noise(rng, dates):
+    return rng.uniform(500_000, 1_500_000, size=(len(dates), 1))
+
+
+def gaussian_noise(rng, dates):
+    return rng.normal(1_000_000, 150_000, size=(len(dates), 3))
+
+
+def planted_days(days: int) -> tuple[int, int]:
+    return days - 10, days - 25
+
+
+def seasonal_with_anomalies(rng, dates):
+    weekend = np.where(dates.dayofweek >= 5, 2.0, 1.0)
+    revenue = rng.normal(1_000_000, 100_000, size=len(dates)) * weekend
+    spike, drop = planted_days(len(dates))
+    revenue[spike] *= 2.5
+    revenue[drop] *= 0.3
+    return revenue[:, None]
+
+
+def restock_alerts(quantity: np.ndarray, dates: pd.DatetimeIndex) -> set[str]:
+    products = [f"product-{i}" for i in range(quantity.shape[1])]
+    daily_product = pd.DataFrame({"quantity": quantity.ravel(), "revenue": quantity.ravel() * 10_000},
+                                 index=pd.MultiIndex.from_product([dates, products]))
+    return {row["name"] for row in forecast_demand(daily_product)["restock_alerts"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="False positives and recall of the anomalous-day detection.")
+    parser.add_argument("--runs", type=int, default=300, help="Random series per scenario.")
+    parser.add_argument("--days", type=int, default=60, help="Days of history per series.")
+    args = parser.parse_args()
+    failed = False
+
+    noise = flagged_runs(uniform_noise, args.runs, args.days)
+    print(f"[*] Stationary uniform noise: {len(noise)}/{args.runs} series with anomalies flagged.")
+    for seed, anomalies in noise[:3]:
+        print(f"    seed {seed}: " + ", ".join(f"{a['date']} (z {a['z_score']})" for a in anomalies))
+    failed |= bool(noise)
+
+    gaussian = flagged_runs(gaussian_noise, args.runs, args.days)
+    print(f"[*] Gaussian noise: {len(gaussian)}/{args.runs} series with anomalies flagged (information only).")
+
+    dates = pd.date_range("2024-01-01", periods=args.days + 30, freq="D")
+    expected = {dates[day].strftime('%Y-%m-%d') for day in planted_days(len(dates))}
+    missed = 0
+    for seed in range(args.runs):
+        flagged = {a["date"] for a in detect_anomalous_days(
+            dates, seasonal_with_anomalies(np.random.default_rng(seed), dates))}
+        missed += len(expected - flagged)
+    print(f"[*] Weekday pattern with a planted spike and drop: {missed}/{2 * args.runs} planted days missed.")
+    failed |= bool(missed)
+
+    # Few catalogues are enough: each one scores CATALOGUE_PRODUCTS products.
+    catalogues = max(args.runs // 30, 1)
+    dates = pd.date_range("2024-01-01", periods=args.days + 30, freq="D")
+    false_alerts = doubled_alerts = 0
+    for seed in range(catalogues):
+        rng = np.random.default_rng(seed)
+        false_alerts += len(restock_alerts(rng.poisson(3, (len(dates), CATALOGUE_PRODUCTS)).astype(float), dates))
+        # Listed alerts are capped, so the rising products are checked a few at a time.
+        rate = np.full((len(dates), 5), 3.0)
+        rate[-14:] = 6.0
+        doubled_alerts += len(restock_alerts(rng.poisson(rate).astype(float), dates))
+    rate = false_alerts / (catalogues * CATALOGUE_PRODUCTS)
+    print(f"[*] Stationary catalogue: {false_alerts}/{catalogues * CATALOGUE_PRODUCTS} products "
+          f"with restock alerts ({rate:.1%}, limit {RESTOCK_MAX_FALSE_ALERTS:.0%}).")
+    print(f"[*] Demand doubled over the last two weeks: {doubled_alerts}/{catalogues * 5} products "
+          f"with restock alerts (information only).")
+    failed |= rate > RESTOCK_MAX_FALSE_ALERTS
+
+    if failed:
+        print("[!] Anomaly detection checks failed.")
+        raise SystemExit(1)
+    print("[+] Anomaly detection checks passed.")
+
+
+if __name__ == "__main__":
+    main()
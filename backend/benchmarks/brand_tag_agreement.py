@@ -0,0 +1,128 @@
+# File: backend/benchmarks/brand_tag_agreement.py
+# Description: Compares the Brand Agent's two tagging modes on a sample set of images:
+# Gemini tags (BRAND_TAG_MODE=gemini) vs. embedding-similarity tags (BRAND_TAG_MODE=embedding).
+# Reports per-image agreement (overlap and Jaccard) and latency for both paths.
+#
+# Usage (from the backend directory, with the usual .env and credentials):
+#   python -m benchmarks.brand_tag_agreement path/to/sample_images [--top-k 5] [--output results.json]
+
+import argparse
+import json
+import mimetypes
+import os
+import statistics
+import time
+
+from vertexai.generative_models import Part
+
+from app.api.v1.agent_brand import gemini_image_tags, get_image_embedding_bytes
+from app.application.services.visual_tag_service import load_tag_vocabulary
+
+SUPPORTED_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize_latencies(values: list[float]) -> dict:
+    if not values:
+        return {}
+    return {"mean_ms": statistics.fmean(values), "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95), "max_ms": max(values)}
+
+
+def compare_image(image_path: str, vocabulary, top_k: int) -> dict:
+    with open(image_path, "rb") as f:
+        image_bytes = f.read()
+    mime_type = mimetypes.guess_type(image_path)[0] or "image/png"
+
+    start = time.perf_counter()
+    gemini_tags = gemini_image_tags(Part.from_data(data=image_bytes, mime_type=mime_type))[:top_k]
+    gemini_ms = (time.perf_counter() - start) * 1000
+
+    # The image embedding is needed for the KNN search in both modes, so it is
+    # timed separately from the (local) tag inference.
+    start = time.perf_counter()
+    image_embedding = get_image_embedding_bytes(image_bytes)
+    embedding_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    embedding_tags = vocabulary.infer_tags(image_embedding, top_k=top_k) if image_embedding else []
+    inference_ms = (time.perf_counter() - start) * 1000
+
+    gemini_set, embedding_set = set(gemini_tags), set(embedding_tags)
+    union = gemini_set | embedding_set
+    in_vocabulary = gemini_set & set(vocabulary.tags)
+    return {
+        "image": os.path.basename(image_path),
+        "gemini_tags": gemini_tags,
+        "embedding_tags": embedding_tags,
+        "overlap": len(gemini_set & embedding_set),
+        "jaccard": len(gemini_set & embedding_set) / len(union) if union else 1.0,
+        # Gemini tags outside the KB vocabulary can never match the terms filter anyway.
+        "gemini_tags_in_vocabulary": len(in_vocabulary),
+        "gemini_ms": gemini_ms,
+        "image_embedding_ms": embedding_ms,
+        "local_inference_ms": inference_ms,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Gemini and embedding-based brand tags.")
+    parser.add_argument("image_dir")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--output", default="brand_tag_agreement.json")
+    args = parser.parse_args()
+
+    vocabulary = load_tag_vocabulary()
+    if vocabulary is None:
+        print("[!] Tag vocabulary not available. Run data_processing/embeddings/embed_and_index_visual_tags.py first.")
+        return
+
+    image_paths = sorted(
+        os.path.join(root, name)
+        for root, _, files in os.walk(args.image_dir)
+        for name in files if name.lower().endswith(SUPPORTED_EXTENSIONS)
+    )[:args.limit]
+    print(f"[*] Comparing tagging modes on {len(image_paths)} images (top_k={args.top_k})...")
+
+    results = []
+    for image_path in image_paths:
+        try:
+            result = compare_image(image_path, vocabulary, args.top_k)
+        except Exception as e:
+            print(f"[!] Skipping {image_path}: {e}")
+            continue
+        results.append(result)
+        print(f"    - {result['image']}: gemini={result['gemini_tags']} embedding={result['embedding_tags']} "
+              f"jaccard={result['jaccard']:.2f} gemini={result['gemini_ms']:.0f}ms local={result['local_inference_ms']:.2f}ms")
+
+    if not results:
+        print("[!] No images could be compared.")
+        return
+
+    summary = {
+        "images": len(results),
+        "top_k": args.top_k,
+        "vocabulary_size": len(vocabulary.tags),
+        "mean_overlap": statistics.fmean(r["overlap"] for r in results),
+        "mean_jaccard": statistics.fmean(r["jaccard"] for r in results),
+        "any_agreement_rate": sum(1 for r in results if r["overlap"]) / len(results),
+        "mean_gemini_tags_in_vocabulary": statistics.fmean(r["gemini_tags_in_vocabulary"] for r in results),
+        "gemini_latency": summarize_latencies([r["gemini_ms"] for r in results]),
+        "image_embedding_latency": summarize_latencies([r["image_embedding_ms"] for r in results]),
+        "local_inference_latency": summarize_latencies([r["local_inference_ms"] for r in results]),
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"summary": summary, "results": results}, f, indent=2, ensure_ascii=False)
+
+    print(json.dumps(summary, indent=2))
+    print(f"[+] Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
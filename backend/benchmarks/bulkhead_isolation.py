@@ -0,0 +1,167 @@
+# File: backend/benchmarks/bulkhead_isolation.py
+# Description: Checks that the bulkhead thread pools keep legal queries fast while
+# the brand agent is flooded. The app runs in-process with the local fakes from
+# benchmarks.fakes. A few workers send legal queries alone (baseline), then again
+# while many workers stream brand kits with slow Imagen calls (flooded).
+# Both phases run once with the bulkheads and once with every blocking call on
+# the shared default pool (BULKHEADS_ENABLED=false), each in a fresh subprocess.
+# Admission control is turned off so the flood actually reaches the thread pools.
+#
+# The check passes if the flooded legal p95 stays within --tolerance of the
+# baseline with the bulkheads on (exit status 1 otherwise). The shared-pool run
+# shows the starvation the bulkheads prevent.
+#
+# Usage (from the backend directory):
+#   python -m benchmarks.bulkhead_isolation [--seconds 15] [--legal-workers 4] [--brand-workers 64]
+#                                           [--imagen-ms 6000] [--tolerance 0.5] [--output results.json]
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.loadtest import LEGAL_QUESTIONS, percentile
+
+
+async def legal_probe(client: httpx.AsyncClient, workers: int, seconds: float) -> dict:
+    """Closed-loop legal queries for `seconds`; distinct texts so they are not coalesced."""
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker(n: int):
+        nonlocal errors
+        i = 0
+        while time.perf_counter() < deadline:
+            query = f"{LEGAL_QUESTIONS[(n + i) % len(LEGAL_QUESTIONS)]} ({n}-{i})"
+            i += 1
+            began = time.perf_counter()
+            response = await client.post("/api/v1/agent/legal/query", json={"query": query})
+            latencies.append((time.perf_counter() - began) * 1000)
+            errors += response.status_code != 200
+
+    await asyncio.gather(*(worker(n) for n in range(workers)))
+    return {"requests": len(latencies), "errors": errors,
+            "p50_ms": round(percentile(latencies, 50), 1), "p95_ms": round(percentile(latencies, 95), 1),
+            "max_ms": round(max(latencies), 1)}
+
+
+async def brand_flood(client: httpx.AsyncClient, workers: int, stop: asyncio.Event) -> int:
+    """Streams brand kits from `workers` concurrent clients until `stop` is set. Returns completed kits."""
+    image_bytes = b"\x89PNG\r\n\x1a\n" + random.Random(7).randbytes(200_000)
+    completed = 0
+
+    async def worker(n: int):
+        nonlocal completed
+        while not stop.is_set():
+            await client.post("/api/v1/agent/brand/generate_kit/stream", data={"business_name": f"Toko {n}"},
+                              files={"file": ("product.png", image_bytes, "image/png")})
+            completed += 1
+
+    tasks = [asyncio.create_task(worker(n)) for n in range(workers)]
+    await stop.wait()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return completed
+
+
+async def run_phases(args) -> dict:
+    from app import create_app
+    from app.core.bulkheads import bulkhead_stats
+
+    app = create_app()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bulkhead",
+                                 timeout=600) as client:
+        baseline = await legal_probe(client, args.legal_workers, args.seconds)
+
+        stop = asyncio.Event()
+        flood = asyncio.create_task(brand_flood(client, args.brand_workers, stop))
+        await asyncio.sleep(args.warmup)  # let the flood reach the slow Imagen calls
+        flooded = await legal_probe(client, args.legal_workers, args.seconds)
+        pools = bulkhead_stats()
+        stop.set()
+        brand_kits = await flood
+    return {"baseline": baseline, "flooded": flooded, "brand_kits_completed": brand_kits, "bulkheads": pools}
+
+
+def worker(args):
+    from benchmarks.fakes import DEFAULT_PROFILES, Fakes, ServiceProfile, install_fakes
+
+    profiles = dict(DEFAULT_PROFILES, imagen=ServiceProfile(args.imagen_ms, 0.1))
+    fakes = Fakes(profiles, seed=7)
+    install_fakes(fakes)
+    result = asyncio.run(run_phases(args))
+    print(json.dumps(result))
+
+
+def measure(mode: str, args) -> dict:
+    env = dict(os.environ, BULKHEADS_ENABLED="true" if mode == "bulkheads" else "false",
+               ADMISSION_CONTROL_ENABLED="false", PROACTIVE_SCHEDULER_ENABLED="false",
+               SALES_STORE_DIR="", NEWS_FEED_STATE_FILE="", NEWS_SEEN_ITEMS_FILE="", NEWS_KEYWORDS_FILE="",
+               MERCHANT_PROFILES_FILE="")
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bulkhead_isolation", "--worker",
+         "--seconds", str(args.seconds), "--warmup", str(args.warmup), "--legal-workers", str(args.legal_workers),
+         "--brand-workers", str(args.brand_workers), "--imagen-ms", str(args.imagen_ms)],
+        capture_output=True, text=True, env=env, cwd=os.path.join(os.path.dirname(__file__), ".."),
+    )
+    if completed.returncode != 0:
+        raise SystemExit(f"[!] {mode} run failed:\n{completed.stderr.strip()[-2000:]}")
+    # The app's own log lines share stdout with the result.
+    return json.loads(next(line for line in reversed(completed.stdout.splitlines()) if line.startswith("{")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Legal query latency while the brand agent is flooded.")
+    parser.add_argument("--seconds", type=float, default=15.0, help="Duration of each legal probe phase.")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Seconds between starting the flood and probing.")
+    parser.add_argument("--legal-workers", type=int, default=4)
+    parser.add_argument("--brand-workers", type=int, default=64)
+    parser.add_argument("--imagen-ms", type=float, default=6000, help="Median fake Imagen latency.")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="Allowed increase of the legal p95 under the flood with bulkheads (fraction).")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args)
+        return
+
+    results = {}
+    for mode in ("bulkheads", "shared_pool"):
+        print(f"[*] {mode}: {args.seconds:.0f} s of legal queries alone, then with "
+              f"{args.brand_workers} brand kit streams...")
+        result = results[mode] = measure(mode, args)
+        baseline, flooded = result["baseline"], result["flooded"]
+        print(f"    legal p50 {baseline['p50_ms']:>8.1f} -> {flooded['p50_ms']:>8.1f} ms, "
+              f"p95 {baseline['p95_ms']:>8.1f} -> {flooded['p95_ms']:>8.1f} ms, "
+              f"{baseline['requests']} -> {flooded['requests']} requests, "
+              f"{result['brand_kits_completed']} brand kits")
+        for name, pool in result["bulkheads"].items():
+            print(f"    {name:10s} {pool['active']:>3d}/{pool['threads']:<3d} threads busy, "
+                  f"{pool['queued']:>4d} queued (peak {pool['peak_queued']})")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"[+] Results saved to {args.output}")
+
+    isolated = results["bulkheads"]
+    growth = isolated["flooded"]["p95_ms"] / isolated["baseline"]["p95_ms"] - 1
+    if growth > args.tolerance:
+        print(f"[!] With bulkheads the legal p95 grew {growth:+.0%} under the brand flood "
+              f"(tolerance {args.tolerance:+.0%}).")
+        raise SystemExit(1)
+    print(f"[+] With bulkheads the legal p95 changed {growth:+.0%} under the brand flood "
+          f"(tolerance {args.tolerance:+.0%}).")
+
+
+if __name__ == "__main__":
+    main()
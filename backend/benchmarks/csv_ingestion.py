@@ -0,0 +1,144 @@
+# File: backend/benchmarks/csv_ingestion.py
+# Description: Benchmarks the Operational Agent's CSV ingestion on synthetic sales exports.
+# Compares the original whole-file path (read bytes -> decode -> StringIO -> read_csv)
+# with the chunked streaming path, reporting wall time and peak RSS for each size.
+# Each measurement runs in a fresh subprocess so peak RSS is not shared between runs.
+#
+# Usage (from the backend directory):
+#   python -m benchmarks.csv_ingestion [--rows 10000 100000 1000000 10000000] [--output results.json]
+
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_ROW_COUNTS = [10_000, 100_000, 1_000_000, 10_000_000]
+GENERATION_CHUNK_ROWS = 1_000_000
+PRODUCT_COUNT = 500
+
+
+def generate_sales_csv(path: str, rows: int, seed: int = 42):
+    """Writes a synthetic POS export with `rows` sales rows."""
+    rng = np.random.default_rng(seed)
+    products = np.array([f"Produk UMKM {i:04d}" for i in range(PRODUCT_COUNT)])
+    prices = rng.integers(5, 500, size=PRODUCT_COUNT) * 1000
+    written = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        while written < rows:
+            n = min(GENERATION_CHUNK_ROWS, rows - written)
+            product_idx = rng.integers(0, PRODUCT_COUNT, size=n)
+            chunk = pd.DataFrame({
+                "product_name": products[product_idx],
+                "quantity": rng.integers(1, 20, size=n),
+                "price": prices[product_idx],
+            })
+            chunk.to_csv(f, header=(written == 0), index=False)
+            written += n
+
+
+def peak_rss_mb() -> float:
+    # VmHWM is this process's own high-water mark; ru_maxrss can carry over the
+    # parent's peak across fork/exec, so it is only used where /proc is missing.
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS.
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / (1024 * 1024) if sys.platform == "darwin" else maxrss / 1024
+
+
+def run_legacy(path: str) -> dict:
+    """The original implementation of analyze_sales_data's statistics step."""
+    with open(path, "rb") as f:
+        contents = f.read()
+    df = pd.read_csv(io.StringIO(contents.decode('utf-8')))
+    df['revenue'] = df['quantity'] * df['price']
+    best_qty = df.loc[df['quantity'].idxmax()]
+    best_rev = df.loc[df['revenue'].idxmax()]
+    return {
+        "total_revenue": float(df['revenue'].sum()),
+        "total_items_sold": int(df['quantity'].sum()),
+        "best_selling_by_quantity": {"name": best_qty['product_name'], "quantity": int(best_qty['quantity'])},
+        "highest_revenue_product": {"name": best_rev['product_name'], "revenue": float(best_rev['revenue'])},
+    }
+
+
+def run_chunked(path: str) -> dict:
+    from app.application.services.sales_ingestion import analyze_sales_csv
+    with open(path, "rb") as f:
+        return analyze_sales_csv(f)
+
+
+def worker(mode: str, path: str):
+    # Import outside the timed section so both modes start from the same state.
+    import app.application.services.sales_ingestion  # noqa: F401
+    baseline_mb = peak_rss_mb()
+    start = time.perf_counter()
+    statistics = run_legacy(path) if mode == "legacy" else run_chunked(path)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "seconds": elapsed,
+        "peak_rss_mb": peak_rss_mb(),
+        "baseline_rss_mb": baseline_mb,
+        "total_revenue": statistics["total_revenue"],
+    }))
+
+
+def measure(mode: str, path: str) -> dict:
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.csv_ingestion", "--worker", mode, path],
+        capture_output=True, text=True, cwd=os.path.join(os.path.dirname(__file__), ".."),
+    )
+    if completed.returncode != 0:
+        return {"error": completed.stderr.strip().splitlines()[-1] if completed.stderr else "failed"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Operational Agent CSV ingestion.")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROW_COUNTS)
+    parser.add_argument("--modes", nargs="+", default=["legacy", "chunked"], choices=["legacy", "chunked"])
+    parser.add_argument("--output", default="csv_ingestion_benchmark.json")
+    parser.add_argument("--worker", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(*args.worker)
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for rows in args.rows:
+            path = os.path.join(tmp_dir, f"sales_{rows}.csv")
+            print(f"[*] Generating {rows:,} rows...")
+            generate_sales_csv(path, rows)
+            size_mb = os.path.getsize(path) / (1024 * 1024)
+            for mode in args.modes:
+                result = {"rows": rows, "file_mb": size_mb, "mode": mode, **measure(mode, path)}
+                results.append(result)
+                if "error" in result:
+                    print(f"    - {mode:8s} {rows:>11,} rows: FAILED ({result['error']})")
+                else:
+                    print(f"    - {mode:8s} {rows:>11,} rows ({size_mb:7.1f} MB): "
+                          f"{result['seconds']:7.2f}s, peak RSS {result['peak_rss_mb']:8.1f} MB")
+            os.remove(path)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"[+] Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
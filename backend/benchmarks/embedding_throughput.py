@@ -0,0 +1,174 @@
+# File: backend/benchmarks/embedding_throughput.py
+# Description: Benchmarks the MiniLM sentence embedding model (the one saved by
+# download_model.py) across batch sizes, text lengths, torch thread counts and
+# inference backends. Reports encode throughput, per-batch latency, model load
+# time and peak RSS. Each (backend, threads) combination runs in a fresh
+# subprocess, so load time and peak RSS are not shared between runs, and the
+# Hugging Face libraries are forced offline.
+#
+# Text lengths mirror the app's inputs: short user queries, a full Pasal (legal
+# chunk) and a full marketing article. The model truncates inputs to its
+# max_seq_length (128 tokens), so long texts measure the truncated cost; the
+# report includes the share of texts that were truncated.
+#
+# Usage (from the backend directory):
+#   python -m benchmarks.embedding_throughput [--model embedding_model_files] [--backends torch onnx openvino]
+#                                             [--threads 1 2 4 8] [--batch-sizes 1 8 32 64 128]
+#                                             [--texts 512] [--output results.json]
+
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.csv_ingestion import peak_rss_mb
+
+DEFAULT_MODEL_PATHS = ["/app/embedding_model_files", "embedding_model_files", "../backend/embedding_model_files"]
+DEFAULT_BATCH_SIZES = [1, 8, 32, 64, 128]
+DEFAULT_THREADS = [1, 2, 4, os.cpu_count() or 4]
+
+# Approximate word counts of the app's inputs.
+TEXT_KINDS = {"query": 12, "pasal": 180, "article": 900}
+
+VOCABULARY = (
+    "usaha mikro kecil menengah pelaku izin berusaha nomor induk pajak penghasilan peraturan pemerintah "
+    "pasal ayat undang-undang kewajiban hak pemerintah daerah sertifikat halal produk pangan kemasan label "
+    "pemasaran promosi media sosial pelanggan penjualan harga diskon konten video merek strategi digital "
+    "toko online pembeli ulasan kualitas layanan pengiriman modal pinjaman koperasi ekspor pameran"
+).split()
+
+
+def make_texts(kind: str, count: int, seed: int = 3) -> list[str]:
+    """Deterministic pseudo-Indonesian texts of roughly the word count of `kind`."""
+    rng = random.Random(f"{seed}-{kind}")
+    words = TEXT_KINDS[kind]
+    texts = []
+    for i in range(count):
+        length = max(3, int(rng.gauss(words, words * 0.2)))
+        text = " ".join(rng.choice(VOCABULARY) for _ in range(length))
+        texts.append(f"Pasal {i + 1}. {text}." if kind == "pasal" else text)
+    return texts
+
+
+def resolve_model_path(path: str | None) -> str:
+    for candidate in ([path] if path else DEFAULT_MODEL_PATHS):
+        if candidate and os.path.isdir(candidate):
+            return os.path.abspath(candidate)
+    raise SystemExit(f"[!] Model directory not found ({path or ', '.join(DEFAULT_MODEL_PATHS)}). "
+                     "Run download_model.py from the repository root first.")
+
+
+def worker(backend: str, threads: int, model_path: str, batch_sizes: list[int], text_count: int):
+    """Loads the model once with the given backend/threads and times every (text kind, batch size)."""
+    start = time.perf_counter()
+    import torch
+    torch.set_num_threads(threads)
+    from sentence_transformers import SentenceTransformer
+    import_seconds = time.perf_counter() - start
+
+    baseline_mb = peak_rss_mb()
+    start = time.perf_counter()
+    model = (SentenceTransformer(model_path, device="cpu") if backend == "torch"
+             else SentenceTransformer(model_path, device="cpu", backend=backend))
+    load_seconds = time.perf_counter() - start
+    loaded_mb = peak_rss_mb()
+
+    runs = []
+    for kind in TEXT_KINDS:
+        texts = make_texts(kind, text_count)
+        token_counts = [len(ids) for ids in model.tokenizer(texts, add_special_tokens=True)["input_ids"]]
+        truncated = sum(count > model.max_seq_length for count in token_counts) / len(texts)
+        for batch_size in batch_sizes:
+            model.encode(texts[:batch_size], batch_size=batch_size)  # warm-up
+            latencies = []
+            begin = time.perf_counter()
+            for offset in range(0, len(texts), batch_size):
+                batch_start = time.perf_counter()
+                model.encode(texts[offset:offset + batch_size], batch_size=batch_size)
+                latencies.append((time.perf_counter() - batch_start) * 1000)
+            elapsed = time.perf_counter() - begin
+            latencies.sort()
+            runs.append({
+                "text_kind": kind,
+                "batch_size": batch_size,
+                "texts": len(texts),
+                "mean_tokens": round(statistics.fmean(token_counts), 1),
+                "truncated_share": round(truncated, 3),
+                "texts_per_second": round(len(texts) / elapsed, 1),
+                "batch_p50_ms": round(latencies[len(latencies) // 2], 2),
+                "batch_p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2),
+            })
+    print(json.dumps({
+        "import_seconds": round(import_seconds, 2),
+        "load_seconds": round(load_seconds, 2),
+        "baseline_rss_mb": round(baseline_mb, 1),
+        "loaded_rss_mb": round(loaded_mb, 1),
+        "model_rss_mb": round(loaded_mb - baseline_mb, 1),  # excludes the interpreter and imports
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "torch_version": torch.__version__,
+        "runs": runs,
+    }))
+
+
+def measure(backend: str, threads: int, model_path: str, batch_sizes: list[int], text_count: int) -> dict:
+    env = dict(os.environ, HF_HUB_OFFLINE="1", TRANSFORMERS_OFFLINE="1",
+               OMP_NUM_THREADS=str(threads), MKL_NUM_THREADS=str(threads), TOKENIZERS_PARALLELISM="false")
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.embedding_throughput", "--worker", backend, str(threads), model_path,
+         "--batch-sizes", *map(str, batch_sizes), "--texts", str(text_count)],
+        capture_output=True, text=True, env=env, cwd=os.path.join(os.path.dirname(__file__), ".."),
+    )
+    if completed.returncode != 0:
+        return {"error": completed.stderr.strip().splitlines()[-1] if completed.stderr else "failed"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding model encode throughput offline.")
+    parser.add_argument("--model", default=None, help="Directory saved by download_model.py.")
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "openvino"],
+                        choices=["torch", "onnx", "openvino"])
+    parser.add_argument("--threads", type=int, nargs="+", default=sorted(set(DEFAULT_THREADS)))
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=DEFAULT_BATCH_SIZES)
+    parser.add_argument("--texts", type=int, default=512, help="Texts encoded per (text kind, batch size).")
+    parser.add_argument("--output", default="embedding_benchmark.json")
+    parser.add_argument("--worker", nargs=3, metavar=("BACKEND", "THREADS", "MODEL"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        backend, threads, model_path = args.worker
+        worker(backend, int(threads), model_path, args.batch_sizes, args.texts)
+        return
+
+    model_path = resolve_model_path(args.model)
+    print(f"[*] Model: {model_path}")
+    results = []
+    for backend in args.backends:
+        for threads in args.threads:
+            print(f"[*] {backend}, {threads} thread(s)...")
+            result = {"backend": backend, "threads": threads,
+                      **measure(backend, threads, model_path, args.batch_sizes, args.texts)}
+            results.append(result)
+            if "error" in result:
+                # ONNX / OpenVINO need sentence-transformers>=3.2 with optimum installed.
+                print(f"    - unavailable: {result['error']}")
+                continue
+            print(f"    - load {result['load_seconds']:.2f}s, model {result['model_rss_mb']:.0f} MB, "
+                  f"RSS {result['loaded_rss_mb']:.0f} MB after load, "
+                  f"peak {result['peak_rss_mb']:.0f} MB")
+            for run in result["runs"]:
+                print(f"      {run['text_kind']:8s} batch {run['batch_size']:>4d}: {run['texts_per_second']:>8.1f} texts/s, "
+                      f"batch p50 {run['batch_p50_ms']:>8.2f} ms, p95 {run['batch_p95_ms']:>8.2f} ms "
+                      f"({run['mean_tokens']:.0f} tokens, {run['truncated_share']:.0%} truncated)")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"model": model_path, "results": results}, f, indent=2)
+    print(f"[+] Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,432 @@
+# File: backend/benchmarks/fakes.py
+# Description: Deterministic local stand-ins for the paid cloud services the
+# backend calls: Gemini, the sentence-transformers and Vertex multimodal embedding
+# models, Imagen, Elasticsearch, the GCS logo bucket and FCM. Each fake has a
+# configurable latency distribution and error rate, and answers with data shaped
+# like the real service's so the whole request path runs unchanged.
+#
+# install_fakes() injects them through the seams the app already has:
+#   - app.core.models (embedding_model, gemini_model, gemini_flash_model), registered before the app is imported
+#   - the Elasticsearch connector's lazily created clients
+#   - the Brand Agent's imagen_model / bucket / embedding_model handles
+#   - notification_service.default_backend (the firebase_admin.messaging wrapper)
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import sys
+import threading
+import time
+import types
+import zlib
+from dataclasses import dataclass
+
+import numpy as np
+
+from benchmarks.fcm_delivery import UnregisteredError
+
+TEXT_EMBEDDING_DIMS = 384        # paraphrase-multilingual-MiniLM-L12-v2
+IMAGE_EMBEDDING_DIMS = 1408      # multimodalembedding@001
+VISUAL_TAGS = ["food", "drink", "bottle", "spicy", "sweet", "traditional", "modern", "coffee", "snack",
+               "batik", "craft", "wood", "red", "green", "natural", "packaging", "organic", "fashion"]
+
+
+class InjectedFault(Exception):
+    """Failure injected by a fake service (its error rate)."""
+
+
+@dataclass
+class ServiceProfile:
+    """
+    Latency distribution and error rate of one fake service. Latencies are
+    log-normal around `median_ms` (`sigma` 0 gives a fixed latency), which
+    matches the long right tail of real API calls.
+    """
+    median_ms: float
+    sigma: float = 0.3
+    error_rate: float = 0.0
+
+    @classmethod
+    def parse(cls, text: str) -> "ServiceProfile":
+        """`median_ms[:sigma[:error_rate]]`, e.g. `900:0.4:0.01`."""
+        parts = [float(p) for p in text.split(":")]
+        return cls(*parts)
+
+
+DEFAULT_PROFILES = {
+    "gemini": ServiceProfile(900, 0.4),          # per generate_content call (streams spread it over chunks)
+    "gemini_flash": ServiceProfile(300, 0.4),
+    "embedding": ServiceProfile(15, 0.2),        # per sentence-transformers batch
+    "vertex_embedding": ServiceProfile(180, 0.3),
+    "imagen": ServiceProfile(4000, 0.25),
+    "elasticsearch": ServiceProfile(12, 0.5),    # per search; msearch adds 20% per extra search
+    "gcs": ServiceProfile(120, 0.4),
+    "fcm": ServiceProfile(100, 0.3),
+}
+
+
+class FakeService:
+    """Seeded latency and fault sampling shared by the fakes (thread-safe)."""
+
+    def __init__(self, name: str, profile: ServiceProfile, seed: int):
+        self.name = name
+        self.profile = profile
+        self._rng = random.Random(f"{seed}-{name}")
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.faults = 0
+
+    def sample(self, scale: float = 1.0) -> float:
+        """Draws one call's latency in seconds and raises InjectedFault at the error rate."""
+        with self._lock:
+            self.calls += 1
+            latency = self.profile.median_ms / 1000 * math.exp(self._rng.gauss(0, self.profile.sigma)) * scale
+            failed = self._rng.random() < self.profile.error_rate
+            if failed:
+                self.faults += 1
+        if failed:
+            raise InjectedFault(f"{self.name}: injected failure")
+        return latency
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "faults": self.faults, "median_ms": self.profile.median_ms,
+                "sigma": self.profile.sigma, "error_rate": self.profile.error_rate}
+
+
+def stable_vector(key: str, dims: int) -> np.ndarray:
+    """Deterministic unit vector for a text, so identical inputs embed identically across runs."""
+    rng = np.random.default_rng(zlib.crc32(key.encode("utf-8")))
+    vector = rng.standard_normal(dims).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+# --- Gemini
+
+@dataclass
+class FakeUsage:
+    prompt_token_count: int
+    candidates_token_count: int
+
+
+@dataclass
+class FakeGeminiResponse:
+    text: str
+    usage_metadata: FakeUsage
+
+
+LEGAL_HINTS = ("izin", "pajak", "hukum", "legal", "law", "permit", "license", "tax", "nib", "halal", "regulation")
+
+
+def fake_brand_kit() -> dict:
+    return {
+        "image_analysis": {"labels": ["packaged snack", "bottle", "traditional", "spicy", "red label"],
+                           "dominant_colors": ["deep red", "cream", "forest green"]},
+        "brand_identity": {
+            "suggested_names": ["Rasa Nusantara", "Pedas Mantap", "Dapur Ibu"],
+            "suggested_taglines": ["Taste of home in every bite", "Spice that tells a story"],
+            "logo_concepts_desc": ["A chili pepper forming a smile inside a circle",
+                                   "A minimalist clay pot with rising steam lines"],
+            "instagram_bio": "Homemade Indonesian sambal, small batch, big flavour. Order via DM!",
+        },
+    }
+
+
+class FakeGenerativeModel:
+    """Stand-in for vertexai GenerativeModel: answers by prompt type with token usage metadata."""
+
+    STREAM_CHUNKS = 24
+
+    def __init__(self, service: FakeService):
+        self.service = service
+
+    @staticmethod
+    def _prompt_text(contents) -> str:
+        if isinstance(contents, str):
+            return contents
+        return " ".join(part for part in contents if isinstance(part, str))
+
+    def _answer(self, prompt: str) -> str:
+        if "routing agent" in prompt:
+            query = prompt.rsplit("User's query:", 1)[-1].lower()
+            return "LEGAL" if any(hint in query for hint in LEGAL_HINTS) else "MARKETING"
+        if "comma-separated list" in prompt:
+            return "food, bottle, spicy, traditional, red"
+        if "brand kit" in prompt:
+            return json.dumps(fake_brand_kit())
+        if "business analyst" in prompt:
+            return ("1. Revenue is concentrated in a few products.\n2. Weekend demand is higher.\n"
+                    "Recommendation: restock the top sellers before Friday.")
+        digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8]
+        return f"Based on the provided context, here is a concise answer (ref {digest}). " * 6
+
+    def generate_content(self, contents, generation_config=None, stream: bool = False, **kwargs):
+        prompt = self._prompt_text(contents)
+        latency = self.service.sample()
+        text = self._answer(prompt)
+        prompt_tokens = len(prompt) // 4 + (258 if not isinstance(contents, str) else 0)  # + image tokens
+        if not stream:
+            time.sleep(latency)
+            return FakeGeminiResponse(text, FakeUsage(prompt_tokens, len(text) // 4))
+        return self._stream(text, prompt_tokens, latency)
+
+    def _stream(self, text: str, prompt_tokens: int, latency: float):
+        # A third of the latency before the first chunk, the rest spread over the chunks.
+        time.sleep(latency / 3)
+        size = max(1, math.ceil(len(text) / self.STREAM_CHUNKS))
+        for start in range(0, len(text), size):
+            time.sleep(latency * 2 / 3 / self.STREAM_CHUNKS)
+            yield FakeGeminiResponse(text[start:start + size], FakeUsage(prompt_tokens, (start + size) // 4))
+
+
+# --- Embedding models
+
+class FakeSentenceTransformer:
+    """
+    Stand-in for SentenceTransformer.encode. The latency is paid per batch of
+    `batch_size` texts; unlike the real model, sleeping releases the GIL, so CPU
+    contention between encode calls and the event loop is not reproduced.
+    """
+
+    def __init__(self, service: FakeService, dims: int = TEXT_EMBEDDING_DIMS):
+        self.service = service
+        self.dims = dims
+
+    def encode(self, sentences, batch_size: int = 32, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        time.sleep(sum(self.service.sample() for _ in range(max(1, math.ceil(len(texts) / batch_size)))))
+        vectors = np.stack([stable_vector(text, self.dims) for text in texts])
+        return vectors[0] if single else vectors
+
+
+@dataclass
+class FakeMultiModalEmbeddings:
+    image_embedding: list[float]
+
+
+class FakeMultiModalEmbeddingModel:
+    """Stand-in for vertexai MultiModalEmbeddingModel.get_embeddings(image=...)."""
+
+    def __init__(self, service: FakeService):
+        self.service = service
+
+    def get_embeddings(self, image=None, **kwargs):
+        time.sleep(self.service.sample())
+        data = getattr(image, "_image_bytes", None) or b""
+        return FakeMultiModalEmbeddings(stable_vector(hashlib.sha1(data).hexdigest(), IMAGE_EMBEDDING_DIMS).tolist())
+
+
+# --- Imagen and GCS
+
+@dataclass
+class FakeGeneratedImage:
+    _image_bytes: bytes
+
+
+class FakeImageGenerationModel:
+    """Stand-in for Imagen: returns PNG-sized random bytes."""
+
+    def __init__(self, service: FakeService, image_bytes: int = 300_000):
+        self.service = service
+        self.image_bytes = image_bytes
+
+    def generate_images(self, prompt: str, number_of_images: int = 1, **kwargs):
+        time.sleep(self.service.sample())
+        seed = zlib.crc32(prompt.encode("utf-8"))
+        return [FakeGeneratedImage(b"\x89PNG\r\n\x1a\n" + random.Random(seed + i).randbytes(self.image_bytes))
+                for i in range(number_of_images)]
+
+
+class FakeBlob:
+    def __init__(self, bucket: "FakeBucket", name: str):
+        self.bucket = bucket
+        self.name = name
+
+    def upload_from_string(self, data: bytes, content_type: str | None = None):
+        # Upload time grows with the payload: the median is for a 300 KB logo.
+        time.sleep(self.bucket.service.sample(scale=max(0.2, len(data) / 300_000)))
+        with self.bucket.lock:
+            self.bucket.uploaded_bytes += len(data)
+
+    @property
+    def public_url(self) -> str:
+        return f"https://storage.googleapis.com/{self.bucket.name}/{self.name}"
+
+
+class FakeBucket:
+    def __init__(self, service: FakeService, name: str = "loadtest-bucket"):
+        self.service = service
+        self.name = name
+        self.lock = threading.Lock()
+        self.uploaded_bytes = 0
+
+    def blob(self, name: str) -> FakeBlob:
+        return FakeBlob(self, name)
+
+
+# --- Elasticsearch
+
+class FakeElasticsearch:
+    """
+    Stand-in for the sync Elasticsearch client's search/msearch/ping. Hits are
+    shaped per index (legal chunks, marketing articles, visual KB, visual tags).
+    Injected faults are raised as TimeoutError, which the connector counts as a
+    cluster failure, so the circuit breaker reacts as it would in production.
+    """
+
+    def __init__(self, service: FakeService):
+        self.service = service
+
+    def options(self, **kwargs):
+        return self
+
+    def _latency(self, searches: int = 1) -> float:
+        try:
+            return self.service.sample(scale=1 + 0.2 * (searches - 1))
+        except InjectedFault as e:
+            raise TimeoutError(str(e)) from None
+
+    @staticmethod
+    def _hits(index: str | None, count: int) -> list[dict]:
+        hits = []
+        for i in range(count):
+            score = round(1.0 / (1 + i), 4)
+            if index == "umkm_legal_docs":
+                source = {"chunk_id": f"uu-11-2020-pasal-{i + 1}", "chapter_title": "BAB III Perizinan Berusaha",
+                          "text": "Pelaku usaha mikro dan kecil wajib memiliki Nomor Induk Berusaha (NIB). " * 8}
+            elif index == "umkm_marketing_kb":
+                source = {"title": f"Marketing article {i + 1}", "url": f"https://example.test/marketing/{i + 1}",
+                          "content": "Use short-form video and customer testimonials to build trust. " * 10}
+            elif index == "umkm_visual_kb":
+                source = {"category": "logo", "file_path": f"visual_kb/logo_{i + 1}.png",
+                          "tags": VISUAL_TAGS[i % len(VISUAL_TAGS):][:3]}
+            elif index == "umkm_visual_tags":
+                tag = VISUAL_TAGS[i]
+                source = {"tag": tag, "embedding": stable_vector(f"tag:{tag}", IMAGE_EMBEDDING_DIMS).tolist()}
+            else:
+                source = {}
+            hits.append({"_index": index, "_id": str(i), "_score": score, "_source": source})
+        return hits
+
+    @classmethod
+    def _response(cls, index: str | None, body: dict | None, knn: dict | None, size: int | None) -> dict:
+        body = body or {}
+        knn = knn or body.get("knn") or {}
+        if index == "umkm_visual_tags":
+            count = len(VISUAL_TAGS)
+        else:
+            count = size if size is not None else body.get("size", knn.get("k", 10))
+        hits = cls._hits(index, count)
+        return {"took": 3, "timed_out": False, "hits": {"total": {"value": len(hits)}, "hits": hits}}
+
+    def search(self, index: str | None = None, body: dict | None = None, knn: dict | None = None,
+               size: int | None = None, **kwargs):
+        time.sleep(self._latency())
+        return self._response(index, body, knn, size)
+
+    def msearch(self, searches: list[dict], **kwargs):
+        pairs = list(zip(searches[::2], searches[1::2]))
+        time.sleep(self._latency(len(pairs)))
+        return {"took": 5, "responses": [self._response(header.get("index"), body, None, None)
+                                         for header, body in pairs]}
+
+    def ping(self, **kwargs) -> bool:
+        return True
+
+    def close(self):
+        pass
+
+
+class FakeAsyncElasticsearch(FakeElasticsearch):
+    """Async variant of FakeElasticsearch (the connector's httpx client)."""
+
+    async def search(self, index: str | None = None, body: dict | None = None, knn: dict | None = None,
+                     size: int | None = None, **kwargs):
+        await asyncio.sleep(self._latency())
+        return self._response(index, body, knn, size)
+
+    async def msearch(self, searches: list[dict], **kwargs):
+        pairs = list(zip(searches[::2], searches[1::2]))
+        await asyncio.sleep(self._latency(len(pairs)))
+        return {"took": 5, "responses": [self._response(header.get("index"), body, None, None)
+                                         for header, body in pairs]}
+
+    async def ping(self, **kwargs) -> bool:
+        return True
+
+    async def close(self):
+        pass
+
+
+# --- FCM
+
+class FakeMessaging:
+    """Messaging backend (see notification_service.MessagingBackend) with sampled latency and failures."""
+
+    def __init__(self, service: FakeService, invalid_tokens: set[str] | None = None):
+        self.service = service
+        self.invalid_tokens = invalid_tokens or set()
+
+    def send_multicast(self, notification, tokens):
+        time.sleep(self.service.sample(scale=1 + len(tokens) / 500))
+        return [UnregisteredError("Requested entity was not found.") if token in self.invalid_tokens else None
+                for token in tokens]
+
+    def send_to_topic(self, notification, topic):
+        time.sleep(self.service.sample())
+        return f"projects/loadtest/messages/{self.service.calls}"
+
+
+# --- Installation
+
+class Fakes:
+    """All fake services of one run, created from per-service profiles."""
+
+    def __init__(self, profiles: dict[str, ServiceProfile], seed: int = 7):
+        self.services = {name: FakeService(name, profile, seed) for name, profile in profiles.items()}
+        self.gemini = FakeGenerativeModel(self.services["gemini"])
+        self.gemini_flash = FakeGenerativeModel(self.services["gemini_flash"])
+        self.embedding = FakeSentenceTransformer(self.services["embedding"])
+        self.vertex_embedding = FakeMultiModalEmbeddingModel(self.services["vertex_embedding"])
+        self.imagen = FakeImageGenerationModel(self.services["imagen"])
+        self.bucket = FakeBucket(self.services["gcs"])
+        self.elasticsearch = FakeElasticsearch(self.services["elasticsearch"])
+        self.async_elasticsearch = FakeAsyncElasticsearch(self.services["elasticsearch"])
+        self.messaging = FakeMessaging(self.services["fcm"])
+
+    def stats(self) -> dict:
+        return {name: service.stats() for name, service in self.services.items()}
+
+
+def install_fakes(fakes: Fakes):
+    """
+    Wires the fakes into the app. Must run before `app` is imported: the
+    services bind `embedding_model` / `gemini_model` from app.core.models at
+    import time, so a fake module is registered in its place (this also skips
+    loading the real embedding model and initializing Vertex AI).
+    """
+    if "app.core.models" in sys.modules:
+        raise RuntimeError("install_fakes() must run before the app is imported.")
+    models = types.ModuleType("app.core.models")
+    models.__file__ = __file__
+    models.GCP_PROJECT_ID, models.GCP_LOCATION = "loadtest", "local"
+    models.EMBEDDING_MODEL_NAME = "fake-sentence-transformer"
+    models.embedding_model = fakes.embedding
+    models.gemini_model = fakes.gemini
+    models.gemini_flash_model = fakes.gemini_flash
+    sys.modules["app.core.models"] = models
+
+    from app.infrastructure.database.elasticsearch_connector import es_connector
+    es_connector.endpoint, es_connector.api_key = "http://elasticsearch.loadtest:9200", "loadtest"
+    es_connector._client = fakes.elasticsearch
+    es_connector._async_client = fakes.async_elasticsearch
+
+    from app.api.v1 import agent_brand
+    agent_brand.imagen_model = fakes.imagen
+    agent_brand.bucket = fakes.bucket
+    agent_brand.embedding_model = fakes.vertex_embedding
+
+    from app.application.services import notification_service
+    notification_service.default_backend = fakes.messaging
@@ -0,0 +1,149 @@
+# File: backend/benchmarks/feed_scan.py
+# Description: Exercises the Proactive Agent's feed scanner against a local HTTP
+# stand-in serving fixture RSS feeds: a full first scan, a conditional re-scan
+# (expects 304s), a scan after new items were published (expects only the new
+# items to be parsed), and a slow feed that must time out without stalling the rest.
+#
+# Usage (from the backend directory):
+#   python -m benchmarks.feed_scan [--feeds 20] [--items 200] [--new-items 5] [--slow-seconds 5] [--timeout 1]
+
+import argparse
+import asyncio
+import hashlib
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.application.services.news_feed_service import (
+    FeedConfig, scan_feeds, mark_scanned, get_http_client, close_http_client)
+from app.infrastructure.storage.feed_state_store import FeedStateStore
+from app.infrastructure.storage.seen_item_store import SeenItemStore
+
+KEYWORDS = ["umkm", "ekspor", "pameran"]
+
+
+def make_fixture_feed(feed_index: int, items: int, newest: int | None = None) -> bytes:
+    """
+    Synthetic RSS document listing items `newest - 1` down to `newest - items`,
+    newest first; every fifth item mentions an SME keyword.
+    """
+    newest = items if newest is None else newest
+    entries = []
+    for i in range(newest - 1, newest - items - 1, -1):
+        keyword = KEYWORDS[i % len(KEYWORDS)] if i % 5 == 0 else "pasar"
+        entries.append(
+            f"<item><title>Berita {feed_index}-{i} tentang {keyword}</title>"
+            f"<link>https://example.test/{feed_index}/{i}</link>"
+            f"<guid>feed{feed_index}-item{i}</guid>"
+            f"<description>Ringkasan berita {i} untuk pelaku usaha.</description></item>")
+    return ("<?xml version='1.0' encoding='UTF-8'?><rss version='2.0'><channel>"
+            f"<title>Fixture {feed_index}</title>{''.join(entries)}</channel></rss>").encode('utf-8')
+
+
+class FixtureServer:
+    """Serves /feed/<n>.xml with ETag/Last-Modified validators; /slow/<n>.xml answers late."""
+
+    def __init__(self, feed_count: int, items: int, slow_seconds: float):
+        self.feed_count, self.items, self.newest = feed_count, items, items
+        self.publish(0)
+        self.slow_seconds = slow_seconds
+        self.requests = {"200": 0, "304": 0}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.startswith('/slow/'):
+                    time.sleep(server.slow_seconds)
+                    body = make_fixture_feed(999, 10)
+                else:
+                    body = server.feeds.get(self.path)
+                if body is None:
+                    self.send_error(404)
+                    return
+                etag = f'"{hashlib.md5(body).hexdigest()}"'
+                if self.headers.get('If-None-Match') == etag:
+                    server.requests["304"] += 1
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                server.requests["200"] += 1
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/rss+xml')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', server.last_modified)
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+        class Server(ThreadingHTTPServer):
+            daemon_threads = True
+            request_queue_size = 128  # the default backlog of 5 drops concurrent connects
+
+        self.httpd = Server(('127.0.0.1', 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def publish(self, new_items: int):
+        """Adds `new_items` items to the top of every feed; the oldest ones drop off."""
+        self.newest += new_items
+        self.feeds = {f"/feed/{n}.xml": make_fixture_feed(n, self.items, self.newest)
+                      for n in range(self.feed_count)}
+        self.last_modified = formatdate(time.time(), usegmt=True)
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+
+
+async def run(args):
+    with FixtureServer(args.feeds, args.items, args.slow_seconds) as server:
+        feeds = [FeedConfig(name=f"fixture-{n}", url=f"{server.base_url}/feed/{n}.xml",
+                            source=f"Fixture {n}", timeout=args.timeout)
+                 for n in range(args.feeds)]
+        feeds.append(FeedConfig(name="slow", url=f"{server.base_url}/slow/0.xml",
+                                source="Slow", timeout=args.timeout))
+        state, seen = FeedStateStore(), SeenItemStore()
+        client = get_http_client()
+
+        for label in ("first scan", "conditional re-scan", "scan after new items"):
+            if label == "scan after new items":
+                server.publish(args.new_items)
+            before = dict(server.requests)
+            start = time.perf_counter()
+            results = await scan_feeds(feeds, client=client, state=state, seen=seen)
+            mark_scanned(results, seen, state)
+            elapsed = time.perf_counter() - start
+            statuses = {}
+            for r in results:
+                statuses[r.status] = statuses.get(r.status, 0) + 1
+            print(f"[+] {label}: {elapsed * 1000:.0f} ms wall, statuses {statuses}, "
+                  f"{sum(len(r.items) for r in results)} new / {sum(r.skipped for r in results)} skipped items, "
+                  f"{sum(r.stopped_early for r in results)} feeds stopped early, "
+                  f"server 200s={server.requests['200'] - before['200']} 304s={server.requests['304'] - before['304']}")
+            if elapsed > args.timeout + 1:
+                print(f"[!] {label} took longer than the per-feed timeout; the slow feed stalled the scan.")
+        await close_http_client()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan fixture RSS feeds from a local HTTP stand-in.")
+    parser.add_argument("--feeds", type=int, default=20)
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--new-items", type=int, default=5)
+    parser.add_argument("--slow-seconds", type=float, default=5.0)
+    parser.add_argument("--timeout", type=float, default=1.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# File: backend/benchmarks/keyword_matching.py
+# Description: Compares the Proactive Agent's keyword matchers (the n-gram set
+# lookup and the compiled automaton) with the previous per-item substring scan
+# over every keyword, at growing keyword counts, and checks that both matchers
+# find the same matches. Keywords are split across subscribers, as with
+# per-merchant keyword lists. compile_matcher switches from the set to the
+# automaton at KEYWORD_AUTOMATON_MIN_KEYWORDS.
+#
+# Usage (from the backend directory):
+#   python -m benchmarks.keyword_matching [--keywords 10 100 1000 50000] [--items 300] [--repeat 3]
+
+import argparse
+import json
+import random
+import time
+
+from app.application.services.keyword_matcher import KEYWORD_AUTOMATON_MIN_KEYWORDS, KeywordAutomaton, KeywordSet
+
+DEFAULT_KEYWORD_COUNTS = [10, 100, 1_000, 50_000]
+WORDS_PER_ITEM = 60
+SUBSCRIBERS = 200
+SYLLABLES = ["ba", "ka", "la", "ma", "na", "pa", "ra", "sa", "ta", "an", "ng", "ke", "si", "mu", "ur", "ek"]
+
+
+def make_vocabulary(size: int, rng: random.Random) -> list[str]:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def make_keywords(count: int, vocabulary: list[str], rng: random.Random) -> dict[str, set[str]]:
+    """`count` one- to three-word keywords, each owned by one or more subscribers."""
+    keywords: dict[str, set[str]] = {}
+    while len(keywords) < count:
+        phrase = " ".join(rng.choice(vocabulary) for _ in range(rng.choice((1, 1, 2, 3))))
+        keywords.setdefault(phrase, set()).add(f"merchant-{rng.randrange(SUBSCRIBERS)}")
+    return keywords
+
+
+def make_items(count: int, vocabulary: list[str], keywords: list[str], rng: random.Random) -> list[str]:
+    """Item texts of random words; about half contain a keyword, some with a clitic attached."""
+    items = []
+    for _ in range(count):
+        words = [rng.choice(vocabulary) for _ in range(WORDS_PER_ITEM)]
+        if rng.random() < 0.5:
+            keyword = rng.choice(keywords)
+            if rng.random() < 0.3:
+                keyword += rng.choice(("nya", "lah", "pun"))
+            words.insert(rng.randrange(len(words)), keyword)
+        items.append(" ".join(words).capitalize() + ".")
+    return items
+
+
+def best_of(fn, repeat: int) -> tuple[float, object]:
+    timings, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000, result
+
+
+def naive_scan(items: list[str], keywords: list[str]) -> int:
+    """
+    The previous substring check, extended to report every matching keyword
+    (needed to know which subscribers to notify) instead of stopping at the first.
+    """
+    matched = 0
+    for text in items:
+        full_text_to_search = text.lower()
+        if [keyword for keyword in keywords if keyword in full_text_to_search]:
+            matched += 1
+    return matched
+
+
+def run(keyword_count: int, item_count: int, repeat: int, seed: int = 11) -> dict:
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(max(2_000, keyword_count), rng)
+    keywords = make_keywords(keyword_count, vocabulary, rng)
+    items = make_items(item_count, vocabulary, list(keywords), rng)
+
+    build_ms, automaton = best_of(lambda: KeywordAutomaton(keywords), 1)
+    match_ms, matches = best_of(lambda: [automaton.find(text) for text in items], repeat)
+    set_build_ms, keyword_set = best_of(lambda: KeywordSet(keywords), 1)
+    set_match_ms, set_matches = best_of(lambda: [keyword_set.find(text) for text in items], repeat)
+    naive_ms, naive_matched = best_of(lambda: naive_scan(items, list(keywords)), 1)
+
+    return {
+        "keywords": keyword_count,
+        "items": item_count,
+        "automaton_states": len(automaton.goto),
+        "build_ms": build_ms,
+        "automaton_match_ms": match_ms,
+        "set_build_ms": set_build_ms,
+        "set_match_ms": set_match_ms,
+        "naive_match_ms": naive_ms,
+        "speedup": naive_ms / match_ms if match_ms else None,
+        "matchers_agree": set_matches == matches,
+        # Substring search also matches inside longer words, so it finds more items.
+        "items_matched_automaton": sum(1 for m in matches if m),
+        "items_matched_naive": naive_matched,
+        "subscribers_notified": len(set().union(*(x.subscribers for m in matches for x in m))),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the opportunity keyword matcher.")
+    parser.add_argument("--keywords", type=int, nargs="+", default=DEFAULT_KEYWORD_COUNTS)
+    parser.add_argument("--items", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="keyword_matching_benchmark.json")
+    args = parser.parse_args()
+
+    results = []
+    for count in args.keywords:
+        result = run(count, args.items, args.repeat)
+        results.append(result)
+        used = "automaton" if count >= KEYWORD_AUTOMATON_MIN_KEYWORDS else "set"
+        print(f"[+] {count:>6,} keywords x {args.items} items ({used} used): "
+              f"set {result['set_build_ms']:6.1f} + {result['set_match_ms']:7.1f} ms, "
+              f"automaton {result['build_ms']:8.1f} + {result['automaton_match_ms']:7.1f} ms, "
+              f"naive {result['naive_match_ms']:9.1f} ms, {result['automaton_states']:,} states, "
+              f"matched {result['items_matched_automaton']} vs {result['items_matched_naive']} items")
+        if not result["matchers_agree"]:
+            print(f"[!] The set and automaton matchers disagree at {count} keywords.")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"[+] Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
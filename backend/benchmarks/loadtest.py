@@ -0,0 +1,411 @@
+# File: backend/benchmarks/loadtest.py
+# Description: End-to-end load test of every agent endpoint.
+# By default the app runs in-process with the local fakes from benchmarks.fakes
+# (no Gemini, Vertex, Elasticsearch, GCS or FCM calls), and fixture RSS feeds
+# are served by the feed_scan benchmark's local HTTP stand-in. With --url the
+# same traffic is sent to a running deployment instead (no fakes).
+#
+# A closed-loop driver with --concurrency workers replays a weighted mix of
+# requests and reports throughput, error rate and p50/p95/p99 latency per
+# endpoint. Per-stage latencies (embed, search, generate, ...) come from the
+# app's /metrics histograms, so they are exact only to the bucket bounds.
+# Results are written as JSON, and --compare flags p95 and throughput
+# regressions against an earlier result file (exit status 1 if any).
+#
+# Usage (from the backend directory):
+#   python -m benchmarks.loadtest [--requests 500 | --duration 60] [--concurrency 16] [--seed 7]
+#                                 [--mix legal_query=3,brand_kit=0.5,...]
+#                                 [--service gemini=900:0.4:0.01 --service elasticsearch=12:0.5]
+#                                 [--output results.json] [--compare baseline.json --threshold 0.1]
+#                                 [--url https://staging.example.com]
+
+import argparse
+import asyncio
+import io
+import json
+import math
+import os
+import random
+import subprocess
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable
+
+import httpx
+
+from benchmarks.fakes import DEFAULT_PROFILES, Fakes, ServiceProfile, install_fakes
+from benchmarks.sales_analytics import make_sales_frame
+
+LEGAL_QUESTIONS = [
+    "Apa saja syarat izin usaha mikro?",
+    "How do I register for an NIB as a home business?",
+    "Do I need a halal certificate to sell sambal online?",
+    "What tax rate applies to UMKM with revenue under 4.8 billion?",
+    "Is a permit required to hire two employees?",
+    "What are the legal requirements for food packaging labels?",
+    "How long is a business license valid?",
+    "Which regulation covers online shop consumer protection?",
+]
+MARKETING_QUESTIONS = [
+    "How can I promote my coffee shop on Instagram?",
+    "Ide konten TikTok untuk jualan keripik?",
+    "What is a good Ramadan promotion for a bakery?",
+    "How do I get more repeat customers for my laundry?",
+    "Should I run discounts or bundles for my batik store?",
+    "How to write captions that sell handmade soap?",
+    "What branding colors suit an organic snack brand?",
+    "How do I grow a WhatsApp broadcast list?",
+]
+
+
+@dataclass
+class Endpoint:
+    name: str
+    method: str
+    path: str
+    build: Callable[[random.Random], dict]  # httpx request kwargs
+    weight: float
+
+
+def pick_question(rng: random.Random, questions: list[str]) -> str:
+    # Zipf-like skew: popular questions repeat, as after a push notification.
+    return questions[min(int(rng.paretovariate(1.2)) - 1, len(questions) - 1)]
+
+
+def make_endpoints(csv_bytes: bytes, image_bytes: bytes, batch_size: int) -> list[Endpoint]:
+    def query(questions):
+        return lambda rng: {"json": {"query": pick_question(rng, questions)}}
+
+    def batch(questions):
+        return lambda rng: {"json": {"queries": rng.sample(questions, min(batch_size, len(questions)))}}
+
+    def brand(rng):
+        return {"data": {"business_name": f"Toko {rng.randint(1, 999)}"},
+                "files": {"file": ("product.png", image_bytes, "image/png")}}
+
+    return [
+        Endpoint("orchestrator_query", "POST", "/api/v1/orchestrator/query",
+                 lambda rng: {"json": {"query": pick_question(rng, rng.choice([LEGAL_QUESTIONS, MARKETING_QUESTIONS]))}}, 3),
+        Endpoint("legal_query", "POST", "/api/v1/agent/legal/query", query(LEGAL_QUESTIONS), 3),
+        Endpoint("marketing_query", "POST", "/api/v1/agent/marketing/query", query(MARKETING_QUESTIONS), 3),
+        Endpoint("legal_batch", "POST", "/api/v1/agent/legal/batch_query", batch(LEGAL_QUESTIONS), 0.5),
+        Endpoint("marketing_batch", "POST", "/api/v1/agent/marketing/batch_query", batch(MARKETING_QUESTIONS), 0.5),
+        Endpoint("operational_analyze", "POST", "/api/v1/agent/operational/analyze",
+                 lambda rng: {"files": {"file": ("sales.csv", csv_bytes, "text/csv")}}, 1),
+        Endpoint("brand_kit", "POST", "/api/v1/agent/brand/generate_kit", brand, 0.5),
+        Endpoint("brand_kit_stream", "POST", "/api/v1/agent/brand/generate_kit/stream", brand, 0.5),
+        Endpoint("proactive_scan", "POST", "/api/v1/agent/proactive/scan_opportunities", lambda rng: {}, 0.25),
+    ]
+
+
+def apply_mix(endpoints: list[Endpoint], mix: str | None) -> list[Endpoint]:
+    """`name=weight,...` overrides; weight 0 drops an endpoint."""
+    if mix:
+        known = {e.name: e for e in endpoints}
+        for entry in mix.split(","):
+            name, weight = entry.split("=")
+            if name.strip() not in known:
+                raise SystemExit(f"Unknown endpoint '{name}'. Known: {', '.join(known)}")
+            known[name.strip()].weight = float(weight)
+    return [e for e in endpoints if e.weight > 0]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))]
+
+
+def summarize(latencies_ms: list[float], errors: int, statuses: dict, elapsed: float) -> dict:
+    count = len(latencies_ms)
+    summary = {"requests": count, "errors": errors, "error_rate": round(errors / count, 4) if count else 0.0,
+               "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0, "status_codes": statuses}
+    if latencies_ms:
+        summary.update({f"p{p}_ms": round(percentile(latencies_ms, p), 1) for p in (50, 95, 99)})
+        summary["mean_ms"] = round(sum(latencies_ms) / count, 1)
+        summary["max_ms"] = round(max(latencies_ms), 1)
+    return summary
+
+
+# --- Per-stage latencies from the /metrics histograms
+
+def parse_stage_histograms(text: str) -> dict[tuple[str, str], dict]:
+    """{(component, stage): {"buckets": {le: cumulative count}, "sum": s, "count": n}} from /metrics."""
+    series: dict[tuple[str, str], dict] = {}
+    for line in text.splitlines():
+        if not line.startswith("umkm_stage_duration_seconds"):
+            continue
+        name_labels, value = line.rsplit(" ", 1)
+        name, _, labels = name_labels.partition("{")
+        fields = dict(part.split("=", 1) for part in labels.rstrip("}").split(","))
+        fields = {k: v.strip('"') for k, v in fields.items()}
+        entry = series.setdefault((fields["component"], fields["stage"]), {"buckets": {}, "sum": 0.0, "count": 0})
+        if name.endswith("_bucket"):
+            entry["buckets"][float(fields["le"])] = float(value)
+        elif name.endswith("_sum"):
+            entry["sum"] = float(value)
+        elif name.endswith("_count"):
+            entry["count"] = float(value)
+    return series
+
+
+def histogram_quantile(q: float, buckets: dict[float, float]) -> float | None:
+    """Prometheus-style quantile with linear interpolation inside the bucket."""
+    bounds = sorted(buckets)
+    total = buckets[bounds[-1]] if bounds else 0
+    if total <= 0:
+        return None
+    rank = q * total
+    previous_bound, previous_count = 0.0, 0.0
+    for bound in bounds:
+        count = buckets[bound]
+        if count >= rank:
+            if math.isinf(bound):
+                return previous_bound
+            if count == previous_count:
+                return bound
+            return previous_bound + (bound - previous_bound) * (rank - previous_count) / (count - previous_count)
+        previous_bound, previous_count = bound, count
+    return previous_bound
+
+
+def stage_summary(before: dict, after: dict) -> dict:
+    stages = {}
+    for key, entry in sorted(after.items()):
+        old = before.get(key, {"buckets": {}, "sum": 0.0, "count": 0})
+        count = entry["count"] - old["count"]
+        if count <= 0:
+            continue
+        buckets = {le: n - old["buckets"].get(le, 0) for le, n in entry["buckets"].items()}
+        summary = {"count": int(count), "mean_ms": round((entry["sum"] - old["sum"]) / count * 1000, 1)}
+        for p in (50, 95, 99):
+            value = histogram_quantile(p / 100, buckets)
+            summary[f"p{p}_ms"] = round(value * 1000, 1) if value is not None else None
+        stages[f"{key[0]}.{key[1]}"] = summary
+    return stages
+
+
+# --- Driver
+
+async def drive(client: httpx.AsyncClient, endpoints: list[Endpoint], args) -> tuple[dict, dict, float]:
+    rng = random.Random(args.seed)
+    # Each request is drawn from the seeded generator when a worker issues it. Drawing
+    # never awaits, so a seed replays the same sequence in issue order (with --duration,
+    # the same prefix of it); which worker sends each request varies between runs.
+    count = args.requests if args.duration is None else 10_000_000
+    weights = [e.weight for e in endpoints]
+    latencies = {e.name: [] for e in endpoints}
+    errors = {e.name: 0 for e in endpoints}
+    statuses = {e.name: {} for e in endpoints}
+    issued = 0
+    start = time.perf_counter()
+    deadline = start + args.duration if args.duration is not None else None
+
+    def next_request():
+        nonlocal issued
+        if issued >= count or (deadline is not None and time.perf_counter() >= deadline):
+            return None
+        issued += 1
+        endpoint = rng.choices(endpoints, weights)[0]
+        return endpoint, endpoint.build(rng)
+
+    async def worker():
+        while (request := next_request()) is not None:
+            endpoint, kwargs = request
+            began = time.perf_counter()
+            try:
+                response = await client.request(endpoint.method, endpoint.path, **kwargs)
+                status = str(response.status_code)
+                failed = response.status_code >= 400
+                if not failed and response.headers.get("content-type", "").startswith("application/x-ndjson"):
+                    # Streams answer 200 up front; failures arrive as error events.
+                    failed = any(json.loads(line).get("event") == "error"
+                                 for line in response.text.splitlines() if line.strip())
+            except Exception as e:
+                status, failed = type(e).__name__, True
+            latencies[endpoint.name].append((time.perf_counter() - began) * 1000)
+            statuses[endpoint.name][status] = statuses[endpoint.name].get(status, 0) + 1
+            errors[endpoint.name] += failed
+
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    per_endpoint = {name: summarize(values, errors[name], statuses[name], elapsed)
+                    for name, values in latencies.items() if values}
+    all_latencies = [value for values in latencies.values() for value in values]
+    all_statuses = {}
+    for codes in statuses.values():
+        for code, n in codes.items():
+            all_statuses[code] = all_statuses.get(code, 0) + n
+    overall = summarize(all_latencies, sum(errors.values()), all_statuses, elapsed)
+    return per_endpoint, overall, elapsed
+
+
+async def scrape_stages(client: httpx.AsyncClient) -> dict:
+    try:
+        response = await client.get("/metrics")
+        return parse_stage_histograms(response.text) if response.status_code == 200 else {}
+    except httpx.HTTPError:
+        return {}
+
+
+async def run(args, endpoints: list[Endpoint], fakes: Fakes | None) -> dict:
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+        feeds = None
+    else:
+        from app import create_app
+        from app.api.v1.agent_proactive import scan_scheduler
+        from app.application.services.news_feed_service import FeedConfig
+        from benchmarks.feed_scan import FixtureServer
+
+        app = create_app()
+        feeds = FixtureServer(args.feeds, 100, slow_seconds=0).__enter__()
+        configs = [FeedConfig(name=f"fixture-{n}", url=f"{feeds.base_url}/feed/{n}.xml", source=f"Fixture {n}")
+                   for n in range(args.feeds)]
+        scan_scheduler.load_feeds = lambda: configs
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest",
+                                   timeout=args.timeout)
+    try:
+        before = await scrape_stages(client)
+        per_endpoint, overall, elapsed = await drive(client, endpoints, args)
+        stages = stage_summary(before, await scrape_stages(client))
+    finally:
+        await client.aclose()
+        if feeds is not None:
+            from app.application.services.news_feed_service import close_http_client
+            await close_http_client()
+            feeds.__exit__()
+
+    return {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "git_commit": git_commit(),
+            "target": args.url or "in-process (fakes)",
+            "concurrency": args.concurrency,
+            "requests": overall["requests"],
+            "duration_s": round(elapsed, 2),
+            "seed": args.seed,
+            "mix": {e.name: e.weight for e in endpoints},
+            "fake_services": fakes.stats() if fakes else None,
+        },
+        "overall": overall,
+        "endpoints": per_endpoint,
+        "stages": stages,
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(result: dict, baseline: dict, threshold: float) -> list[str]:
+    """Regressions of p95 latency or throughput beyond `threshold` (a fraction) per endpoint."""
+    regressions = []
+    print(f"\n[*] Compared with baseline {baseline['meta'].get('git_commit')} ({baseline['meta'].get('started_at')}):")
+    differing = [key for key in ("target", "concurrency", "mix", "seed")
+                 if baseline["meta"].get(key) != result["meta"].get(key)]
+    if differing:
+        print(f"[!] The baseline ran with a different {', '.join(differing)}; the comparison is only indicative.")
+    print(f"    {'endpoint':22s} {'p95 ms':>18s} {'throughput rps':>20s}")
+    for name, current in result["endpoints"].items():
+        old = baseline["endpoints"].get(name)
+        if not old or "p95_ms" not in old or "p95_ms" not in current:
+            continue
+        p95_change = current["p95_ms"] / old["p95_ms"] - 1 if old["p95_ms"] else 0.0
+        rps_change = current["throughput_rps"] / old["throughput_rps"] - 1 if old["throughput_rps"] else 0.0
+        flag = ""
+        if p95_change > threshold:
+            regressions.append(f"{name}: p95 {old['p95_ms']} -> {current['p95_ms']} ms ({p95_change:+.0%})")
+            flag = "  [!] regression"
+        if rps_change < -threshold:
+            regressions.append(f"{name}: throughput {old['throughput_rps']} -> {current['throughput_rps']} rps "
+                               f"({rps_change:+.0%})")
+            flag = "  [!] regression"
+        print(f"    {name:22s} {old['p95_ms']:>7.1f} -> {current['p95_ms']:>7.1f} "
+              f"{old['throughput_rps']:>8.2f} -> {current['throughput_rps']:>8.2f}{flag}")
+    return regressions
+
+
+def print_report(result: dict):
+    print(f"\n[+] {result['overall']['requests']} requests in {result['meta']['duration_s']} s "
+          f"({result['overall']['throughput_rps']} req/s), {result['overall']['errors']} errors.")
+    print(f"    {'endpoint':22s} {'reqs':>6s} {'err':>5s} {'rps':>7s} {'p50':>8s} {'p95':>8s} {'p99':>8s}")
+    for name, s in result["endpoints"].items():
+        print(f"    {name:22s} {s['requests']:>6d} {s['errors']:>5d} {s['throughput_rps']:>7.2f} "
+              f"{s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f} {s['p99_ms']:>8.1f}")
+    if result["stages"]:
+        print(f"\n    {'stage':32s} {'count':>6s} {'mean':>8s} {'p50':>8s} {'p95':>8s} {'p99':>8s}")
+        for name, s in result["stages"].items():
+            cells = " ".join(f"{s[k]:>8.1f}" if s[k] is not None else f"{'-':>8s}"
+                             for k in ("mean_ms", "p50_ms", "p95_ms", "p99_ms"))
+            print(f"    {name:32s} {s['count']:>6d} {cells}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay mixed traffic against every agent endpoint.")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=None, help="Run for this many seconds instead of --requests.")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--mix", default=None, help="Endpoint weights, e.g. legal_query=5,brand_kit=0")
+    parser.add_argument("--service", action="append", default=[],
+                        help="Fake service profile name=median_ms[:sigma[:error_rate]]; services: "
+                             + ", ".join(DEFAULT_PROFILES))
+    parser.add_argument("--batch-size", type=int, default=5, help="Questions per batch_query request.")
+    parser.add_argument("--csv-rows", type=int, default=20_000, help="Rows of the uploaded sales CSV.")
+    parser.add_argument("--feeds", type=int, default=5, help="Fixture RSS feeds for the proactive scan.")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--url", default=None, help="Send traffic to a running deployment instead (no fakes).")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--compare", default=None, help="Earlier result file to check for regressions.")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Allowed p95/throughput change for --compare.")
+    args = parser.parse_args()
+
+    fakes = None
+    if not args.url:
+        profiles = dict(DEFAULT_PROFILES)
+        for entry in args.service:
+            name, _, spec = entry.partition("=")
+            if name not in profiles:
+                raise SystemExit(f"Unknown service '{name}'. Known: {', '.join(profiles)}")
+            profiles[name] = ServiceProfile.parse(spec)
+        # Keep the stores in memory and the built-in scheduler off for the run.
+        for variable in ("SALES_STORE_DIR", "NEWS_FEED_STATE_FILE", "NEWS_SEEN_ITEMS_FILE", "NEWS_KEYWORDS_FILE",
+                         "MERCHANT_PROFILES_FILE"):
+            os.environ[variable] = ""
+        os.environ["PROACTIVE_SCHEDULER_ENABLED"] = "false"
+        fakes = Fakes(profiles, seed=args.seed)
+        install_fakes(fakes)
+
+    csv_buffer = io.StringIO()
+    make_sales_frame(args.csv_rows).to_csv(csv_buffer, index=False)
+    image_bytes = b"\x89PNG\r\n\x1a\n" + random.Random(args.seed).randbytes(200_000)
+    endpoints = apply_mix(make_endpoints(csv_buffer.getvalue().encode("utf-8"), image_bytes, args.batch_size),
+                          args.mix)
+
+    print(f"[*] Load test: {args.requests if args.duration is None else f'{args.duration:.0f} s of'} requests, "
+          f"concurrency {args.concurrency}, target {args.url or 'in-process app with local fakes'}.")
+    result = asyncio.run(run(args, endpoints, fakes))
+    print_report(result)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"\n[+] Results written to {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(result, json.load(f), args.threshold)
+        if regressions:
+            print("\n[!] Regressions beyond the threshold:")
+            for regression in regressions:
+                print(f"    - {regression}")
+            raise SystemExit(1)
+        print("\n[+] No regressions beyond the threshold.")
+
+
+if __name__ == "__main__":
+    main()
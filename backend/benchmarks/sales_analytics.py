@@ -0,0 +1,93 @@
+# File: backend/benchmarks/sales_analytics.py
+# Description: Micro-benchmarks for each aggregate in the Operational Agent's
+# vectorized analytics and forecasting modules, on in-memory synthetic sales frames.
+#
+# Usage (from the backend directory):
+#   python -m benchmarks.sales_analytics [--rows 1000000 5000000] [--repeat 5] [--output results.json]
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.application.services import sales_analytics, sales_forecasting
+
+DEFAULT_ROW_COUNTS = [1_000_000, 5_000_000]
+PRODUCT_COUNT = 2_000
+DAYS = 730
+ROWS_PER_ORDER = 3
+
+
+def make_sales_frame(rows: int, seed: int = 7) -> pd.DataFrame:
+    """Synthetic sales rows with the same dtypes the ingestion layer produces."""
+    rng = np.random.default_rng(seed)
+    products = pd.Categorical.from_codes(
+        rng.integers(0, PRODUCT_COUNT, size=rows),
+        categories=[f"Produk {i:05d}" for i in range(PRODUCT_COUNT)])
+    dates = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, DAYS, size=rows), unit="D")
+    return pd.DataFrame({
+        "product_name": products,
+        "quantity": rng.integers(1, 10, size=rows).astype("float64"),
+        "price": (rng.integers(1, 200, size=rows) * 500).astype("float64"),
+        "date": dates.strftime("%Y-%m-%d"),
+        "order_id": (np.arange(rows) // ROWS_PER_ORDER).astype(str),
+    })
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def run(rows: int, repeat: int) -> dict:
+    df = sales_analytics.with_revenue(make_sales_frame(rows))
+    products = sales_analytics.product_aggregates(df)
+    daily_product = sales_analytics.daily_product_aggregates(df, "date")
+    orders = sales_analytics.order_aggregates(df, "order_id")
+    daily = sales_analytics.revenue_series(daily_product, "D")
+
+    cases = {
+        "with_revenue": lambda: sales_analytics.with_revenue(df),
+        "product_aggregates": lambda: sales_analytics.product_aggregates(df),
+        "daily_product_aggregates": lambda: sales_analytics.daily_product_aggregates(df, "date"),
+        "order_aggregates": lambda: sales_analytics.order_aggregates(df, "order_id"),
+        "merge_aggregates(products)": lambda: sales_analytics.merge_aggregates(products, products),
+        "top_n(revenue)": lambda: sales_analytics.top_n(products, "revenue"),
+        "revenue_series(daily)": lambda: sales_analytics.revenue_series(daily_product, "D"),
+        "revenue_series(weekly)": lambda: sales_analytics.revenue_series(daily_product, "W"),
+        "moving_average(7d)": lambda: sales_analytics.moving_average(daily, 7),
+        "basket_size": lambda: sales_analytics.basket_size(orders),
+        "summarize_sales": lambda: sales_analytics.summarize_sales(products, daily_product, orders),
+        "daily_matrices": lambda: sales_forecasting.daily_matrices(daily_product),
+        "forecast_demand": lambda: sales_forecasting.forecast_demand(daily_product),
+    }
+    return {name: best_of(fn, repeat) for name, fn in cases.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark the sales analytics aggregates.")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROW_COUNTS)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default="sales_analytics_benchmark.json")
+    args = parser.parse_args()
+
+    results = {}
+    for rows in args.rows:
+        print(f"[*] {rows:,} rows, {PRODUCT_COUNT:,} products, {DAYS} days (best of {args.repeat}):")
+        results[rows] = run(rows, args.repeat)
+        for name, ms in results[rows].items():
+            print(f"    - {name:28s} {ms:10.2f} ms")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"[+] Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# File: backend/benchmarks/semantic_matching.py
+# Description: Benchmarks scoring news items against merchant profiles for the
+# Proactive Agent's semantic matching, with synthetic clustered embeddings.
+# Compares float32 / float16 / int8 profile storage and chunk sizes: storage
+# size, scoring time, peak extra memory and agreement with exact float32 results.
+#
+# Usage (from the backend directory):
+#   python -m benchmarks.semantic_matching [--merchants 100000] [--items 300] [--chunks 4096 16384 65536]
+#                                          [--noise 0.08]   (higher noise -> fewer matches)
+
+import argparse
+import json
+import resource
+import time
+import tracemalloc
+
+import numpy as np
+
+from app.application.services.semantic_matcher import score_profiles
+from app.infrastructure.storage.profile_vector_store import ProfileVectorStore, PROFILE_DIMENSIONS
+
+TOPICS = 64
+THRESHOLD = 0.55
+TOP_K = 3
+
+
+def make_vectors(count: int, centers: np.ndarray, noise: float, rng: np.random.Generator) -> np.ndarray:
+    """Unit vectors scattered around random topic centers, like embeddings of related texts."""
+    vectors = centers[rng.integers(0, len(centers), size=count)]
+    vectors = vectors + rng.normal(scale=noise, size=vectors.shape).astype(np.float32)
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def make_store(dtype: str, merchant_ids: list[str], vectors: np.ndarray) -> ProfileVectorStore:
+    store = ProfileVectorStore(dtype=dtype)
+    store.upsert_many(merchant_ids, vectors, persist=False)
+    return store
+
+
+def match_set(rows: np.ndarray, items: np.ndarray) -> set[tuple[int, int]]:
+    return set(zip(rows.tolist(), items.tolist()))
+
+
+def timed(fn, repeat: int):
+    timings, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings) * 1000, peak / 2**20, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark semantic matching of items against merchant profiles.")
+    parser.add_argument("--merchants", type=int, default=100_000)
+    parser.add_argument("--items", type=int, default=300)
+    parser.add_argument("--chunks", type=int, nargs="+", default=[4_096, 16_384, 65_536])
+    parser.add_argument("--noise", type=float, default=0.08)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="semantic_matching_benchmark.json")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(3)
+    centers = rng.normal(size=(TOPICS, PROFILE_DIMENSIONS)).astype(np.float32)
+    profiles = make_vectors(args.merchants, centers, args.noise, rng)
+    items = make_vectors(args.items, centers, args.noise, rng)
+    merchant_ids = [f"merchant-{i}" for i in range(args.merchants)]
+    print(f"[*] {args.merchants:,} merchants x {args.items} items, {PROFILE_DIMENSIONS} dims, "
+          f"top-{TOP_K} above {THRESHOLD}")
+
+    # Reference: float32 profiles, one unchunked matrix product.
+    ones = np.ones(args.merchants, dtype=np.float32)
+    exact_ms, exact_peak, exact = timed(
+        lambda: score_profiles(items, profiles, ones, TOP_K, THRESHOLD, chunk_rows=args.merchants), args.repeat)
+    exact_matches = match_set(exact[0], exact[1])
+    results = [{"storage": "float32", "chunk_rows": args.merchants, "stored_mb": profiles.nbytes / 2**20,
+                "score_ms": exact_ms, "peak_extra_mb": exact_peak, "matches": len(exact_matches),
+                "agreement": 1.0}]
+
+    for dtype in ("float16", "int8"):
+        store = make_store(dtype, merchant_ids, profiles)
+        _, vectors, scales = store.snapshot()
+        for chunk_rows in args.chunks:
+            ms, peak, result = timed(
+                lambda: score_profiles(items, vectors, scales, TOP_K, THRESHOLD, chunk_rows), args.repeat)
+            matches = match_set(result[0], result[1])
+            union = exact_matches | matches
+            results.append({"storage": dtype, "chunk_rows": chunk_rows, "stored_mb": store.nbytes() / 2**20,
+                            "score_ms": ms, "peak_extra_mb": peak, "matches": len(matches),
+                            "agreement": len(exact_matches & matches) / len(union) if union else 1.0})
+
+    for r in results:
+        print(f"    - {r['storage']:8s} chunk {r['chunk_rows']:>7,}: stored {r['stored_mb']:7.1f} MB, "
+              f"score {r['score_ms']:8.1f} ms, peak extra {r['peak_extra_mb']:7.1f} MB, "
+              f"{r['matches']:,} matches, agreement {r['agreement']:.4f}")
+    print(f"[*] Process max RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"[+] Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
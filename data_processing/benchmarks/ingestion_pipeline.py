@@ -0,0 +1,477 @@
+# File: data_processing/benchmarks/ingestion_pipeline.py
+# Description: End-to-end throughput benchmark of the indexing pipelines on
+# synthetic inputs, for sizing reindex jobs as the corpus grows:
+#   - legal:     generated law text -> processing.text_processor chunking -> MiniLM -> umkm_legal_docs
+#   - marketing: generated articles JSON -> MiniLM -> umkm_marketing_kb
+#   - visual:    generated PNG images -> multimodal embedding -> umkm_visual_kb
+# Documents are sent with the real `elasticsearch` client to a local HTTP
+# stand-in for the cluster. The remote Vertex multimodal model is always a fake
+# with a fixed latency; the text model is a deterministic fake unless --model
+# points at the MiniLM files saved by download_model.py.
+#
+# Each pipeline runs in two modes: `per_doc` (what the embed_and_index scripts
+# do today: encode one document, index one document) and `bulk` (batched
+# encoding and _bulk requests of --bulk-size documents). Time is split into
+# load/chunk, encode, serialize (JSON / NDJSON encoding) and transport (HTTP
+# round trips). Every (pipeline, mode, scale) runs in a fresh subprocess, so
+# peak RSS and CPU time are its own; the stand-in runs in the parent process.
+#
+# Usage (from the data_processing directory):
+#   python -m benchmarks.ingestion_pipeline [--pipelines legal marketing visual] [--modes per_doc bulk]
+#                                           [--scales 1 10 100] [--bulk-size 500] [--model PATH]
+#                                           [--vertex-latency-ms 150] [--output results.json]
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import resource
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+TEXT_EMBEDDING_DIMS = 384
+IMAGE_EMBEDDING_DIMS = 1408
+
+# Corpus size at scale 1: roughly today's indexed data.
+BASE_LAWS = 3            # each with LAW_CHAPTERS x PASAL_PER_CHAPTER articles
+LAW_CHAPTERS = 15
+PASAL_PER_CHAPTER = 5
+BASE_ARTICLES = 200
+BASE_IMAGES = 40
+IMAGE_SIZE = 256
+
+WORDS = (
+    "usaha mikro kecil menengah pelaku izin berusaha nomor induk pajak penghasilan peraturan pemerintah "
+    "ayat kewajiban hak daerah sertifikat halal produk pangan kemasan label pemasaran promosi media sosial "
+    "pelanggan penjualan harga diskon konten video merek strategi digital toko online pembeli ulasan kualitas "
+    "layanan pengiriman modal pinjaman koperasi ekspor pameran"
+).split()
+ROMAN = ["I", "II", "III", "IV", "V", "VI", "VII", "VIII", "IX", "X", "XI", "XII", "XIII", "XIV", "XV",
+         "XVI", "XVII", "XVIII", "XIX", "XX"]
+IMAGE_CATEGORIES = ["food", "beverage", "fashion", "craft"]
+
+
+def peak_rss_mb() -> float:
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / (1024 * 1024) if sys.platform == "darwin" else maxrss / 1024
+
+
+# --- Synthetic inputs
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def make_law_text(index: int, rng: random.Random) -> str:
+    """A law in the layout text_processor expects: preamble, 'BAB <roman>' headings, 'Pasal <n>' lines."""
+    lines = [f"UNDANG-UNDANG REPUBLIK INDONESIA NOMOR {index + 1} TAHUN 2008", sentence(rng, 60)]
+    pasal = 1
+    for chapter in range(LAW_CHAPTERS):
+        lines += [f"BAB {ROMAN[chapter % len(ROMAN)]}", sentence(rng, 4).rstrip(".").upper()]
+        for _ in range(PASAL_PER_CHAPTER):
+            lines.append(f"Pasal {pasal}")
+            lines += [f"({ayat}) {sentence(rng, rng.randint(25, 60))}" for ayat in range(1, rng.randint(2, 5))]
+            pasal += 1
+    return "\n".join(lines) + "\n"
+
+
+def make_articles(count: int, rng: random.Random) -> list[dict]:
+    """Articles shaped like the marketing scraper's output."""
+    return [{"url": f"https://example.test/solusiukm/{i}", "title": sentence(rng, 8),
+             "content": " ".join(sentence(rng, rng.randint(12, 30)) for _ in range(rng.randint(20, 60)))}
+            for i in range(count)]
+
+
+def make_png(seed: int, size: int = IMAGE_SIZE) -> bytes:
+    """Deterministic RGB PNG (gradient plus noise) written without an imaging library."""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:size, 0:size]
+    base = rng.integers(0, 256, size=3)
+    pixels = np.stack([(x * (c + 1) + y * (3 - c) + base[c]) % 256 for c in range(3)], axis=-1)
+    pixels = (pixels + rng.integers(0, 24, size=pixels.shape)).clip(0, 255).astype(np.uint8)
+    raw = b"".join(b"\x00" + row.tobytes() for row in pixels)
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw, 6)) + chunk(b"IEND", b"")
+
+
+def prepare_inputs(pipeline: str, scale: int, directory: str) -> str:
+    """Writes the pipeline's synthetic input under `directory` and returns its path."""
+    rng = random.Random(f"{pipeline}-{scale}")
+    if pipeline == "legal":
+        path = os.path.join(directory, "laws")
+        os.makedirs(path)
+        for i in range(BASE_LAWS * scale):
+            with open(os.path.join(path, f"uu_{i}.txt"), "w", encoding="utf-8") as f:
+                f.write(make_law_text(i, rng))
+        return path
+    if pipeline == "marketing":
+        path = os.path.join(directory, "articles.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(make_articles(BASE_ARTICLES * scale, rng), f, ensure_ascii=False)
+        return path
+    tags = {}
+    for i in range(BASE_IMAGES * scale):
+        category = IMAGE_CATEGORIES[i % len(IMAGE_CATEGORIES)]
+        os.makedirs(os.path.join(directory, category), exist_ok=True)
+        filename = f"image_{i:06d}.png"
+        with open(os.path.join(directory, category, filename), "wb") as f:
+            f.write(make_png(i))
+        tags[filename] = {"category": category, "tags": rng.sample(WORDS, 5)}
+    path = os.path.join(directory, "image_tags_categorized.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(tags, f)
+    return path
+
+
+# --- Fake models
+
+def stable_vector(key: str, dims: int) -> np.ndarray:
+    rng = np.random.default_rng(zlib.crc32(key.encode("utf-8")))
+    vector = rng.standard_normal(dims).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+class FakeTextEncoder:
+    """Deterministic stand-in for SentenceTransformer.encode (no model cost; use --model to measure it)."""
+
+    def encode(self, sentences, batch_size: int = 32, **kwargs):
+        if isinstance(sentences, str):
+            return stable_vector(sentences, TEXT_EMBEDDING_DIMS)
+        return np.stack([stable_vector(text, TEXT_EMBEDDING_DIMS) for text in sentences])
+
+
+class FakeVertexEmbedding:
+    """Stand-in for multimodalembedding@001: fixed network latency per image, deterministic vector."""
+
+    def __init__(self, latency_ms: float):
+        self.latency = latency_ms / 1000
+
+    def image_embedding(self, image_bytes: bytes) -> list[float]:
+        time.sleep(self.latency)
+        return stable_vector(str(zlib.crc32(image_bytes)), IMAGE_EMBEDDING_DIMS).tolist()
+
+
+# --- Local Elasticsearch stand-in
+
+class ElasticsearchStandIn:
+    """
+    Answers the requests the indexing scripts make (ping, index exists/delete/create,
+    index a document, _bulk) with a fixed per-request latency, and counts documents
+    and bytes received. It parses nothing beyond counting bulk action lines.
+    """
+
+    def __init__(self, latency_ms: float):
+        self.latency = latency_ms / 1000
+        self.lock = threading.Lock()
+        self.indices: set[str] = set()
+        self.documents = 0
+        self.requests = 0
+        self.bytes_received = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Send each response in one segment; split writes hit the 40 ms delayed-ACK stall.
+            wbufsize = 64 * 1024
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, body: dict | None = None):
+                payload = json.dumps(body).encode() if body is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("X-Elastic-Product", "Elasticsearch")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(payload)
+
+            def _read_body(self) -> bytes:
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                with server.lock:
+                    server.requests += 1
+                    server.bytes_received += len(body)
+                time.sleep(server.latency)
+                return body
+
+            def do_GET(self):
+                self._read_body()
+                self._reply(200, {"name": "standin", "cluster_name": "ingestion-benchmark",
+                                  "version": {"number": "9.1.0", "build_flavor": "default"},
+                                  "tagline": "You Know, for Search"})
+
+            def do_HEAD(self):
+                self._read_body()
+                index = self.path.strip("/").split("?")[0]
+                self._reply(200 if index in server.indices else 404)
+
+            def do_DELETE(self):
+                self._read_body()
+                with server.lock:
+                    server.indices.discard(self.path.strip("/").split("?")[0])
+                self._reply(200, {"acknowledged": True})
+
+            def do_PUT(self):
+                path = self.path.split("?")[0].strip("/")
+                if "/_doc" in path:
+                    self.do_POST()
+                    return
+                self._read_body()
+                with server.lock:
+                    server.indices.add(path)
+                self._reply(200, {"acknowledged": True, "shards_acknowledged": True, "index": path})
+
+            def do_POST(self):
+                body = self._read_body()
+                path = self.path.split("?")[0].strip("/")
+                if path.endswith("_bulk"):
+                    actions = body.count(b"\n") // 2
+                    with server.lock:
+                        server.documents += actions
+                    self._reply(200, {"took": 1, "errors": False, "items": [
+                        {"index": {"status": 201, "result": "created"}}] * actions})
+                else:
+                    with server.lock:
+                        server.documents += 1
+                        document_id = server.documents
+                    self._reply(201, {"_index": path.split("/")[0], "_id": str(document_id), "result": "created"})
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {"documents": self.documents, "requests": self.requests, "bytes_received": self.bytes_received}
+
+
+# --- Worker
+
+class StageClock:
+    """Accumulates wall and CPU time per pipeline stage."""
+
+    def __init__(self):
+        self.wall: dict[str, float] = {}
+        self.cpu: dict[str, float] = {}
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.wall[name] = self.wall.get(name, 0.0) + time.perf_counter() - wall
+            self.cpu[name] = self.cpu.get(name, 0.0) + time.process_time() - cpu
+
+
+INDEX_MAPPINGS = {
+    "legal": ("umkm_legal_docs", TEXT_EMBEDDING_DIMS),
+    "marketing": ("umkm_marketing_kb", TEXT_EMBEDDING_DIMS),
+    "visual": ("umkm_visual_kb", IMAGE_EMBEDDING_DIMS),
+}
+
+
+def load_documents(pipeline: str, path: str, clock: StageClock) -> tuple[list[dict], list]:
+    """Returns (documents without embeddings, inputs to embed), timing the load/chunk stage."""
+    if pipeline == "legal":
+        from processing.text_processor import process_text_to_chunks
+        documents = []
+        for filename in sorted(os.listdir(path)):
+            with clock.stage("load"):
+                with open(os.path.join(path, filename), encoding="utf-8") as f:
+                    text = f.read()
+            with clock.stage("chunk"), contextlib.redirect_stdout(io.StringIO()):
+                documents += process_text_to_chunks(text)
+        return documents, [document["text"] for document in documents]
+    with clock.stage("load"):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    if pipeline == "marketing":
+        documents = [article for article in data if article.get("content")]
+        return documents, [article["content"] for article in documents]
+    documents, images = [], []
+    root = os.path.dirname(path)
+    with clock.stage("load"):
+        for filename, entry in data.items():
+            relative_path = os.path.join(entry["category"], filename)
+            with open(os.path.join(root, relative_path), "rb") as f:
+                images.append(f.read())
+            documents.append({"file_path": relative_path, "category": entry["category"], "tags": entry["tags"]})
+    return documents, images
+
+
+def worker(pipeline: str, mode: str, input_path: str, es_url: str, args):
+    from elasticsearch import Elasticsearch
+
+    if args.model:
+        from sentence_transformers import SentenceTransformer
+        text_encoder = SentenceTransformer(args.model, device="cpu")
+    else:
+        text_encoder = FakeTextEncoder()
+    vertex = FakeVertexEmbedding(args.vertex_latency_ms)
+    client = Elasticsearch(es_url, request_timeout=60)
+    index, dims = INDEX_MAPPINGS[pipeline]
+    client.indices.create(index=index, mappings={"properties": {"embedding": {"type": "dense_vector", "dims": dims}}})
+
+    clock = StageClock()
+    baseline_mb = peak_rss_mb()
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    documents, inputs = load_documents(pipeline, input_path, clock)
+    bytes_sent = requests = 0
+    json_headers = {"content-type": "application/json", "accept": "application/json"}
+
+    def embed(batch: list) -> list[list[float]]:
+        if pipeline == "visual":
+            if mode == "bulk" and args.vertex_concurrency > 1:
+                with ThreadPoolExecutor(args.vertex_concurrency) as pool:
+                    return list(pool.map(vertex.image_embedding, batch))
+            return [vertex.image_embedding(image) for image in batch]
+        if mode == "per_doc":
+            return [text_encoder.encode(text).tolist() for text in batch]
+        return text_encoder.encode(batch, batch_size=args.encode_batch_size).tolist()
+
+    step = 1 if mode == "per_doc" else args.bulk_size
+    for offset in range(0, len(documents), step):
+        batch = documents[offset:offset + step]
+        with clock.stage("encode"):
+            embeddings = embed(inputs[offset:offset + step])
+        with clock.stage("serialize"):
+            for document, embedding in zip(batch, embeddings):
+                document["embedding"] = embedding
+            if mode == "per_doc":
+                payload = json.dumps(batch[0], ensure_ascii=False).encode("utf-8")
+            else:
+                action = json.dumps({"index": {"_index": index}}).encode("utf-8")
+                payload = b"".join(action + b"\n" + json.dumps(document, ensure_ascii=False).encode("utf-8") + b"\n"
+                                   for document in batch)
+        with clock.stage("transport"):
+            if mode == "per_doc":
+                client.perform_request("POST", f"/{index}/_doc", headers=json_headers, body=payload)
+            else:
+                response = client.bulk(operations=payload)
+                if response.get("errors"):
+                    raise RuntimeError("Bulk request reported item errors.")
+        for document in batch:
+            del document["embedding"]  # keep memory at what the scripts hold, not the vectors too
+        bytes_sent += len(payload)
+        requests += 1
+
+    elapsed = time.perf_counter() - start
+    stages = {}
+    for name, wall in clock.wall.items():
+        stages[name] = {"wall_s": round(wall, 3), "cpu_s": round(clock.cpu[name], 3),
+                        "share": round(wall / elapsed, 3) if elapsed else 0.0,
+                        "docs_per_s": round(len(documents) / wall, 1) if wall else None}
+    print(json.dumps({
+        "documents": len(documents),
+        "seconds": round(elapsed, 3),
+        "cpu_seconds": round(time.process_time() - cpu_start, 3),
+        "docs_per_s": round(len(documents) / elapsed, 1) if elapsed else None,
+        "requests": requests,
+        "mb_sent": round(bytes_sent / 1e6, 2),
+        "baseline_rss_mb": round(baseline_mb, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "stages": stages,
+    }))
+
+
+def measure(pipeline: str, mode: str, input_path: str, es_url: str, args) -> dict:
+    command = [sys.executable, "-m", "benchmarks.ingestion_pipeline", "--worker", pipeline, mode, input_path, es_url,
+               "--bulk-size", str(args.bulk_size), "--encode-batch-size", str(args.encode_batch_size),
+               "--vertex-latency-ms", str(args.vertex_latency_ms),
+               "--vertex-concurrency", str(args.vertex_concurrency)]
+    if args.model:
+        command += ["--model", os.path.abspath(args.model)]
+    env = dict(os.environ, HF_HUB_OFFLINE="1", TRANSFORMERS_OFFLINE="1")
+    completed = subprocess.run(command, capture_output=True, text=True, env=env,
+                               cwd=os.path.join(os.path.dirname(__file__), ".."))
+    if completed.returncode != 0:
+        return {"error": completed.stderr.strip().splitlines()[-1] if completed.stderr else "failed"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the legal, marketing and visual indexing pipelines.")
+    parser.add_argument("--pipelines", nargs="+", default=["legal", "marketing", "visual"],
+                        choices=["legal", "marketing", "visual"])
+    parser.add_argument("--modes", nargs="+", default=["per_doc", "bulk"], choices=["per_doc", "bulk"])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10],
+                        help="Corpus size multipliers (e.g. 1 10 100).")
+    parser.add_argument("--bulk-size", type=int, default=500, help="Documents per _bulk request.")
+    parser.add_argument("--encode-batch-size", type=int, default=32)
+    parser.add_argument("--model", default=None, help="MiniLM directory saved by download_model.py (default: fake).")
+    parser.add_argument("--vertex-latency-ms", type=float, default=150.0)
+    parser.add_argument("--vertex-concurrency", type=int, default=8,
+                        help="Concurrent multimodal embedding calls in bulk mode.")
+    parser.add_argument("--es-latency-ms", type=float, default=1.0, help="Stand-in latency per request.")
+    parser.add_argument("--output", default="ingestion_benchmark.json")
+    parser.add_argument("--worker", nargs=4, metavar=("PIPELINE", "MODE", "INPUT", "ES_URL"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        pipeline, mode, input_path, es_url = args.worker
+        worker(pipeline, mode, input_path, es_url, args)
+        return
+
+    print(f"[*] Text encoder: {args.model or 'fake (no model cost)'}; "
+          f"multimodal embedding: fake, {args.vertex_latency_ms:.0f} ms per image.")
+    results = []
+    with ElasticsearchStandIn(args.es_latency_ms) as standin:
+        for pipeline in args.pipelines:
+            for scale in args.scales:
+                with tempfile.TemporaryDirectory() as tmp_dir:
+                    print(f"[*] Generating {pipeline} inputs at {scale}x...")
+                    input_path = prepare_inputs(pipeline, scale, tmp_dir)
+                    for mode in args.modes:
+                        result = {"pipeline": pipeline, "scale": scale, "mode": mode,
+                                  **measure(pipeline, mode, input_path, standin.url, args)}
+                        results.append(result)
+                        if "error" in result:
+                            print(f"    - {pipeline:9s} {scale:>4d}x {mode:7s}: FAILED ({result['error']})")
+                            continue
+                        breakdown = ", ".join(f"{name} {stage['share']:.0%}" for name, stage in result["stages"].items())
+                        print(f"    - {pipeline:9s} {scale:>4d}x {mode:7s}: {result['documents']:>7,} docs in "
+                              f"{result['seconds']:8.2f}s ({result['docs_per_s']:>8.1f} docs/s, "
+                              f"CPU {result['cpu_seconds']:.2f}s), {result['requests']:>6,} requests, "
+                              f"{result['mb_sent']:.1f} MB, peak RSS {result['peak_rss_mb']:.0f} MB [{breakdown}]")
+        print(f"[*] Stand-in received {standin.snapshot()}")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"[+] Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# File: data_processing/embeddings/embed_and_index_visual_tags.py
+# Description:
+# Precomputes multimodal *text* embeddings for the tag vocabulary of the visual
+# knowledge base ('umkm_visual_kb') and indexes them into 'umkm_visual_tags'.
+# The backend's Brand Agent loads these vectors at startup and infers tags for an
+# uploaded image locally, by comparing them with the image's own multimodal
+# embedding, instead of asking Gemini for tags.
+# Run this after embed_and_index_visual.py.
+
+import os
+from vertexai import init
+from vertexai.vision_models import MultiModalEmbeddingModel
+from dotenv import load_dotenv
+from elasticsearch import Elasticsearch, helpers
+from tqdm import tqdm
+
+# --- Configuration ---
+load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '..', '.env'))
+
+# Elasticsearch configuration
+ELASTIC_ENDPOINT = os.getenv("ELASTIC_ENDPOINT")
+ELASTIC_API_KEY = os.getenv("ELASTIC_API_KEY")
+VISUAL_KB_INDEX = "umkm_visual_kb"  # Source of the tag vocabulary
+INDEX_NAME = "umkm_visual_tags"     # One document per tag
+
+# Vertex AI configuration
+GCP_PROJECT_ID = os.getenv("GCP_PROJECT_ID")
+GCP_LOCATION = os.getenv("GCP_LOCATION")
+# Must be the same model used for the image embeddings, so text and image
+# vectors live in the same space.
+EMBEDDING_MODEL_NAME = "multimodalembedding@001"
+EMBEDDING_DIMENSION = 1408
+MAX_VOCABULARY_SIZE = 5000
+
+
+def connect_to_elasticsearch(endpoint_url: str, api_key: str) -> Elasticsearch | None:
+    print("[*] Connecting to Elasticsearch...")
+    try:
+        client = Elasticsearch(hosts=[endpoint_url], api_key=api_key)
+        if client.ping(): print("[+] Successfully connected to Elasticsearch."); return client
+        return None
+    except Exception as e: print(f"[!] Connection error: {e}"); return None
+
+
+def load_tag_vocabulary(es_client: Elasticsearch) -> list[tuple[str, int]]:
+    """Returns (tag, number of images carrying it) for every tag in the visual KB."""
+    print(f"[*] Collecting tag vocabulary from '{VISUAL_KB_INDEX}'...")
+    response = es_client.search(
+        index=VISUAL_KB_INDEX, size=0,
+        aggs={"tags": {"terms": {"field": "tags", "size": MAX_VOCABULARY_SIZE}}}
+    )
+    buckets = response["aggregations"]["tags"]["buckets"]
+    print(f"[+] Found {len(buckets)} distinct tags.")
+    return [(bucket["key"], bucket["doc_count"]) for bucket in buckets]
+
+
+def create_tag_index(es_client: Elasticsearch, index_name: str):
+    """Creates an Elasticsearch index with a mapping for tag embeddings."""
+    print(f"[*] Checking/Creating index '{index_name}'...")
+    mapping = {
+        "properties": {
+            "tag": {"type": "keyword"},
+            "doc_count": {"type": "integer"},
+            "embedding": {
+                "type": "dense_vector",
+                "dims": EMBEDDING_DIMENSION,
+                "index": False  # Only loaded by the backend, never searched
+            }
+        }
+    }
+    try:
+        if es_client.indices.exists(index=index_name):
+            print(f"[*] Index '{index_name}' exists. Deleting for fresh start.")
+            es_client.indices.delete(index=index_name)
+        es_client.indices.create(index=index_name, mappings=mapping)
+        print("[+] Index created successfully.")
+    except Exception as e: print(f"[!] Index creation error: {e}"); raise
+
+
+def get_text_embedding(embedding_model: MultiModalEmbeddingModel, text: str) -> list[float] | None:
+    try:
+        return embedding_model.get_embeddings(contextual_text=text).text_embedding
+    except Exception as e:
+        print(f"\n[!] Error getting embedding for tag '{text}': {e}")
+        return None
+
+
+def main():
+    print("--- Starting Visual Tag Vocabulary Embedding Pipeline ---")
+
+    es_client = connect_to_elasticsearch(ELASTIC_ENDPOINT, ELASTIC_API_KEY)
+    if not es_client: return
+
+    try:
+        print(f"[*] Initializing Vertex AI for project '{GCP_PROJECT_ID}' in '{GCP_LOCATION}'...")
+        init(project=GCP_PROJECT_ID, location=GCP_LOCATION)
+        embedding_model = MultiModalEmbeddingModel.from_pretrained(EMBEDDING_MODEL_NAME)
+        print("[+] Multimodal embedding model loaded.")
+    except Exception as e:
+        print(f"[!] Failed to initialize Vertex AI: {e}")
+        return
+
+    vocabulary = load_tag_vocabulary(es_client)
+    if not vocabulary:
+        print("[!] No tags found in the visual KB. Exiting.")
+        return
+
+    try: create_tag_index(es_client, INDEX_NAME)
+    except Exception: return
+
+    actions = []
+    for tag, doc_count in tqdm(vocabulary, desc="Embedding Tags"):
+        embedding = get_text_embedding(embedding_model, tag)
+        if embedding:
+            actions.append({"_index": INDEX_NAME, "_id": tag,
+                            "_source": {"tag": tag, "doc_count": doc_count, "embedding": embedding}})
+
+    indexed, errors = helpers.bulk(es_client, actions, raise_on_error=False)
+    print(f"[+] Indexed {indexed} tag embeddings ({len(errors)} errors).")
+    print("--- Pipeline Finished ---")
+
+
+if __name__ == "__main__":
+    main()